@@ -4,13 +4,14 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from app.api.deps import db_dependency
-from app.schemas import RuntimeConfigOut, RuntimeConfigUpdate
+from app.schemas import ProviderConcurrencyLimitOut, RuntimeConfigOut, RuntimeConfigUpdate
+from app.services.adaptive_concurrency import concurrency_limits_snapshot
 from app.services.repository import Repository
 
 router = APIRouter(prefix="/api/v1/config", tags=["config"])
 
 
-def _to_schema(config) -> RuntimeConfigOut:
+def _to_schema(config, db: Session) -> RuntimeConfigOut:
     return RuntimeConfigOut(
         quality_threshold=config.quality_threshold,
         max_optimization_loops=config.max_optimization_loops,
@@ -20,6 +21,20 @@ def _to_schema(config) -> RuntimeConfigOut:
         max_parallel_runs=config.max_parallel_runs,
         max_variant_workers=config.max_variant_workers,
         flux_imagen_fallback_enabled=config.flux_imagen_fallback_enabled,
+        adaptive_concurrency_enabled=config.adaptive_concurrency_enabled,
+        adaptive_concurrency_limits=[
+            ProviderConcurrencyLimitOut(
+                scope=row.scope,
+                provider=row.provider,
+                current_limit=row.current_limit,
+                p95_latency_ms=row.p95_latency_ms,
+                error_rate=row.error_rate,
+                sample_count=row.sample_count,
+                worker_id=row.worker_id,
+                updated_at=row.updated_at,
+            )
+            for row in concurrency_limits_snapshot(db)
+        ],
         openai_assistant_id=config.openai_assistant_id,
         openai_assistant_name=config.openai_assistant_name,
         prompt_engineer_mode=config.prompt_engineer_mode,
@@ -44,11 +59,11 @@ def _to_schema(config) -> RuntimeConfigOut:
 @router.get("", response_model=RuntimeConfigOut)
 def get_config(db: Session = Depends(db_dependency)) -> RuntimeConfigOut:
     repo = Repository(db)
-    return _to_schema(repo.get_runtime_config())
+    return _to_schema(repo.get_runtime_config(), db)
 
 
 @router.put("", response_model=RuntimeConfigOut)
 def update_config(payload: RuntimeConfigUpdate, db: Session = Depends(db_dependency)) -> RuntimeConfigOut:
     repo = Repository(db)
     config = repo.update_runtime_config(payload.model_dump(exclude_none=True))
-    return _to_schema(config)
+    return _to_schema(config, db)
@@ -2,17 +2,28 @@ from __future__ import annotations
 
 import json
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Response, UploadFile
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse
 from sqlalchemy.orm import Session
 
 from app.api.deps import db_dependency
+from app.api.pagination import (
+    NEXT_CURSOR_HEADER,
+    decode_cursor,
+    decode_time_cursor,
+    encode_cursor,
+    page_response,
+    parse_fields,
+    wants,
+)
 from app.schemas import (
     CsvJobCancelResponse,
     CsvJobClearResponse,
     CsvJobExportResponse,
     CsvJobImportResponse,
     CsvJobInventorySyncResponse,
+    CsvJobItemOut,
     CsvJobOut,
     CsvJobOverviewOut,
     CsvJobRetryResponse,
@@ -66,9 +77,24 @@ def import_csv_job(
 
 
 @router.get("", response_model=list[CsvJobOut])
-def list_csv_jobs(db: Session = Depends(db_dependency)) -> list[CsvJobOut]:
+def list_csv_jobs(
+    response: Response,
+    limit: int | None = Query(default=None, ge=1, le=1000),
+    cursor: str | None = Query(default=None),
+    fields: str | None = Query(default=None),
+    db: Session = Depends(db_dependency),
+) -> list[CsvJobOut]:
     service = CsvDagService(db)
-    return [CsvJobOut(**row) for row in service.list_jobs()]
+    selected = parse_fields(fields, CsvJobOut)
+    rows = service.list_jobs(
+        limit=limit,
+        cursor=decode_time_cursor(cursor),
+        include_error_detail=wants(selected, "error_detail"),
+    )
+    next_cursor = None
+    if limit is not None and len(rows) == limit:
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    return page_response([CsvJobOut(**row) for row in rows], response=response, fields=selected, next_cursor=next_cursor)
 
 
 @router.delete("", response_model=CsvJobClearResponse)
@@ -88,12 +114,39 @@ def get_csv_job(job_id: str, db: Session = Depends(db_dependency)) -> CsvJobOut:
 
 
 @router.get("/{job_id}/overview", response_model=CsvJobOverviewOut)
-def get_csv_job_overview(job_id: str, db: Session = Depends(db_dependency)) -> CsvJobOverviewOut:
+def get_csv_job_overview(
+    job_id: str,
+    response: Response,
+    limit: int | None = Query(default=None, ge=1, le=5000),
+    cursor: str | None = Query(default=None),
+    fields: str | None = Query(default=None),
+    db: Session = Depends(db_dependency),
+) -> CsvJobOverviewOut:
     service = CsvDagService(db)
-    overview = service.job_overview(job_id)
+    selected = parse_fields(fields, CsvJobItemOut)
+    after_row = decode_cursor(cursor)
+    if after_row is not None:
+        try:
+            after_row = (int(after_row[0]), after_row[1])
+        except (TypeError, ValueError) as exc:
+            raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+    overview = service.job_overview(job_id, limit=limit, after_row=after_row)
     if overview is None:
         raise HTTPException(status_code=404, detail="CSV job not found")
-    return CsvJobOverviewOut(**overview)
+    items = overview["items"]
+    next_cursor = None
+    if limit is not None and len(items) == limit:
+        next_cursor = encode_cursor(items[-1]["row_index"], items[-1]["id"])
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    payload = CsvJobOverviewOut(**overview)
+    if selected is None:
+        return payload
+    content = payload.model_dump()
+    content["items"] = [item.model_dump(include=selected) for item in payload.items]
+    projected = JSONResponse(content=jsonable_encoder(content))
+    if next_cursor:
+        projected.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return projected
 
 
 @router.post("/{job_id}/start", response_model=CsvJobStartResponse)
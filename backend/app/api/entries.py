@@ -3,10 +3,11 @@ from __future__ import annotations
 from datetime import datetime
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile
 from sqlalchemy.orm import Session
 
 from app.api.deps import db_dependency
+from app.api.pagination import decode_cursor, encode_cursor, page_response, parse_fields, wants
 from app.schemas import (
     EntryCreate,
     EntryImportResponse,
@@ -88,6 +89,7 @@ def import_csv(file: UploadFile = File(...), db: Session = Depends(db_dependency
 
 @router.get("", response_model=list[EntryOut])
 def list_entries(
+    response: Response,
     word: str | None = Query(default=None),
     part_of_sentence: str | None = Query(default=None),
     category: str | None = Query(default=None),
@@ -95,9 +97,23 @@ def list_entries(
     status: str | None = Query(default=None),
     min_score: float | None = Query(default=None),
     max_score: float | None = Query(default=None),
+    limit: int | None = Query(default=None, ge=1, le=5000),
+    after_word: str | None = Query(default=None),
+    after_id: str | None = Query(default=None),
+    cursor: str | None = Query(default=None),
+    fields: str | None = Query(default=None),
     db: Session = Depends(db_dependency),
 ) -> list[EntryOut]:
     repo = Repository(db)
+    selected = parse_fields(fields, EntryOut)
+    decoded = decode_cursor(cursor)
+    if decoded is not None:
+        after_word, after_id = str(decoded[0]), decoded[1]
+    include_context = wants(selected, "context")
+    include_profile_options = wants(selected, "person_gender_options", "person_age_options", "person_skin_color_options")
+    deferred: tuple[str, ...] = () if include_context else ("context",)
+    if not include_profile_options:
+        deferred += ("person_gender_options_json", "person_age_options_json", "person_skin_color_options_json")
     rows = repo.list_entries(
         word=word,
         part_of_sentence=part_of_sentence,
@@ -106,19 +122,23 @@ def list_entries(
         status=status,
         min_score=min_score,
         max_score=max_score,
+        limit=limit,
+        after_word=after_word,
+        after_id=after_id,
+        deferred=deferred,
     )
 
-    return [
+    payload_rows = [
         EntryOut(
             id=entry.id,
             word=entry.word,
             part_of_sentence=entry.part_of_sentence,
             category=entry.category,
-            context=entry.context,
+            context=entry.context if include_context else "",
             boy_or_girl=entry.boy_or_girl,
-            person_gender_options=entry_gender_options(entry),
-            person_age_options=entry_age_options(entry),
-            person_skin_color_options=entry_skin_color_options(entry),
+            person_gender_options=entry_gender_options(entry) if include_profile_options else [],
+            person_age_options=entry_age_options(entry) if include_profile_options else [],
+            person_skin_color_options=entry_skin_color_options(entry) if include_profile_options else [],
             batch=entry.batch,
             created_at=entry.created_at,
             updated_at=entry.updated_at,
@@ -127,6 +147,10 @@ def list_entries(
         )
         for entry, run in rows
     ]
+    next_cursor = None
+    if limit is not None and len(rows) == limit:
+        next_cursor = encode_cursor(rows[-1][0].word, rows[-1][0].id)
+    return page_response(payload_rows, response=response, fields=selected, next_cursor=next_cursor)
 
 
 @router.put("/apply-profile-options", response_model=EntryProfileOptionsUpdateResponse)
@@ -3,11 +3,12 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 
 from app.api.deps import db_dependency
+from app.api.pagination import decode_time_cursor, encode_cursor, page_response, parse_fields, wants
 from app.schemas import ExportCreateRequest, ExportOut
 from app.services.export_service import ExportService
 from app.services.repository import Repository
@@ -41,25 +42,37 @@ def _resolve_export_file(record, *, preferred_path: str, fallback_name: str) ->
     return candidate.as_posix()
 
 
-def _to_export_out(record) -> ExportOut:
-    csv_path = _resolve_export_file(record, preferred_path=record.csv_path, fallback_name="export.csv")
-    white_bg_zip_path = _resolve_export_file(record, preferred_path=record.zip_path, fallback_name="images_white_bg.zip")
-    with_bg_zip_path = _resolve_export_file(
-        record,
-        preferred_path="",
-        fallback_name="images_with_bg_last_attempt.zip",
+def _to_export_out(record, *, fields: set[str] | None = None) -> ExportOut:
+    csv_path = _resolve_export_file(record, preferred_path=record.csv_path, fallback_name="export.csv") if wants(fields, "csv_path") else ""
+    white_bg_zip_path = (
+        _resolve_export_file(record, preferred_path=record.zip_path, fallback_name="images_white_bg.zip") if wants(fields, "zip_path") else ""
     )
-    package_zip_path = _resolve_export_file(
-        record,
-        preferred_path="",
-        fallback_name="export_package.zip",
+    with_bg_zip_path = (
+        _resolve_export_file(
+            record,
+            preferred_path="",
+            fallback_name="images_with_bg_last_attempt.zip",
+        )
+        if wants(fields, "with_bg_zip_path")
+        else ""
+    )
+    package_zip_path = (
+        _resolve_export_file(
+            record,
+            preferred_path="",
+            fallback_name="export_package.zip",
+        )
+        if wants(fields, "package_zip_path")
+        else ""
+    )
+    manifest_path = (
+        _resolve_export_file(record, preferred_path=record.manifest_path, fallback_name="manifest.json") if wants(fields, "manifest_path") else ""
     )
-    manifest_path = _resolve_export_file(record, preferred_path=record.manifest_path, fallback_name="manifest.json")
 
     return ExportOut(
         id=record.id,
         status=record.status,
-        filter_json=_json_dict(record.filter_json),
+        filter_json=_json_dict(record.filter_json) if wants(fields, "filter_json") else {},
         csv_path=csv_path,
         zip_path=white_bg_zip_path,
         with_bg_zip_path=with_bg_zip_path,
@@ -70,16 +83,28 @@ def _to_export_out(record) -> ExportOut:
         with_bg_zip_download_url=f"/api/v1/exports/{record.id}/download/with-bg-zip",
         package_zip_download_url=f"/api/v1/exports/{record.id}/download/package-zip",
         manifest_download_url=f"/api/v1/exports/{record.id}/download/manifest",
-        error_detail=record.error_detail,
+        error_detail=record.error_detail if wants(fields, "error_detail") else "",
         created_at=record.created_at,
         updated_at=record.updated_at,
     )
 
 
 @router.get("", response_model=list[ExportOut])
-def list_exports(db: Session = Depends(db_dependency)) -> list[ExportOut]:
+def list_exports(
+    response: Response,
+    limit: int | None = Query(default=None, ge=1, le=5000),
+    cursor: str | None = Query(default=None),
+    fields: str | None = Query(default=None),
+    db: Session = Depends(db_dependency),
+) -> list[ExportOut]:
     repo = Repository(db)
-    return [_to_export_out(record) for record in repo.list_exports()]
+    selected = parse_fields(fields, ExportOut)
+    deferred = tuple(name for name in ("filter_json", "error_detail") if not wants(selected, name))
+    records = repo.list_exports(limit=limit, cursor=decode_time_cursor(cursor), deferred=deferred)
+    next_cursor = None
+    if limit is not None and len(records) == limit:
+        next_cursor = encode_cursor(records[-1].updated_at, records[-1].id)
+    return page_response([_to_export_out(record, fields=selected) for record in records], response=response, fields=selected, next_cursor=next_cursor)
 
 
 @router.post("", response_model=ExportOut)
@@ -1,15 +1,32 @@
 from __future__ import annotations
 
+from typing import Any
+
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from app.api.deps import db_dependency
+from app.services.rate_limiter import rate_limit_snapshot
 from app.services.repository import Repository
+from app.services.storage_uploader import upload_backlog
+from app.services.worker_health import worker_health_snapshot
 
 router = APIRouter(tags=["health"])
 
 
 @router.get("/healthz")
-def healthz(db: Session = Depends(db_dependency)) -> dict[str, str | int]:
+def healthz(db: Session = Depends(db_dependency)) -> dict[str, Any]:
     repo = Repository(db)
-    return {"status": "ok", "runs": repo.count_runs()}
+    workers = worker_health_snapshot(db)
+    return {
+        "status": "ok",
+        "runs": repo.count_runs(),
+        "rate_limits": rate_limit_snapshot(db),
+        "http_pools": workers.get("http_pools", []),
+        "storage_uploads": upload_backlog(db),
+        "circuit_breakers": workers.get("circuit_breakers", []),
+        "hedging": workers.get("hedging", []),
+        "payload_cache": workers.get("payload_cache", []),
+        "provider_files": workers.get("provider_files", []),
+        "sqlite_writes": workers.get("sqlite_writes", []),
+    }
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any
+
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: Any, row_id: str) -> str:
+    value = sort_value.isoformat() if isinstance(sort_value, datetime) else sort_value
+    raw = json.dumps([value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str | None) -> tuple[Any, str] | None:
+    text = str(cursor or "").strip()
+    if not text:
+        return None
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(text + "=" * (-len(text) % 4)))
+    except (binascii.Error, ValueError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+    return value, str(row_id)
+
+
+def decode_time_cursor(cursor: str | None) -> tuple[datetime, str] | None:
+    decoded = decode_cursor(cursor)
+    if decoded is None:
+        return None
+    value, row_id = decoded
+    try:
+        return datetime.fromisoformat(str(value)), row_id
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+def parse_fields(fields: str | None, model: type[BaseModel]) -> set[str] | None:
+    requested = {item.strip() for item in str(fields or "").split(",") if item.strip()}
+    if not requested:
+        return None
+    unknown = sorted(requested - set(model.model_fields))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return requested | {"id"} if "id" in model.model_fields else requested
+
+
+def wants(fields: set[str] | None, *names: str) -> bool:
+    return fields is None or any(name in fields for name in names)
+
+
+def page_response(
+    rows: list[BaseModel],
+    *,
+    response: Response,
+    fields: set[str] | None,
+    next_cursor: str | None,
+) -> Any:
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if fields is None:
+        return rows
+    projected = JSONResponse(content=jsonable_encoder([row.model_dump(include=fields) for row in rows]))
+    if next_cursor:
+        projected.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return projected
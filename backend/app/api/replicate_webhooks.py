@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.api.deps import db_dependency
+from app.core.config import get_settings
+from app.services.prediction_poller import (
+    discard_webhook_prediction,
+    get_prediction_poller,
+    record_webhook_prediction,
+    verify_webhook_signature,
+)
+
+router = APIRouter(prefix="/api/v1/replicate", tags=["replicate"])
+
+
+def _apply_webhook(db: Session, payload: dict) -> tuple[str, str] | None:
+    row = record_webhook_prediction(db, payload)
+    if row is None:
+        return None
+    prediction_id, status = row.id, row.status
+    if get_prediction_poller().resolve(prediction_id, payload):
+        discard_webhook_prediction(db, prediction_id)
+    return prediction_id, status
+
+
+@router.post("/webhook")
+async def replicate_webhook(request: Request, db: Session = Depends(db_dependency)) -> dict[str, str]:
+    body = await request.body()
+    secret = get_settings().replicate_webhook_secret
+    if not secret:
+        raise HTTPException(status_code=401, detail="Replicate webhook secret is not configured")
+    if not verify_webhook_signature(secret, {key.lower(): value for key, value in request.headers.items()}, body):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+    try:
+        payload = json.loads(body or b"{}")
+    except json.JSONDecodeError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON payload: {exc}") from exc
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Expected a JSON object")
+    applied = await run_in_threadpool(_apply_webhook, db, payload)
+    if applied is None:
+        raise HTTPException(status_code=400, detail="Prediction id is required")
+    prediction_id, status = applied
+    return {"status": status, "id": prediction_id}
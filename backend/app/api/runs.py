@@ -2,10 +2,11 @@ from __future__ import annotations
 
 import json
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
 from app.api.deps import db_dependency
+from app.api.pagination import decode_time_cursor, encode_cursor, page_response, parse_fields, wants
 from app.schemas import (
     AssetOut,
     BatchJobReportOut,
@@ -27,6 +28,7 @@ from app.services.repository import Repository
 router = APIRouter(prefix="/api/v1/runs", tags=["runs"])
 
 MAX_TEXT_LEN = 2000
+RUN_COST_FIELDS = ("estimated_total_cost_usd", "estimated_cost_per_image_usd", "image_count")
 
 
 def _json_dict(value: str) -> dict:
@@ -96,7 +98,7 @@ def _compact_event_payload_for_log(event_type: str, status: str, payload: dict)
     return compact
 
 
-def _run_out(run, entry, *, cost_summary: dict | None = None) -> RunOut:
+def _run_out(run, entry, *, cost_summary: dict | None = None, include_error_detail: bool = True) -> RunOut:
     cost_summary = cost_summary or {}
     batch = entry.batch if entry else ""
     batch_job = None
@@ -117,7 +119,7 @@ def _run_out(run, entry, *, cost_summary: dict | None = None) -> RunOut:
         optimization_attempt=run.optimization_attempt,
         max_optimization_attempts=run.max_optimization_attempts,
         technical_retry_count=run.technical_retry_count,
-        error_detail=run.error_detail,
+        error_detail=run.error_detail if include_error_detail else "",
         estimated_total_cost_usd=float(cost_summary.get("estimated_total_cost_usd") or 0),
         estimated_cost_per_image_usd=cost_summary.get("estimated_cost_per_image_usd"),
         image_count=int(cost_summary.get("image_count") or 0),
@@ -286,23 +288,45 @@ def create_runs(payload: RunsCreateRequest, db: Session = Depends(db_dependency)
 
 @router.get("", response_model=list[RunOut])
 def list_runs(
+    response: Response,
     status: str | None = Query(default=None),
     entry_id: str | None = Query(default=None),
     min_score: float | None = Query(default=None),
     max_score: float | None = Query(default=None),
+    limit: int | None = Query(default=None, ge=1, le=5000),
+    offset: int = Query(default=0, ge=0),
+    cursor: str | None = Query(default=None),
+    fields: str | None = Query(default=None),
     db: Session = Depends(db_dependency),
 ) -> list[RunOut]:
     repo = Repository(db)
-    runs = repo.list_runs(status=status, entry_id=entry_id, min_score=min_score, max_score=max_score)
+    selected = parse_fields(fields, RunOut)
+    include_costs = wants(selected, *RUN_COST_FIELDS)
+    include_error_detail = wants(selected, "error_detail")
+    rows = repo.list_runs_with_details(
+        status=status,
+        entry_id=entry_id,
+        min_score=min_score,
+        max_score=max_score,
+        limit=limit,
+        offset=offset,
+        cursor=decode_time_cursor(cursor),
+        include_costs=include_costs,
+        deferred=() if include_error_detail else ("error_detail",),
+    )
+    batch_summaries = {}
+    if wants(selected, "batch_job"):
+        batch_summaries = repo.batch_job_summaries([entry.batch for _run, entry, _stages, _assets in rows if entry and entry.batch])
     payload_rows: list[RunOut] = []
-    for run in runs:
-        entry = repo.get_entry(run.entry_id)
-        _, stages, assets, _ = repo.run_snapshot(run.id)
-        cost_summary = summarize_run_costs(stages, assets)
-        if entry and entry.batch:
-            cost_summary["batch_job"] = repo.batch_job_summary(entry.batch)
-        payload_rows.append(_run_out(run, entry, cost_summary=cost_summary))
-    return payload_rows
+    for run, entry, stages, assets in rows:
+        cost_summary = summarize_run_costs(stages, assets) if include_costs else {}
+        if entry and entry.batch and batch_summaries:
+            cost_summary["batch_job"] = batch_summaries.get(entry.batch.strip())
+        payload_rows.append(_run_out(run, entry, cost_summary=cost_summary, include_error_detail=include_error_detail))
+    next_cursor = None
+    if limit is not None and len(rows) == limit:
+        next_cursor = encode_cursor(rows[-1][0].created_at, rows[-1][0].id)
+    return page_response(payload_rows, response=response, fields=selected, next_cursor=next_cursor)
 
 
 @router.get("/{run_id}", response_model=RunDetailOut)
@@ -18,6 +18,13 @@ class Settings(BaseSettings):
         alias="SUPABASE_DATABASE_URL",
     )
     inventory_database_url: str = Field(default="", alias="INVENTORY_DATABASE_URL")
+    sqlite_journal_mode: str = Field(default="wal", alias="SQLITE_JOURNAL_MODE")
+    sqlite_busy_timeout_ms: int = Field(default=30000, alias="SQLITE_BUSY_TIMEOUT_MS")
+    sqlite_synchronous: str = Field(default="normal", alias="SQLITE_SYNCHRONOUS")
+    sqlite_cache_size_kib: int = Field(default=64 * 1024, alias="SQLITE_CACHE_SIZE_KIB")
+    sqlite_mmap_size_bytes: int = Field(default=256 * 1024 * 1024, alias="SQLITE_MMAP_SIZE_BYTES")
+    sqlite_foreign_keys: bool = Field(default=True, alias="SQLITE_FOREIGN_KEYS")
+    sqlite_single_writer: bool = Field(default=False, alias="SQLITE_SINGLE_WRITER")
     runtime_data_root: Path = Field(
         default=Path("/Users/anna.cohen/Documents/Image generation/runtime_data"),
         alias="RUNTIME_DATA_ROOT",
@@ -28,6 +35,10 @@ class Settings(BaseSettings):
     supabase_image_bucket: str = Field(default="generated-images", alias="SUPABASE_IMAGE_BUCKET")
     supabase_export_bucket: str = Field(default="exports", alias="SUPABASE_EXPORT_BUCKET")
     supabase_csv_bucket: str = Field(default="csv-imports", alias="SUPABASE_CSV_BUCKET")
+    storage_write_behind_enabled: bool = Field(default=False, alias="STORAGE_WRITE_BEHIND_ENABLED")
+    storage_upload_workers: int = Field(default=4, alias="STORAGE_UPLOAD_WORKERS")
+    storage_upload_max_attempts: int = Field(default=8, alias="STORAGE_UPLOAD_MAX_ATTEMPTS")
+    export_upload_workers: int = Field(default=4, alias="EXPORT_UPLOAD_WORKERS")
 
     openai_api_key: str = Field(default="", alias="OPENAI_API_KEY")
     openai_assistant_id: str = Field(default="", alias="OPENAI_ASSISTANT_ID")
@@ -52,15 +63,48 @@ class Settings(BaseSettings):
 
     replicate_api_token: str = Field(default="", alias="REPLICATE_API_TOKEN")
     replicate_cf_base_url: str = Field(default="", alias="REPLICATE_CF_BASE_URL")
+    replicate_prefer_wait_seconds: int = Field(default=0, alias="REPLICATE_PREFER_WAIT_SECONDS")
+    replicate_poll_batch_size: int = Field(default=8, alias="REPLICATE_POLL_BATCH_SIZE")
+    replicate_poll_timeout_seconds: float = Field(default=240.0, alias="REPLICATE_POLL_TIMEOUT_SECONDS")
+    replicate_webhook_url: str = Field(default="", alias="REPLICATE_WEBHOOK_URL")
+    replicate_webhook_secret: str = Field(default="", alias="REPLICATE_WEBHOOK_SECRET")
 
     quality_threshold: int = Field(default=95, alias="QUALITY_THRESHOLD")
     max_optimization_loops: int = Field(default=3, alias="MAX_OPTIMIZATION_LOOPS")
     max_api_retries: int = Field(default=3, alias="MAX_API_RETRIES")
+    retry_max_delay_seconds: float = Field(default=30.0, alias="RETRY_MAX_DELAY_SECONDS")
+    retry_after_max_seconds: float = Field(default=120.0, alias="RETRY_AFTER_MAX_SECONDS")
+    circuit_breaker_failure_threshold: int = Field(default=5, alias="CIRCUIT_BREAKER_FAILURE_THRESHOLD")
+    circuit_breaker_reset_seconds: float = Field(default=30.0, alias="CIRCUIT_BREAKER_RESET_SECONDS")
+    hedge_stages: str = Field(default="", alias="HEDGE_STAGES")
+    hedge_quantile: float = Field(default=0.95, alias="HEDGE_QUANTILE")
+    hedge_max_ratio: float = Field(default=0.1, alias="HEDGE_MAX_RATIO")
+    hedge_min_samples: int = Field(default=20, alias="HEDGE_MIN_SAMPLES")
     stage_retry_limit: int = Field(default=3, alias="STAGE_RETRY_LIMIT")
     worker_poll_seconds: float = Field(default=2.0, alias="WORKER_POLL_SECONDS")
+    worker_processes: int = Field(default=1, alias="WORKER_PROCESSES")
+    worker_drain_timeout_seconds: float = Field(default=900.0, alias="WORKER_DRAIN_TIMEOUT_SECONDS")
+    worker_lease_seconds: float = Field(default=90.0, alias="WORKER_LEASE_SECONDS")
+    worker_heartbeat_seconds: float = Field(default=20.0, alias="WORKER_HEARTBEAT_SECONDS")
+    worker_max_reclaims: int = Field(default=3, alias="WORKER_MAX_RECLAIMS")
     max_parallel_runs: int = Field(default=2, alias="MAX_PARALLEL_RUNS")
     max_variant_workers: int = Field(default=2, alias="MAX_VARIANT_WORKERS")
     flux_imagen_fallback_enabled: bool = Field(default=True, alias="FLUX_IMAGEN_FALLBACK_ENABLED")
+    provider_rate_limits: str = Field(default="", alias="PROVIDER_RATE_LIMITS")
+    adaptive_concurrency_enabled: bool = Field(default=False, alias="ADAPTIVE_CONCURRENCY_ENABLED")
+    adaptive_concurrency_max: int = Field(default=12, alias="ADAPTIVE_CONCURRENCY_MAX")
+    adaptive_concurrency_window: int = Field(default=20, alias="ADAPTIVE_CONCURRENCY_WINDOW")
+    http_pool_maxsize: int = Field(default=0, alias="HTTP_POOL_MAXSIZE")
+    payload_cache_max_bytes: int = Field(default=256 * 1024 * 1024, alias="PAYLOAD_CACHE_MAX_BYTES")
+    vision_input_max_edge: int = Field(default=1024, alias="VISION_INPUT_MAX_EDGE")
+    vision_input_jpeg_quality: int = Field(default=85, alias="VISION_INPUT_JPEG_QUALITY")
+    google_file_uploads_enabled: bool = Field(default=False, alias="GOOGLE_FILE_UPLOADS_ENABLED")
+    google_file_ttl_seconds: float = Field(default=47 * 3600.0, alias="GOOGLE_FILE_TTL_SECONDS")
+    google_file_refresh_margin_seconds: float = Field(default=900.0, alias="GOOGLE_FILE_REFRESH_MARGIN_SECONDS")
+    async_variants_enabled: bool = Field(default=False, alias="ASYNC_VARIANTS_ENABLED")
+    async_http_max_connections: int = Field(default=100, alias="ASYNC_HTTP_MAX_CONNECTIONS")
+    async_max_in_flight: int = Field(default=256, alias="ASYNC_MAX_IN_FLIGHT")
+    async_blocking_workers: int = Field(default=8, alias="ASYNC_BLOCKING_WORKERS")
 
 
 @lru_cache(maxsize=1)
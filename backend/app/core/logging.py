@@ -13,7 +13,7 @@ class JsonFormatter(logging.Formatter):
             "logger": record.name,
             "message": record.getMessage(),
         }
-        for field in ("run_id", "stage_name", "latency_ms", "provider", "status", "cost_estimate"):
+        for field in ("run_id", "stage_name", "latency_ms", "provider", "status", "cost_estimate", "worker_id"):
             value = getattr(record, field, None)
             if value is not None:
                 payload[field] = value
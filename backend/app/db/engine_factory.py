@@ -3,14 +3,23 @@ from __future__ import annotations
 from sqlalchemy import create_engine
 from sqlalchemy.pool import NullPool
 
+from app.core.config import get_settings
+from app.db.sqlite_profile import apply_sqlite_profile, is_sqlite_url
+
 
 def create_app_engine(database_url: str):
+    sqlite = is_sqlite_url(database_url)
     kwargs = {
         "future": True,
-        "connect_args": {"check_same_thread": False} if str(database_url).startswith("sqlite") else {},
+        "connect_args": (
+            {"check_same_thread": False, "timeout": max(0, get_settings().sqlite_busy_timeout_ms) / 1000.0} if sqlite else {}
+        ),
     }
-    if not str(database_url).startswith("sqlite"):
+    if not sqlite:
         # Supabase session pooler already manages pooling. Avoid holding extra clients open per process.
         kwargs["poolclass"] = NullPool
         kwargs["pool_pre_ping"] = True
-    return create_engine(database_url, **kwargs)
+    engine = create_engine(database_url, **kwargs)
+    if sqlite:
+        apply_sqlite_profile(engine, database_url)
+    return engine
@@ -1,7 +1,8 @@
-from sqlalchemy import select, text
+from sqlalchemy import select
 
 from app.core.config import get_settings
 from app.db.inventory_session import init_inventory_db
+from app.db.migrations import run_migrations
 from app.db.session import SessionLocal, engine
 from app.models import Base, RuntimeConfig
 from app.services.model_catalog import (
@@ -33,9 +34,7 @@ SAFE_VARIANT_WORKERS = 12
 def init_db() -> None:
     Base.metadata.create_all(bind=engine)
     init_inventory_db()
-    _ensure_entry_columns()
-    _ensure_run_columns()
-    _ensure_runtime_config_columns()
+    run_migrations(engine)
     settings = get_settings()
     with SessionLocal() as db:
         existing = db.execute(select(RuntimeConfig).where(RuntimeConfig.id == 1)).scalar_one_or_none()
@@ -51,6 +50,7 @@ def init_db() -> None:
                     max_parallel_runs=max(MIN_PARALLEL_RUNS, min(int(settings.max_parallel_runs), SAFE_PARALLEL_RUNS)),
                     max_variant_workers=max(MIN_VARIANT_WORKERS, min(int(settings.max_variant_workers), SAFE_VARIANT_WORKERS)),
                     flux_imagen_fallback_enabled=settings.flux_imagen_fallback_enabled,
+                    adaptive_concurrency_enabled=settings.adaptive_concurrency_enabled,
                     openai_assistant_id=settings.openai_assistant_id,
                     openai_assistant_name=settings.openai_assistant_name,
                     prompt_engineer_mode=settings.prompt_engineer_mode if settings.prompt_engineer_mode in {"assistant", "responses_api"} else "responses_api",
@@ -120,71 +120,5 @@ def init_db() -> None:
             db.commit()
 
 
-def _ensure_runtime_config_columns() -> None:
-    if not str(engine.url).startswith("sqlite"):
-        return
-    with engine.begin() as conn:
-        rows = conn.execute(text("PRAGMA table_info(runtime_config)")).fetchall()
-        existing = {row[1] for row in rows}
-        if "max_parallel_runs" not in existing:
-            conn.execute(text("ALTER TABLE runtime_config ADD COLUMN max_parallel_runs INTEGER NOT NULL DEFAULT 2"))
-        if "max_variant_workers" not in existing:
-            conn.execute(text("ALTER TABLE runtime_config ADD COLUMN max_variant_workers INTEGER NOT NULL DEFAULT 2"))
-        if "stage3_critique_model" not in existing:
-            conn.execute(text("ALTER TABLE runtime_config ADD COLUMN stage3_critique_model TEXT NOT NULL DEFAULT 'gpt-5.4'"))
-        if "stage3_generate_model" not in existing:
-            conn.execute(text("ALTER TABLE runtime_config ADD COLUMN stage3_generate_model TEXT NOT NULL DEFAULT 'nano-banana-2'"))
-        if "quality_gate_model" not in existing:
-            conn.execute(text("ALTER TABLE runtime_config ADD COLUMN quality_gate_model TEXT NOT NULL DEFAULT 'gpt-4o-mini'"))
-        if "image_aspect_ratio" not in existing:
-            conn.execute(text("ALTER TABLE runtime_config ADD COLUMN image_aspect_ratio TEXT NOT NULL DEFAULT '1:1'"))
-        if "image_resolution" not in existing:
-            conn.execute(text("ALTER TABLE runtime_config ADD COLUMN image_resolution TEXT NOT NULL DEFAULT '1K'"))
-        if "image_format" not in existing:
-            conn.execute(text("ALTER TABLE runtime_config ADD COLUMN image_format TEXT NOT NULL DEFAULT 'image/jpeg'"))
-        if "nano_banana_safety_level" not in existing:
-            conn.execute(text("ALTER TABLE runtime_config ADD COLUMN nano_banana_safety_level TEXT NOT NULL DEFAULT 'default'"))
-        if "prompt_engineer_mode" not in existing:
-            conn.execute(text("ALTER TABLE runtime_config ADD COLUMN prompt_engineer_mode TEXT NOT NULL DEFAULT 'responses_api'"))
-        if "responses_prompt_engineer_model" not in existing:
-            conn.execute(text("ALTER TABLE runtime_config ADD COLUMN responses_prompt_engineer_model TEXT NOT NULL DEFAULT 'gpt-5.4'"))
-        if "responses_vector_store_id" not in existing:
-            conn.execute(text("ALTER TABLE runtime_config ADD COLUMN responses_vector_store_id TEXT NOT NULL DEFAULT 'vs_683f3d36223481919f59fc5623286253'"))
-        if "visual_style_id" not in existing:
-            conn.execute(text("ALTER TABLE runtime_config ADD COLUMN visual_style_id TEXT NOT NULL DEFAULT 'warm_watercolor_storybook_kids_v3'"))
-        if "visual_style_name" not in existing:
-            conn.execute(text("ALTER TABLE runtime_config ADD COLUMN visual_style_name TEXT NOT NULL DEFAULT 'Warm Watercolor Storybook Kids Style v3'"))
-        if "visual_style_prompt_block" not in existing:
-            conn.execute(text("ALTER TABLE runtime_config ADD COLUMN visual_style_prompt_block TEXT NOT NULL DEFAULT ''"))
-        if "stage1_prompt_template" not in existing:
-            conn.execute(text("ALTER TABLE runtime_config ADD COLUMN stage1_prompt_template TEXT NOT NULL DEFAULT ''"))
-        if "stage3_prompt_template" not in existing:
-            conn.execute(text("ALTER TABLE runtime_config ADD COLUMN stage3_prompt_template TEXT NOT NULL DEFAULT ''"))
-
-
-def _ensure_entry_columns() -> None:
-    if not str(engine.url).startswith("sqlite"):
-        return
-    with engine.begin() as conn:
-        rows = conn.execute(text("PRAGMA table_info(entries)")).fetchall()
-        existing = {row[1] for row in rows}
-        if "person_gender_options_json" not in existing:
-            conn.execute(text("ALTER TABLE entries ADD COLUMN person_gender_options_json TEXT NOT NULL DEFAULT '[\"male\"]'"))
-        if "person_age_options_json" not in existing:
-            conn.execute(text("ALTER TABLE entries ADD COLUMN person_age_options_json TEXT NOT NULL DEFAULT '[\"kid\"]'"))
-        if "person_skin_color_options_json" not in existing:
-            conn.execute(text("ALTER TABLE entries ADD COLUMN person_skin_color_options_json TEXT NOT NULL DEFAULT '[\"white\"]'"))
-
-
-def _ensure_run_columns() -> None:
-    if not str(engine.url).startswith("sqlite"):
-        return
-    with engine.begin() as conn:
-        rows = conn.execute(text("PRAGMA table_info(runs)")).fetchall()
-        existing = {row[1] for row in rows}
-        if "execution_mode" not in existing:
-            conn.execute(text("ALTER TABLE runs ADD COLUMN execution_mode TEXT NOT NULL DEFAULT 'legacy'"))
-
-
 if __name__ == "__main__":
     init_db()
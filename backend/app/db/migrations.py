@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import json
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from uuid import uuid4
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION_TABLE = "schema_version"
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+
+
+def _existing_columns(conn: Connection, table: str) -> set[str]:
+    return {column["name"] for column in inspect(conn).get_columns(table)}
+
+
+def _add_missing_columns(conn: Connection, table: str, columns: list[tuple[str, str]]) -> None:
+    existing = _existing_columns(conn, table)
+    for name, ddl in columns:
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+
+
+def _legacy_columns(conn: Connection) -> None:
+    _add_missing_columns(
+        conn,
+        "entries",
+        [
+            ("person_gender_options_json", "TEXT NOT NULL DEFAULT '[\"male\"]'"),
+            ("person_age_options_json", "TEXT NOT NULL DEFAULT '[\"kid\"]'"),
+            ("person_skin_color_options_json", "TEXT NOT NULL DEFAULT '[\"white\"]'"),
+        ],
+    )
+    _add_missing_columns(
+        conn,
+        "runs",
+        [
+            ("execution_mode", "TEXT NOT NULL DEFAULT 'legacy'"),
+            ("claimed_by", "TEXT NOT NULL DEFAULT ''"),
+            ("claimed_at", "TIMESTAMP"),
+            ("lease_expires_at", "TIMESTAMP"),
+            ("reclaim_count", "INTEGER NOT NULL DEFAULT 0"),
+        ],
+    )
+    needs_dependency_backfill = "remaining_dependency_count" not in _existing_columns(conn, "csv_task_nodes")
+    _add_missing_columns(
+        conn,
+        "csv_task_nodes",
+        [
+            ("priority", "INTEGER NOT NULL DEFAULT 0"),
+            ("claimed_by", "TEXT NOT NULL DEFAULT ''"),
+            ("lease_expires_at", "TIMESTAMP"),
+            ("reclaim_count", "INTEGER NOT NULL DEFAULT 0"),
+            ("remaining_dependency_count", "INTEGER NOT NULL DEFAULT 0"),
+        ],
+    )
+    if needs_dependency_backfill:
+        _backfill_csv_task_dependencies(conn)
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_csv_task_nodes_ready_queue "
+            "ON csv_task_nodes (status, remaining_dependency_count, priority, created_at)"
+        )
+    )
+    _add_missing_columns(
+        conn,
+        "runtime_config",
+        [
+            ("max_parallel_runs", "INTEGER NOT NULL DEFAULT 2"),
+            ("max_variant_workers", "INTEGER NOT NULL DEFAULT 2"),
+            ("adaptive_concurrency_enabled", "BOOLEAN NOT NULL DEFAULT FALSE"),
+            ("stage3_critique_model", "TEXT NOT NULL DEFAULT 'gpt-5.4'"),
+            ("stage3_generate_model", "TEXT NOT NULL DEFAULT 'nano-banana-2'"),
+            ("quality_gate_model", "TEXT NOT NULL DEFAULT 'gpt-4o-mini'"),
+            ("image_aspect_ratio", "TEXT NOT NULL DEFAULT '1:1'"),
+            ("image_resolution", "TEXT NOT NULL DEFAULT '1K'"),
+            ("image_format", "TEXT NOT NULL DEFAULT 'image/jpeg'"),
+            ("nano_banana_safety_level", "TEXT NOT NULL DEFAULT 'default'"),
+            ("prompt_engineer_mode", "TEXT NOT NULL DEFAULT 'responses_api'"),
+            ("responses_prompt_engineer_model", "TEXT NOT NULL DEFAULT 'gpt-5.4'"),
+            ("responses_vector_store_id", "TEXT NOT NULL DEFAULT 'vs_683f3d36223481919f59fc5623286253'"),
+            ("visual_style_id", "TEXT NOT NULL DEFAULT 'warm_watercolor_storybook_kids_v3'"),
+            ("visual_style_name", "TEXT NOT NULL DEFAULT 'Warm Watercolor Storybook Kids Style v3'"),
+            ("visual_style_prompt_block", "TEXT NOT NULL DEFAULT ''"),
+            ("stage1_prompt_template", "TEXT NOT NULL DEFAULT ''"),
+            ("stage3_prompt_template", "TEXT NOT NULL DEFAULT ''"),
+        ],
+    )
+
+
+def _backfill_csv_task_dependencies(conn: Connection) -> None:
+    tasks = conn.execute(text("SELECT id, status, dependency_task_ids_json FROM csv_task_nodes")).fetchall()
+    statuses = {row[0]: row[1] for row in tasks}
+    for task_id, _status, raw_dependencies in tasks:
+        try:
+            dependency_ids = [str(value) for value in json.loads(raw_dependencies or "[]") if str(value)]
+        except json.JSONDecodeError:
+            dependency_ids = []
+        dependency_ids = list(dict.fromkeys(dependency_ids))
+        for dependency_id in dependency_ids:
+            conn.execute(
+                text(
+                    "INSERT INTO csv_task_dependencies (id, task_id, depends_on_task_id, created_at) "
+                    "VALUES (:id, :task_id, :depends_on_task_id, CURRENT_TIMESTAMP) ON CONFLICT DO NOTHING"
+                ),
+                {"id": f"csvdep_{uuid4().hex[:24]}", "task_id": task_id, "depends_on_task_id": dependency_id},
+            )
+        remaining = sum(1 for dependency_id in dependency_ids if statuses.get(dependency_id) != "completed")
+        if remaining:
+            conn.execute(
+                text("UPDATE csv_task_nodes SET remaining_dependency_count = :remaining WHERE id = :id"),
+                {"remaining": remaining, "id": task_id},
+            )
+
+
+HOT_PATH_INDEXES = (
+    ("ix_stage_results_run_stage_created", "stage_results", ("run_id", "stage_name", "created_at")),
+    ("ix_prompts_run_stage_created", "prompts", ("run_id", "stage_name", "created_at")),
+    ("ix_assets_run_stage_created", "assets", ("run_id", "stage_name", "created_at")),
+    ("ix_assets_run_stage_attempt", "assets", ("run_id", "stage_name", "attempt", "created_at")),
+    ("ix_runs_status_mode_created", "runs", ("status", "execution_mode", "created_at")),
+    ("ix_runs_entry_created", "runs", ("entry_id", "created_at")),
+    ("ix_csv_task_nodes_job_status", "csv_task_nodes", ("csv_job_id", "status")),
+)
+
+
+def _hot_path_indexes(conn: Connection) -> None:
+    for name, table, columns in HOT_PATH_INDEXES:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"))
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(1, "legacy_columns", _legacy_columns),
+    Migration(2, "hot_path_indexes", _hot_path_indexes),
+)
+
+
+def _ensure_version_table(conn: Connection) -> None:
+    conn.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {SCHEMA_VERSION_TABLE} ("
+            "version INTEGER PRIMARY KEY, name VARCHAR(128) NOT NULL, applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+        )
+    )
+
+
+def applied_versions(conn: Connection) -> set[int]:
+    _ensure_version_table(conn)
+    return {int(row[0]) for row in conn.execute(text(f"SELECT version FROM {SCHEMA_VERSION_TABLE}")).fetchall()}
+
+
+def current_version(conn: Connection) -> int:
+    return max(applied_versions(conn), default=0)
+
+
+def run_migrations(engine: Engine, migrations: tuple[Migration, ...] = MIGRATIONS) -> list[int]:
+    applied: list[int] = []
+    for migration in sorted(migrations, key=lambda item: item.version):
+        try:
+            with engine.begin() as conn:
+                if migration.version in applied_versions(conn):
+                    continue
+                migration.apply(conn)
+                conn.execute(
+                    text(f"INSERT INTO {SCHEMA_VERSION_TABLE} (version, name) VALUES (:version, :name)"),
+                    {"version": migration.version, "name": migration.name},
+                )
+        except IntegrityError:
+            continue
+        logger.info("schema migration applied", extra={"status": f"{migration.version}:{migration.name}"})
+        applied.append(migration.version)
+    return applied
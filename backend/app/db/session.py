@@ -4,11 +4,14 @@ from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import get_settings
 from app.db.engine_factory import create_app_engine
+from app.db.sqlite_profile import get_sqlite_write_gate, is_sqlite_url
 
 settings = get_settings()
 
 engine = create_app_engine(settings.database_url)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True)
+if is_sqlite_url(settings.database_url):
+    get_sqlite_write_gate().install(SessionLocal)
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import get_settings
+
+JOURNAL_MODES = {"delete", "truncate", "persist", "memory", "wal", "off"}
+SYNCHRONOUS_MODES = {"off", "normal", "full", "extra"}
+
+
+def is_sqlite_url(database_url: str) -> bool:
+    return str(database_url).startswith("sqlite")
+
+
+def is_memory_url(database_url: str) -> bool:
+    text = str(database_url)
+    return text.rstrip("/") in {"sqlite:", "sqlite:/"} or ":memory:" in text or "mode=memory" in text
+
+
+def sqlite_pragmas(database_url: str) -> list[tuple[str, str]]:
+    settings = get_settings()
+    pragmas: list[tuple[str, str]] = [("busy_timeout", str(max(0, int(settings.sqlite_busy_timeout_ms))))]
+    journal_mode = str(settings.sqlite_journal_mode or "").strip().lower()
+    if journal_mode in JOURNAL_MODES and not is_memory_url(database_url):
+        pragmas.append(("journal_mode", journal_mode))
+    synchronous = str(settings.sqlite_synchronous or "").strip().lower()
+    if synchronous in SYNCHRONOUS_MODES:
+        pragmas.append(("synchronous", synchronous))
+    if settings.sqlite_cache_size_kib > 0:
+        pragmas.append(("cache_size", str(-int(settings.sqlite_cache_size_kib))))
+    if settings.sqlite_mmap_size_bytes >= 0 and not is_memory_url(database_url):
+        pragmas.append(("mmap_size", str(int(settings.sqlite_mmap_size_bytes))))
+    pragmas.append(("foreign_keys", "ON" if settings.sqlite_foreign_keys else "OFF"))
+    return pragmas
+
+
+def apply_sqlite_profile(engine: Engine, database_url: str) -> None:
+    pragmas = sqlite_pragmas(database_url)
+
+    def _on_connect(dbapi_connection, _connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    event.listen(engine, "connect", _on_connect)
+
+
+class SqliteWriteGate:
+    def __init__(self, *, single_writer: bool | None = None, lock_timeout_seconds: float | None = None) -> None:
+        settings = get_settings()
+        self.single_writer = bool(settings.sqlite_single_writer if single_writer is None else single_writer)
+        self.lock_timeout_seconds = float(
+            lock_timeout_seconds if lock_timeout_seconds is not None else settings.sqlite_busy_timeout_ms / 1000.0
+        )
+        self._writer_lock = threading.RLock()
+        self._stats_lock = threading.Lock()
+        self._commits = 0
+        self._queue_wait_ms_total = 0.0
+        self._queue_wait_ms_max = 0.0
+        self._write_txn_ms_total = 0.0
+        self._write_txn_ms_max = 0.0
+        self._queue_timeouts = 0
+
+    def _begin_write(self, session: Session) -> None:
+        if "sqlite_write_started" in session.info:
+            return
+        queue_wait_ms = 0.0
+        held = False
+        if self.single_writer:
+            started = time.perf_counter()
+            held = self._writer_lock.acquire(timeout=max(0.0, self.lock_timeout_seconds))
+            queue_wait_ms = (time.perf_counter() - started) * 1000
+            if not held:
+                with self._stats_lock:
+                    self._queue_timeouts += 1
+        session.info["sqlite_write_started"] = time.perf_counter()
+        session.info["sqlite_queue_wait_ms"] = queue_wait_ms
+        session.info["sqlite_writer_held"] = held
+
+    def _before_flush(self, session: Session, _flush_context, _instances) -> None:
+        self._begin_write(session)
+
+    def _do_orm_execute(self, orm_execute_state) -> None:
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            self._begin_write(orm_execute_state.session)
+
+    def _release(self, session: Session) -> tuple[float, float] | None:
+        started = session.info.pop("sqlite_write_started", None)
+        queue_wait_ms = float(session.info.pop("sqlite_queue_wait_ms", 0.0))
+        if session.info.pop("sqlite_writer_held", False):
+            try:
+                self._writer_lock.release()
+            except RuntimeError:
+                pass
+        if started is None:
+            return None
+        return queue_wait_ms, (time.perf_counter() - started) * 1000
+
+    def _after_commit(self, session: Session) -> None:
+        timings = self._release(session)
+        if timings is None:
+            return
+        queue_wait_ms, write_txn_ms = timings
+        with self._stats_lock:
+            self._commits += 1
+            self._queue_wait_ms_total += queue_wait_ms
+            self._queue_wait_ms_max = max(self._queue_wait_ms_max, queue_wait_ms)
+            self._write_txn_ms_total += write_txn_ms
+            self._write_txn_ms_max = max(self._write_txn_ms_max, write_txn_ms)
+
+    def _after_transaction_end(self, session: Session, transaction) -> None:
+        if transaction.parent is None:
+            self._release(session)
+
+    def install(self, factory: sessionmaker) -> None:
+        event.listen(factory, "before_flush", self._before_flush)
+        event.listen(factory, "do_orm_execute", self._do_orm_execute)
+        event.listen(factory, "after_commit", self._after_commit)
+        event.listen(factory, "after_transaction_end", self._after_transaction_end)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._stats_lock:
+            commits = self._commits
+            return {
+                "single_writer": self.single_writer,
+                "commits": commits,
+                "writer_queue_ms_avg": round(self._queue_wait_ms_total / commits, 3) if commits else 0.0,
+                "writer_queue_ms_max": round(self._queue_wait_ms_max, 3),
+                "write_txn_ms_avg": round(self._write_txn_ms_total / commits, 3) if commits else 0.0,
+                "write_txn_ms_max": round(self._write_txn_ms_max, 3),
+                "writer_queue_timeouts": self._queue_timeouts,
+            }
+
+
+_default_gate: SqliteWriteGate | None = None
+_default_lock = threading.Lock()
+
+
+def get_sqlite_write_gate() -> SqliteWriteGate:
+    global _default_gate
+    with _default_lock:
+        if _default_gate is None:
+            _default_gate = SqliteWriteGate()
+        return _default_gate
@@ -9,6 +9,7 @@ from app.api.csv_jobs import router as csv_jobs_router
 from app.api.entries import router as entries_router
 from app.api.exports import router as exports_router
 from app.api.health import router as health_router
+from app.api.replicate_webhooks import router as replicate_webhooks_router
 from app.api.runs import router as runs_router
 from app.core.config import get_settings
 from app.core.logging import configure_logging
@@ -34,6 +35,7 @@ app.include_router(assets_router)
 app.include_router(exports_router)
 app.include_router(config_router)
 app.include_router(csv_jobs_router)
+app.include_router(replicate_webhooks_router)
 
 
 @app.on_event("startup")
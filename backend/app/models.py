@@ -3,7 +3,7 @@ from __future__ import annotations
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, Float, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy import Boolean, Float, ForeignKey, Index, Integer, String, Text, UniqueConstraint
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -40,6 +40,10 @@ class Entry(Base):
 
 class Run(Base):
     __tablename__ = "runs"
+    __table_args__ = (
+        Index("ix_runs_status_mode_created", "status", "execution_mode", "created_at"),
+        Index("ix_runs_entry_created", "entry_id", "created_at"),
+    )
 
     id: Mapped[str] = mapped_column(String(64), primary_key=True, default=lambda: f"run_{uuid.uuid4().hex[:24]}")
     entry_id: Mapped[str] = mapped_column(ForeignKey("entries.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -53,6 +57,10 @@ class Run(Base):
     max_optimization_attempts: Mapped[int] = mapped_column(Integer, default=3, nullable=False)
     technical_retry_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     error_detail: Mapped[str] = mapped_column(Text, default="", nullable=False)
+    claimed_by: Mapped[str] = mapped_column(String(128), default="", nullable=False)
+    claimed_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    reclaim_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     created_at: Mapped[datetime] = mapped_column(default=utcnow, nullable=False)
     updated_at: Mapped[datetime] = mapped_column(default=utcnow, onupdate=utcnow, nullable=False)
 
@@ -68,6 +76,7 @@ class StageResult(Base):
     __tablename__ = "stage_results"
     __table_args__ = (
         UniqueConstraint("run_id", "stage_name", "attempt", name="uq_stage_results_idempotency"),
+        Index("ix_stage_results_run_stage_created", "run_id", "stage_name", "created_at"),
     )
 
     id: Mapped[str] = mapped_column(String(64), primary_key=True, default=lambda: f"stg_{uuid.uuid4().hex[:24]}")
@@ -102,6 +111,7 @@ class RunEvent(Base):
 
 class Prompt(Base):
     __tablename__ = "prompts"
+    __table_args__ = (Index("ix_prompts_run_stage_created", "run_id", "stage_name", "created_at"),)
 
     id: Mapped[str] = mapped_column(String(64), primary_key=True, default=lambda: f"prm_{uuid.uuid4().hex[:24]}")
     run_id: Mapped[str] = mapped_column(ForeignKey("runs.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -118,6 +128,10 @@ class Prompt(Base):
 
 class Asset(Base):
     __tablename__ = "assets"
+    __table_args__ = (
+        Index("ix_assets_run_stage_created", "run_id", "stage_name", "created_at"),
+        Index("ix_assets_run_stage_attempt", "run_id", "stage_name", "attempt", "created_at"),
+    )
 
     id: Mapped[str] = mapped_column(String(64), primary_key=True, default=lambda: f"ast_{uuid.uuid4().hex[:24]}")
     run_id: Mapped[str] = mapped_column(ForeignKey("runs.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -215,6 +229,8 @@ class CsvTaskNode(Base):
     __tablename__ = "csv_task_nodes"
     __table_args__ = (
         UniqueConstraint("csv_job_id", "task_key", name="uq_csv_task_nodes_key"),
+        Index("ix_csv_task_nodes_ready_queue", "status", "remaining_dependency_count", "priority", "created_at"),
+        Index("ix_csv_task_nodes_job_status", "csv_job_id", "status"),
     )
 
     id: Mapped[str] = mapped_column(String(64), primary_key=True, default=lambda: f"csvtsk_{uuid.uuid4().hex[:24]}")
@@ -227,6 +243,8 @@ class CsvTaskNode(Base):
     branch_role: Mapped[str] = mapped_column(String(64), default="", nullable=False)
     dependency_keys_json: Mapped[str] = mapped_column(Text, default="[]", nullable=False)
     dependency_task_ids_json: Mapped[str] = mapped_column(Text, default="[]", nullable=False)
+    remaining_dependency_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    priority: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     source_asset_id: Mapped[str] = mapped_column(ForeignKey("assets.id", ondelete="SET NULL"), nullable=True)
     regular_asset_id: Mapped[str] = mapped_column(ForeignKey("assets.id", ondelete="SET NULL"), nullable=True)
     white_bg_asset_id: Mapped[str] = mapped_column(ForeignKey("assets.id", ondelete="SET NULL"), nullable=True)
@@ -234,6 +252,9 @@ class CsvTaskNode(Base):
     attempt_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     max_attempts: Mapped[int] = mapped_column(Integer, default=2, nullable=False)
     error_summary: Mapped[str] = mapped_column(Text, default="", nullable=False)
+    claimed_by: Mapped[str] = mapped_column(String(128), default="", nullable=False)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    reclaim_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     started_at: Mapped[datetime | None] = mapped_column(nullable=True)
     finished_at: Mapped[datetime | None] = mapped_column(nullable=True)
     created_at: Mapped[datetime] = mapped_column(default=utcnow, nullable=False)
@@ -247,6 +268,18 @@ class CsvTaskNode(Base):
     attempts: Mapped[list[CsvTaskAttempt]] = relationship(back_populates="task", cascade="all, delete-orphan")
 
 
+class CsvTaskDependency(Base):
+    __tablename__ = "csv_task_dependencies"
+    __table_args__ = (
+        UniqueConstraint("task_id", "depends_on_task_id", name="uq_csv_task_dependencies_edge"),
+    )
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True, default=lambda: f"csvdep_{uuid.uuid4().hex[:24]}")
+    task_id: Mapped[str] = mapped_column(ForeignKey("csv_task_nodes.id", ondelete="CASCADE"), nullable=False, index=True)
+    depends_on_task_id: Mapped[str] = mapped_column(ForeignKey("csv_task_nodes.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(default=utcnow, nullable=False)
+
+
 class CsvTaskAttempt(Base):
     __tablename__ = "csv_task_attempts"
 
@@ -263,6 +296,74 @@ class CsvTaskAttempt(Base):
     task: Mapped[CsvTaskNode] = relationship(back_populates="attempts")
 
 
+class ProviderRateBucket(Base):
+    __tablename__ = "provider_rate_buckets"
+
+    bucket_key: Mapped[str] = mapped_column(String(191), primary_key=True)
+    request_tokens: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    token_tokens: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    refilled_at: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    version: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    acquired_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    waited_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    wait_seconds_total: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(default=utcnow, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(default=utcnow, onupdate=utcnow, nullable=False)
+
+
+class ReplicatePrediction(Base):
+    __tablename__ = "replicate_predictions"
+
+    id: Mapped[str] = mapped_column(String(191), primary_key=True)
+    status: Mapped[str] = mapped_column(String(32), default="", nullable=False)
+    payload_json: Mapped[str] = mapped_column(Text, default="{}", nullable=False)
+    received_at: Mapped[datetime] = mapped_column(default=utcnow, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(default=utcnow, nullable=False)
+
+
+class StorageUpload(Base):
+    __tablename__ = "storage_uploads"
+    __table_args__ = (Index("ix_storage_uploads_due", "host", "status", "next_attempt_at"),)
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True, default=lambda: f"upl_{uuid.uuid4().hex[:24]}")
+    asset_id: Mapped[str] = mapped_column(ForeignKey("assets.id", ondelete="CASCADE"), nullable=False, index=True)
+    local_path: Mapped[str] = mapped_column(String(2048), nullable=False)
+    bucket: Mapped[str] = mapped_column(String(191), nullable=False)
+    object_key: Mapped[str] = mapped_column(String(1024), nullable=False)
+    content_type: Mapped[str] = mapped_column(String(64), default="application/octet-stream", nullable=False)
+    host: Mapped[str] = mapped_column(String(191), default="", nullable=False)
+    status: Mapped[str] = mapped_column(String(32), default="pending", nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_error: Mapped[str] = mapped_column(Text, default="", nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(default=utcnow, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(default=utcnow, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(default=utcnow, onupdate=utcnow, nullable=False)
+
+
+class ProviderConcurrencyLimit(Base):
+    __tablename__ = "provider_concurrency_limits"
+
+    scope_key: Mapped[str] = mapped_column(String(191), primary_key=True)
+    scope: Mapped[str] = mapped_column(String(64), default="", nullable=False)
+    provider: Mapped[str] = mapped_column(String(64), default="", nullable=False)
+    current_limit: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
+    p95_latency_ms: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    error_rate: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    sample_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    worker_id: Mapped[str] = mapped_column(String(191), default="", nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(default=utcnow, onupdate=utcnow, nullable=False)
+
+
+class WorkerHealthSnapshot(Base):
+    __tablename__ = "worker_health_snapshots"
+
+    snapshot_key: Mapped[str] = mapped_column(String(191), primary_key=True)
+    worker_id: Mapped[str] = mapped_column(String(191), default="", nullable=False)
+    section: Mapped[str] = mapped_column(String(64), default="", nullable=False)
+    payload_json: Mapped[str] = mapped_column(Text, default="{}", nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(default=utcnow, onupdate=utcnow, nullable=False)
+
+
 class RuntimeConfig(Base):
     __tablename__ = "runtime_config"
 
@@ -275,6 +376,7 @@ class RuntimeConfig(Base):
     max_parallel_runs: Mapped[int] = mapped_column(Integer, default=10, nullable=False)
     max_variant_workers: Mapped[int] = mapped_column(Integer, default=2, nullable=False)
     flux_imagen_fallback_enabled: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    adaptive_concurrency_enabled: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     openai_assistant_id: Mapped[str] = mapped_column(String(128), default="", nullable=False)
     openai_assistant_name: Mapped[str] = mapped_column(String(256), default="Prompt generator -JSON output", nullable=False)
     prompt_engineer_mode: Mapped[str] = mapped_column(String(32), default="responses_api", nullable=False)
@@ -385,6 +385,17 @@ class CsvJobExportResponse(BaseModel):
     download_url: str
 
 
+class ProviderConcurrencyLimitOut(BaseModel):
+    scope: str
+    provider: str
+    current_limit: int
+    p95_latency_ms: int
+    error_rate: float
+    sample_count: int
+    worker_id: str
+    updated_at: datetime
+
+
 class RuntimeConfigOut(BaseModel):
     quality_threshold: int
     max_optimization_loops: int
@@ -394,6 +405,8 @@ class RuntimeConfigOut(BaseModel):
     max_parallel_runs: int
     max_variant_workers: int
     flux_imagen_fallback_enabled: bool
+    adaptive_concurrency_enabled: bool
+    adaptive_concurrency_limits: list[ProviderConcurrencyLimitOut] = Field(default_factory=list)
     openai_assistant_id: str
     openai_assistant_name: str
     prompt_engineer_mode: Literal["assistant", "responses_api"]
@@ -423,6 +436,7 @@ class RuntimeConfigUpdate(BaseModel):
     max_parallel_runs: int | None = Field(default=None, ge=1, le=50)
     max_variant_workers: int | None = Field(default=None, ge=1, le=16)
     flux_imagen_fallback_enabled: bool | None = None
+    adaptive_concurrency_enabled: bool | None = None
     openai_assistant_id: str | None = None
     openai_assistant_name: str | None = None
     prompt_engineer_mode: Literal["assistant", "responses_api"] | None = None
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any
+
+import httpx
+import requests
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models import ProviderConcurrencyLimit, utcnow
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ("openai", "google", "replicate")
+DECREASE_FACTOR = 0.5
+DECREASE_COOLDOWN_SECONDS = 5.0
+LATENCY_TOLERANCE = 2.0
+MAX_ERROR_RATE = 0.05
+BASELINE_DRIFT = 0.1
+SNAPSHOT_RETENTION_SECONDS = 3600.0
+
+
+def is_overload_status(status_code: int | None) -> bool:
+    return status_code is None or int(status_code) == 429 or int(status_code) >= 500
+
+
+def _p95(values: list[float]) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(0.95 * len(ordered)) - 1))]
+
+
+@dataclass
+class _ProviderStats:
+    samples: deque = field(default_factory=deque)
+    observed: int = 0
+    since_evaluation: int = 0
+    baseline_p95: float | None = None
+    last_p95: float = 0.0
+    last_error_rate: float = 0.0
+
+
+@dataclass
+class _ScopeLimit:
+    limit: int
+    initial: int
+    last_decrease: float = 0.0
+
+
+class AdaptiveConcurrencyController:
+    def __init__(self, *, maximum: int | None = None, window: int | None = None) -> None:
+        settings = get_settings()
+        self.maximum = max(1, int(maximum if maximum is not None else settings.adaptive_concurrency_max))
+        self.window = max(2, int(window if window is not None else settings.adaptive_concurrency_window))
+        self._stats: dict[str, _ProviderStats] = {}
+        self._limits: dict[str, _ScopeLimit] = {}
+        self._lock = threading.Lock()
+
+    def _provider_stats(self, provider: str) -> _ProviderStats:
+        stats = self._stats.get(provider)
+        if stats is None:
+            stats = _ProviderStats(samples=deque(maxlen=self.window))
+            self._stats[provider] = stats
+        return stats
+
+    def _scope_limit(self, scope: str, provider: str, initial: int) -> _ScopeLimit:
+        key = f"{scope}:{provider}"
+        start = max(1, min(int(initial), self.maximum))
+        state = self._limits.get(key)
+        if state is None or state.initial != start:
+            state = _ScopeLimit(limit=start, initial=start)
+            self._limits[key] = state
+        return state
+
+    def limit(self, scope: str, providers: tuple[str, ...] | str, *, initial: int) -> int:
+        names = (providers,) if isinstance(providers, str) else tuple(providers)
+        with self._lock:
+            states = [(provider, self._scope_limit(scope, provider, initial)) for provider in names]
+            observed = [state.limit for provider, state in states if self._provider_stats(provider).observed]
+        if not observed:
+            return max(1, min(int(initial), self.maximum))
+        return min(observed)
+
+    def record(self, provider: str, latency_seconds: float, status_code: int | None) -> None:
+        overloaded = is_overload_status(status_code)
+        now = time.monotonic()
+        with self._lock:
+            stats = self._provider_stats(provider)
+            stats.samples.append((max(0.0, float(latency_seconds)), overloaded))
+            stats.observed += 1
+            stats.since_evaluation += 1
+            scoped = [(key, state) for key, state in self._limits.items() if key.endswith(f":{provider}")]
+            if overloaded:
+                stats.since_evaluation = 0
+                for key, state in scoped:
+                    if now - state.last_decrease < DECREASE_COOLDOWN_SECONDS:
+                        continue
+                    previous = state.limit
+                    state.limit = max(1, int(state.limit * DECREASE_FACTOR))
+                    state.last_decrease = now
+                    if state.limit != previous:
+                        logger.info(
+                            "adaptive concurrency decreased",
+                            extra={"provider": key, "status": f"{previous}->{state.limit} on {status_code or 'error'}"},
+                        )
+                return
+            if stats.since_evaluation < self.window:
+                return
+            stats.since_evaluation = 0
+            latencies = [latency for latency, failed in stats.samples if not failed]
+            stats.last_p95 = _p95(latencies)
+            stats.last_error_rate = sum(1 for _, failed in stats.samples if failed) / max(1, len(stats.samples))
+            if stats.baseline_p95 is None or stats.last_p95 < stats.baseline_p95:
+                stats.baseline_p95 = stats.last_p95
+            else:
+                stats.baseline_p95 += (stats.last_p95 - stats.baseline_p95) * BASELINE_DRIFT
+            healthy = stats.last_error_rate <= MAX_ERROR_RATE and stats.last_p95 <= stats.baseline_p95 * LATENCY_TOLERANCE
+            if not healthy:
+                return
+            for key, state in scoped:
+                if state.limit < self.maximum:
+                    state.limit += 1
+                    logger.info("adaptive concurrency increased", extra={"provider": key, "status": f"{state.limit - 1}->{state.limit}"})
+
+    def observe(self, provider: str, send: Callable[[], requests.Response]) -> requests.Response:
+        started = time.monotonic()
+        try:
+            response = send()
+        except requests.RequestException:
+            self.record(provider, time.monotonic() - started, None)
+            raise
+        self.record(provider, time.monotonic() - started, response.status_code)
+        return response
+
+    async def observe_async(self, provider: str, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        started = time.monotonic()
+        try:
+            response = await send()
+        except httpx.TransportError:
+            self.record(provider, time.monotonic() - started, None)
+            raise
+        self.record(provider, time.monotonic() - started, response.status_code)
+        return response
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        with self._lock:
+            rows = []
+            for key, state in sorted(self._limits.items()):
+                scope, provider = key.rsplit(":", 1)
+                stats = self._provider_stats(provider)
+                rows.append(
+                    {
+                        "scope_key": key,
+                        "scope": scope,
+                        "provider": provider,
+                        "current_limit": state.limit,
+                        "p95_latency_ms": int(stats.last_p95 * 1000),
+                        "error_rate": round(stats.last_error_rate, 4),
+                        "sample_count": stats.observed,
+                    }
+                )
+            return rows
+
+
+def persist_concurrency_snapshot(db: Session, controller: AdaptiveConcurrencyController, *, worker_id: str) -> None:
+    now = utcnow()
+    db.execute(
+        delete(ProviderConcurrencyLimit).where(
+            ProviderConcurrencyLimit.updated_at < now - timedelta(seconds=SNAPSHOT_RETENTION_SECONDS)
+        )
+    )
+    for row in controller.snapshot():
+        scope_key = f"{worker_id}:{row['scope_key']}"
+        existing = db.get(ProviderConcurrencyLimit, scope_key)
+        if existing is None:
+            existing = ProviderConcurrencyLimit(scope_key=scope_key)
+            db.add(existing)
+        existing.scope = row["scope"]
+        existing.provider = row["provider"]
+        existing.current_limit = row["current_limit"]
+        existing.p95_latency_ms = row["p95_latency_ms"]
+        existing.error_rate = row["error_rate"]
+        existing.sample_count = row["sample_count"]
+        existing.worker_id = worker_id
+        existing.updated_at = now
+    db.commit()
+    db.expunge_all()
+
+
+def concurrency_limits_snapshot(db: Session) -> list[ProviderConcurrencyLimit]:
+    return list(
+        db.execute(
+            select(ProviderConcurrencyLimit).order_by(
+                ProviderConcurrencyLimit.scope.asc(),
+                ProviderConcurrencyLimit.provider.asc(),
+                ProviderConcurrencyLimit.worker_id.asc(),
+            )
+        ).scalars()
+    )
+
+
+_default_controller: AdaptiveConcurrencyController | None = None
+_default_lock = threading.Lock()
+
+
+def get_concurrency_controller() -> AdaptiveConcurrencyController:
+    global _default_controller
+    with _default_lock:
+        if _default_controller is None:
+            _default_controller = AdaptiveConcurrencyController()
+        return _default_controller
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from collections.abc import Callable, Coroutine
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, TypeVar
+
+import httpx
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class AsyncEngine:
+    def __init__(self, *, max_connections: int | None = None, blocking_workers: int | None = None, max_in_flight: int | None = None) -> None:
+        settings = get_settings()
+        self.max_connections = max(1, int(max_connections if max_connections is not None else settings.async_http_max_connections))
+        self.max_in_flight = max(1, int(max_in_flight if max_in_flight is not None else settings.async_max_in_flight))
+        self._blocking = ThreadPoolExecutor(
+            max_workers=max(1, int(blocking_workers if blocking_workers is not None else settings.async_blocking_workers)),
+            thread_name_prefix="aac-async-blocking",
+        )
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="aac-async-engine", daemon=True)
+        self._client: httpx.AsyncClient | None = None
+        self._in_flight: asyncio.Semaphore | None = None
+        self._started = threading.Event()
+        self._lock = threading.Lock()
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._started.set()
+        self._loop.run_forever()
+
+    def start(self) -> AsyncEngine:
+        with self._lock:
+            if not self._thread.is_alive() and not self._loop.is_closed():
+                self._thread.start()
+                self._started.wait()
+        return self
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive() and not self._loop.is_closed()
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> Future[T]:
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro: Coroutine[Any, Any, T], *, timeout: float | None = None) -> T:
+        return self.submit(coro).result(timeout=timeout)
+
+    async def blocking(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._blocking, partial(fn, *args, **kwargs))
+
+    def http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                timeout=httpx.Timeout(300.0),
+            )
+        return self._client
+
+    def in_flight(self) -> asyncio.Semaphore:
+        if self._in_flight is None:
+            self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        return self._in_flight
+
+    async def _shutdown(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def close(self) -> None:
+        with self._lock:
+            if self.running:
+                try:
+                    asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=10)
+                except Exception as exc:  # noqa: BLE001
+                    logger.warning("async engine shutdown failed", extra={"status": "shutdown_failed", "error": str(exc)})
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join(timeout=10)
+            if not self._loop.is_closed() and not self._thread.is_alive():
+                self._loop.close()
+            self._blocking.shutdown(wait=False, cancel_futures=True)
+
+
+_default_engine: AsyncEngine | None = None
+_default_lock = threading.Lock()
+
+
+def get_async_engine() -> AsyncEngine:
+    global _default_engine
+    with _default_lock:
+        if _default_engine is None or _default_engine._loop.is_closed():
+            _default_engine = AsyncEngine()
+        return _default_engine.start()
+
+
+def shutdown_async_engine() -> None:
+    global _default_engine
+    with _default_lock:
+        engine = _default_engine
+        _default_engine = None
+    if engine is not None:
+        engine.close()
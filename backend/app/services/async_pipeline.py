@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.services.async_engine import AsyncEngine, get_async_engine
+from app.services.google_image_client import GoogleImageClient
+from app.services.openai_client import OpenAIClient
+from app.services.pipeline import PipelineRunner
+from app.services.replicate_client import ReplicateClient
+
+
+class AsyncVariantPipelineRunner(PipelineRunner):
+    def __init__(
+        self,
+        db: Session,
+        *,
+        openai_client: OpenAIClient | None = None,
+        replicate_client: ReplicateClient | None = None,
+        google_image_client: GoogleImageClient | None = None,
+        engine: AsyncEngine | None = None,
+    ) -> None:
+        super().__init__(
+            db,
+            openai_client=openai_client,
+            replicate_client=replicate_client,
+            google_image_client=google_image_client,
+        )
+        self.engine = engine or get_async_engine()
+        self.google_images.use_async_engine(self.engine)
+        self.async_variants = True
+
+
+def create_pipeline_runner(db: Session) -> PipelineRunner:
+    if get_settings().async_variants_enabled:
+        return AsyncVariantPipelineRunner(db)
+    return PipelineRunner(db)
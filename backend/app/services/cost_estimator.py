@@ -118,17 +118,38 @@ def _cost_entry(
     estimated_cost_usd: float,
     estimate_basis: str,
     unit_count: int = 1,
+    extra_calls: int = 0,
+    vision_input: dict[str, Any] | None = None,
 ) -> dict[str, Any]:
-    return {
+    entry = {
         "stage_name": stage_name,
         "stage_label": stage_label,
         "attempt": int(attempt or 0),
         "provider": provider or "unknown",
         "model": model,
-        "estimated_cost_usd": round(float(estimated_cost_usd), 6),
+        "estimated_cost_usd": round(float(estimated_cost_usd) * (1 + max(0, extra_calls)), 6),
         "estimate_basis": estimate_basis,
         "unit_count": int(unit_count or 1),
     }
+    if extra_calls > 0:
+        entry["hedge_extra_calls"] = int(extra_calls)
+        entry["hedge_extra_cost_usd"] = round(float(estimated_cost_usd) * extra_calls, 6)
+    if vision_input:
+        calls = 1 + max(0, extra_calls)
+        entry["vision_source_bytes"] = int(vision_input.get("source_bytes") or 0) * calls
+        entry["vision_sent_bytes"] = int(vision_input.get("sent_bytes") or 0) * calls
+        entry["vision_bytes_saved"] = entry["vision_source_bytes"] - entry["vision_sent_bytes"]
+    return entry
+
+
+def _hedge_extra_calls(data: dict[str, Any]) -> int:
+    hedge = data.get("hedge")
+    if not isinstance(hedge, dict):
+        return 0
+    try:
+        return max(0, int(hedge.get("extra_calls") or 0))
+    except (TypeError, ValueError):
+        return 0
 
 
 def estimate_stage_costs(stage_name: str, request_json: dict[str, Any], response_json: dict[str, Any], attempt: int = 0) -> list[dict[str, Any]]:
@@ -201,6 +222,8 @@ def estimate_stage_costs(stage_name: str, request_json: dict[str, Any], response
                 model=analysis_model,
                 estimated_cost_usd=critique_cost,
                 estimate_basis="official token pricing",
+                extra_calls=_hedge_extra_calls(analysis_raw),
+                vision_input=_json_dict(analysis_raw.get("vision_input")),
             ),
             _cost_entry(
                 stage_name="stage3_prompt_engineer",
@@ -219,6 +242,7 @@ def estimate_stage_costs(stage_name: str, request_json: dict[str, Any], response
                 model=generation_model,
                 estimated_cost_usd=generation_cost,
                 estimate_basis="provider image-price estimate",
+                extra_calls=_hedge_extra_calls(generation),
             ),
         ]
 
@@ -242,6 +266,8 @@ def estimate_stage_costs(stage_name: str, request_json: dict[str, Any], response
                 model=model,
                 estimated_cost_usd=estimated_cost_usd,
                 estimate_basis="official token pricing",
+                extra_calls=_hedge_extra_calls(raw),
+                vision_input=_json_dict(raw.get("vision_input")),
             )
         ]
 
@@ -259,6 +285,7 @@ def estimate_stage_costs(stage_name: str, request_json: dict[str, Any], response
                 model=model,
                 estimated_cost_usd=estimated_cost_usd,
                 estimate_basis="provider image-price estimate",
+                extra_calls=_hedge_extra_calls(response_json),
             )
         ]
 
@@ -300,6 +327,7 @@ def estimate_stage_costs(stage_name: str, request_json: dict[str, Any], response
                 model=model,
                 estimated_cost_usd=estimated_cost_usd,
                 estimate_basis="provider image-price estimate",
+                extra_calls=_hedge_extra_calls(generation),
             )
         ]
 
@@ -380,6 +408,8 @@ def summarize_run_costs(stages: list[Any], assets: list[Any]) -> dict[str, Any]:
     avg = total / image_count if image_count > 0 else None
     return {
         "estimated_total_cost_usd": round(total, 6),
+        "hedge_extra_cost_usd": round(sum(float(entry.get("hedge_extra_cost_usd") or 0.0) for entry in stage_costs), 6),
+        "vision_bytes_saved": sum(int(entry.get("vision_bytes_saved") or 0) for entry in stage_costs),
         "estimated_cost_per_image_usd": round(avg, 6) if avg is not None else None,
         "image_count": image_count,
         "stage_costs": stage_costs,
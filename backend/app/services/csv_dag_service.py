@@ -12,13 +12,14 @@ from sqlalchemy.orm import Session
 
 from app.models import Asset, CsvJob, CsvJobItem, CsvTaskNode, Entry, Run
 from app.schemas import ExecutionMode
+from app.services.async_pipeline import create_pipeline_runner
 from app.services.csv_service import parse_entries_csv, validate_entry_row
 from app.services.inventory_sync import InventorySyncService
 from app.services.person_profiles import DEFAULT_AGE, DEFAULT_GENDER, DEFAULT_SKIN_COLOR, profile_key
-from app.services.pipeline import PipelineRunner
 from app.services.repository import Repository
-from app.services.storage import exports_root, materialize_path, persist_csv_source, persist_export_artifact
+from app.services.storage import exports_root, materialize_path, persist_csv_source, persist_export_artifacts
 from app.services.utils import sanitize_filename
+from app.services.work_signals import publish_work_available
 
 
 def _generated_batch_id() -> str:
@@ -143,6 +144,12 @@ class CsvDagService:
                     }
                     specs.append(spec)
 
+        downstream_counts = {spec["task_key"]: 0 for spec in specs}
+        for spec in reversed(specs):
+            for key in spec["dependency_keys"]:
+                if key in downstream_counts:
+                    downstream_counts[key] += 1 + downstream_counts[spec["task_key"]]
+
         task_id_by_key: dict[str, str] = {}
         created_specs: list[dict[str, Any]] = []
         for spec in specs:
@@ -158,6 +165,7 @@ class CsvDagService:
                 dependency_keys=dependency_keys,
                 dependency_task_ids=[],
                 status="pending",
+                priority=-downstream_counts[spec["task_key"]],
             )
             task_id_by_key[spec["task_key"]] = node.id
             created_specs.append({**spec, "id": node.id})
@@ -167,7 +175,7 @@ class CsvDagService:
             if dependency_ids:
                 task = self.repo.get_csv_task(spec["id"])
                 if task is not None:
-                    self.repo.update_csv_task(task, dependency_task_ids_json=json.dumps(dependency_ids, ensure_ascii=True))
+                    self.repo.set_csv_task_dependencies(task, dependency_ids)
         return created_specs
 
     def import_csv_job(
@@ -236,14 +244,21 @@ class CsvDagService:
             "rows": results,
         }
 
-    def list_jobs(self) -> list[dict[str, Any]]:
-        jobs = self.repo.list_csv_jobs()
+    def list_jobs(
+        self,
+        *,
+        limit: int | None = None,
+        cursor: tuple[datetime, str] | None = None,
+        include_error_detail: bool = True,
+    ) -> list[dict[str, Any]]:
+        deferred = ("config_snapshot_json",) if include_error_detail else ("config_snapshot_json", "error_detail")
+        jobs = self.repo.list_csv_jobs(limit=limit, cursor=cursor, deferred=deferred)
+        row_counts = self.repo.csv_job_row_counts([job.id for job in jobs])
         output: list[dict[str, Any]] = []
         for job in jobs:
-            finalized = self.repo.finalize_csv_job_status(job.id) or job
-            job = finalized
-            overview = self.repo.csv_job_overview(job.id) or {}
-            output.append(self._serialize_job(job, overview))
+            job = self.repo.finalize_csv_job_status(job.id) or job
+            overview = {"total_row_count": row_counts.get(job.id, 0), "duration_seconds": self.repo.csv_job_duration_seconds(job)}
+            output.append(self._serialize_job(job, overview, include_error_detail=include_error_detail))
         return output
 
     def get_job(self, job_id: str) -> dict[str, Any] | None:
@@ -264,7 +279,9 @@ class CsvDagService:
         for task in self.repo.list_csv_tasks(job_id):
             if task.status == "pending":
                 self.repo.update_csv_task(task, status="queued", error_summary="", finished_at=None)
-        return self.repo.update_csv_job(job, status="queued", error_detail="", finished_at=None)
+        started = self.repo.update_csv_job(job, status="queued", error_detail="", finished_at=None)
+        publish_work_available(self.db, reason="csv_job_started")
+        return started
 
     def retry_failures(self, job_id: str) -> tuple[CsvJob, int]:
         count = self.repo.retry_failed_csv_tasks(job_id)
@@ -319,6 +336,16 @@ class CsvDagService:
             "step4_race_variant": "Race variant",
         }.get(str(step_name or ""), str(step_name or "Unknown step"))
 
+    @staticmethod
+    def _main_status(counts: dict[str, int], total: int, shadow_run_id: str | None) -> str:
+        if counts.get("failed", 0) > 0 or (total > 0 and counts.get("canceled", 0) == total):
+            return "failure"
+        if total > 0 and counts.get("completed", 0) == total:
+            return "completed"
+        if counts.get("running", 0) > 0 or counts.get("completed", 0) > 0 or shadow_run_id:
+            return "running"
+        return "pending"
+
     def _item_progress_payload(self, item: CsvJobItem, tasks: list[CsvTaskNode]) -> dict[str, Any]:
         relevant = [task for task in tasks if task.csv_job_item_id == item.id]
         task_by_id = {task.id: task for task in relevant}
@@ -355,24 +382,20 @@ class CsvDagService:
             elif waiting_on_steps:
                 blocking_reason = f"Waiting on {', '.join(waiting_on_steps[:2])}"
 
-        main_status = "pending"
+        main_status = self._main_status(counts, total, item.shadow_run_id)
         sub_status = "Waiting to be picked up"
         current_step = self._step_label(waiting_task.step_name) if waiting_task is not None else ""
 
-        if failed_task is not None or all_canceled:
-            main_status = "failure"
+        if main_status == "failure":
             sub_status = "Canceled" if all_canceled else str(failed_task.error_summary or f"{self._step_label(failed_task.step_name)} failed")
             current_step = self._step_label(failed_task.step_name) if failed_task is not None else current_step
-        elif total > 0 and counts["completed"] == total:
-            main_status = "completed"
+        elif main_status == "completed":
             sub_status = "All requested images are ready"
             current_step = ""
         elif running_task is not None:
-            main_status = "running"
             sub_status = f"Creating {self._step_label(running_task.step_name)}"
             current_step = self._step_label(running_task.step_name)
-        elif counts["completed"] > 0 or item.shadow_run_id:
-            main_status = "running"
+        elif main_status == "running":
             sub_status = (
                 blocking_reason or f"Waiting for {self._step_label(waiting_task.step_name)}"
                 if waiting_task is not None
@@ -443,7 +466,7 @@ class CsvDagService:
         snapshot = self.repo.json_field_dict(job.config_snapshot_json)
         attempt_number = int(task.attempt_count or 0) + 1
         self.repo.update_csv_task(task, attempt_count=attempt_number)
-        runner = PipelineRunner(self.db)
+        runner = create_pipeline_runner(self.db)
 
         try:
             shadow_run = self._ensure_shadow_run(item, job)
@@ -560,9 +583,11 @@ class CsvDagService:
         finalized_job = self.repo.finalize_csv_job_status(job.id)
         if finalized_job is not None and finalized_job.status in {"completed", "failed", "canceled"}:
             InventorySyncService(self.db).sync_csv_job(job.id)
+        elif finished_task.status == "completed":
+            publish_work_available(self.db, reason="csv_task_completed")
         return self.repo.get_csv_task(task.id) or finished_task
 
-    def _serialize_job(self, job: CsvJob, overview: dict[str, Any]) -> dict[str, Any]:
+    def _serialize_job(self, job: CsvJob, overview: dict[str, Any], *, include_error_detail: bool = True) -> dict[str, Any]:
         total_row_count = int(overview.get("total_row_count") or 0)
         duration_seconds = float(overview.get("duration_seconds") or 0)
         return {
@@ -571,7 +596,7 @@ class CsvDagService:
             "execution_mode": job.execution_mode,
             "source_file_name": job.source_file_name,
             "status": job.status,
-            "error_detail": job.error_detail,
+            "error_detail": job.error_detail if include_error_detail else "",
             "total_row_count": total_row_count,
             "started_at": job.started_at,
             "finished_at": job.finished_at,
@@ -589,19 +614,30 @@ class CsvDagService:
         export_dir.mkdir(parents=True, exist_ok=True)
         return export_dir / self.export_zip_name(job.batch_id)
 
-    def job_overview(self, job_id: str) -> dict[str, Any] | None:
+    def job_overview(
+        self,
+        job_id: str,
+        *,
+        limit: int | None = None,
+        after_row: tuple[int, str] | None = None,
+    ) -> dict[str, Any] | None:
         self.repo.finalize_csv_job_status(job_id)
-        overview = self.repo.csv_job_overview(job_id)
+        overview = self.repo.csv_job_overview_page(job_id, limit=limit, after_row=after_row)
         if overview is None:
             return None
         job = overview["job"]
         tasks = overview["tasks"]
-        items_payload: list[dict[str, Any]] = []
         word_counts = {"pending": 0, "running": 0, "completed": 0, "failure": 0}
-        for item in overview["items"]:
-            entry = self.repo.get_entry(item.entry_id)
+        item_task_counts = overview["item_task_counts"]
+        for item_id, shadow_run_id in overview["item_shadow_runs"].items():
+            counts = item_task_counts.get(item_id, {})
+            word_counts[self._main_status(counts, sum(counts.values()), shadow_run_id)] += 1
+        page_items = overview["items"]
+        entries = self.repo.get_entries([item.entry_id for item in page_items])
+        items_payload: list[dict[str, Any]] = []
+        for item in page_items:
+            entry = entries.get(item.entry_id)
             item_progress = self._item_progress_payload(item, tasks)
-            word_counts[item_progress["main_status"]] += 1
             items_payload.append(
                 {
                     "id": item.id,
@@ -646,7 +682,7 @@ class CsvDagService:
                 "created_at": task.created_at,
                 "updated_at": task.updated_at,
             }
-            for task in overview["tasks"]
+            for task in tasks
         ]
         export_dir = exports_root() / sanitize_filename(job.id)
         return {
@@ -797,10 +833,15 @@ class CsvDagService:
                             white_bg_path = materialize_path(white_bg_asset.abs_path, cache_namespace="csv_job_export")
                             archive.write(white_bg_path, arcname=f"white_bg/{prefix}/{white_bg_asset.file_name}")
 
-        stored_zip = persist_export_artifact(job.id, zip_filename, zip_path.read_bytes(), content_type="application/zip")
-        persist_export_artifact(job.id, "job_summary.csv", summary_csv.read_bytes(), content_type="text/csv")
-        persist_export_artifact(job.id, "word_inventory.csv", inventory_csv.read_bytes(), content_type="text/csv")
-        persist_export_artifact(job.id, "manifest.json", manifest_path.read_bytes(), content_type="application/json")
+        stored_zip, *_ = persist_export_artifacts(
+            job.id,
+            [
+                (zip_path, "application/zip"),
+                (summary_csv, "text/csv"),
+                (inventory_csv, "text/csv"),
+                (manifest_path, "application/json"),
+            ],
+        )
         return {
             "job_id": job.id,
             "batch_id": job.batch_id,
@@ -12,7 +12,7 @@ from sqlalchemy.orm import Session
 from app.models import Asset
 from app.services.person_profiles import entry_age_options, entry_gender_options, entry_skin_color_options
 from app.services.repository import Repository
-from app.services.storage import exports_root, materialize_path, persist_export_artifact
+from app.services.storage import exports_root, materialize_path, persist_export_artifacts
 from app.services.utils import sanitize_filename
 
 
@@ -47,11 +47,16 @@ class ExportService:
                 manifest_path=manifest_path,
             )
 
-            stored_csv = persist_export_artifact(record.id, "export.csv", csv_path.read_bytes(), content_type="text/csv")
-            stored_white = persist_export_artifact(record.id, "images_white_bg.zip", white_bg_zip_path.read_bytes(), content_type="application/zip")
-            persist_export_artifact(record.id, "images_with_bg_last_attempt.zip", with_bg_zip_path.read_bytes(), content_type="application/zip")
-            stored_manifest = persist_export_artifact(record.id, "manifest.json", manifest_path.read_bytes(), content_type="application/json")
-            persist_export_artifact(record.id, "export_package.zip", package_zip_path.read_bytes(), content_type="application/zip")
+            stored_csv, stored_white, _, stored_manifest, _ = persist_export_artifacts(
+                record.id,
+                [
+                    (csv_path, "text/csv"),
+                    (white_bg_zip_path, "application/zip"),
+                    (with_bg_zip_path, "application/zip"),
+                    (manifest_path, "application/json"),
+                    (package_zip_path, "application/zip"),
+                ],
+            )
 
             self.repo.update_export(
                 record,
@@ -1,19 +1,27 @@
 from __future__ import annotations
 
 import base64
-import mimetypes
 import threading
 import uuid
-from concurrent.futures import Future, ThreadPoolExecutor
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
 from pathlib import Path
 from typing import Any
 
+import httpx
 import requests
 
 from app.core.config import get_settings
+from app.services.adaptive_concurrency import get_concurrency_controller
+from app.services.async_engine import AsyncEngine
+from app.services.hedging import get_hedging_policy
+from app.services.http_pool import HttpPoolManager, get_http_pool
 from app.services.model_catalog import google_image_model_name, normalize_nano_banana_safety_level, normalize_stage3_generation_model
-from app.services.retry import with_backoff
-from app.services.storage import write_temp_binary
+from app.services.payload_cache import get_payload_cache
+from app.services.provider_files import get_google_file_cache
+from app.services.rate_limiter import estimate_request_tokens, get_rate_limiter
+from app.services.retry import async_call_with_retry, call_with_retry
+from app.services.storage import InlineImage, sha256_bytes
 
 GOOGLE_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
 
@@ -26,17 +34,27 @@ class GoogleImageAPIError(RuntimeError):
 
 
 class GoogleImageClient:
-    def __init__(self) -> None:
+    def __init__(self, *, http_pool: HttpPoolManager | None = None) -> None:
         self.settings = get_settings()
+        self.http = http_pool or get_http_pool()
+        self.rate_limiter = get_rate_limiter()
+        self.concurrency = get_concurrency_controller()
+        self.hedging = get_hedging_policy()
+        self.payload_cache = get_payload_cache()
+        self.file_cache = get_google_file_cache()
         self._prediction_executor = ThreadPoolExecutor(max_workers=self._executor_limit(int(self.settings.max_variant_workers or 1)))
         self._prediction_futures: dict[str, Future[dict[str, Any]]] = {}
         self._prediction_models: dict[str, str] = {}
-        self._inline_assets: dict[str, dict[str, str]] = {}
+        self._inline_assets: dict[str, InlineImage] = {}
         self._lock = threading.Lock()
+        self._async_engine: AsyncEngine | None = None
+
+    def use_async_engine(self, engine: AsyncEngine | None) -> None:
+        self._async_engine = engine
 
     @staticmethod
     def _executor_limit(worker_count: int) -> int:
-        return max(1, min(int(worker_count or 1), 12))
+        return max(1, min(int(worker_count or 1), max(12, int(get_settings().adaptive_concurrency_max))))
 
     def configure_workers(self, worker_count: int) -> None:
         desired = self._executor_limit(worker_count)
@@ -67,7 +85,7 @@ class GoogleImageClient:
             return [cls._sanitize_payload(item) for item in value]
         return value
 
-    def _request(self, model_name: str, request_json: dict[str, Any], *, timeout: int = 300) -> dict[str, Any]:
+    def _require_api_key(self, model_name: str, request_json: dict[str, Any], *, timeout: int) -> None:
         if not self.settings.google_api_key:
             raise GoogleImageAPIError(
                 "GOOGLE_API_KEY is required when using Google image models",
@@ -80,59 +98,90 @@ class GoogleImageClient:
                 response_json={},
             )
 
+    def _http_error(self, response: Any, *, url: str, model_name: str, request_json: dict[str, Any], timeout: int) -> GoogleImageAPIError:
+        return GoogleImageAPIError(
+            f"Google image API HTTP {response.status_code}: {response.text[:1000]}",
+            request_json={
+                "method": "POST",
+                "url": url,
+                "json_body": self._sanitize_payload(request_json),
+                "timeout": timeout,
+                "model": model_name,
+            },
+            response_json={
+                "status_code": response.status_code,
+                "text": response.text[:4000],
+            },
+        )
+
+    def _request(self, model_name: str, request_json: dict[str, Any], *, timeout: int = 300) -> dict[str, Any]:
+        self._require_api_key(model_name, request_json, timeout=timeout)
         url = f"{GOOGLE_BASE_URL}/models/{model_name}:generateContent"
+        tokens = estimate_request_tokens(request_json)
 
         def _call() -> dict[str, Any]:
-            response = requests.post(
-                url,
-                headers={"Content-Type": "application/json"},
-                params={"key": self.settings.google_api_key},
-                json=request_json,
-                timeout=timeout,
+            self.rate_limiter.acquire("google", model_name, tokens=tokens)
+            response = self.concurrency.observe(
+                "google",
+                lambda: self.http.post(
+                    url,
+                    headers={"Content-Type": "application/json"},
+                    params={"key": self.settings.google_api_key},
+                    json=request_json,
+                    timeout=timeout,
+                ),
             )
             try:
                 response.raise_for_status()
             except requests.HTTPError as exc:
-                raise GoogleImageAPIError(
-                    f"Google image API HTTP {response.status_code}: {response.text[:1000]}",
-                    request_json={
-                        "method": "POST",
-                        "url": url,
-                        "json_body": self._sanitize_payload(request_json),
-                        "timeout": timeout,
-                        "model": model_name,
-                    },
-                    response_json={
-                        "status_code": response.status_code,
-                        "text": response.text[:4000],
-                    },
-                ) from exc
+                raise self._http_error(response, url=url, model_name=model_name, request_json=request_json, timeout=timeout) from exc
             return response.json()
 
-        return with_backoff(
+        return call_with_retry(
             _call,
             retries=self.settings.max_api_retries,
-            retryable=(requests.RequestException,),
+            provider="google",
+            model=model_name,
+        )
+
+    async def _request_async(self, engine: AsyncEngine, model_name: str, request_json: dict[str, Any], *, timeout: int = 300) -> dict[str, Any]:
+        self._require_api_key(model_name, request_json, timeout=timeout)
+        url = f"{GOOGLE_BASE_URL}/models/{model_name}:generateContent"
+        tokens = estimate_request_tokens(request_json)
+
+        async def _call() -> dict[str, Any]:
+            await engine.blocking(self.rate_limiter.acquire, "google", model_name, tokens=tokens)
+            response = await self.concurrency.observe_async(
+                "google",
+                lambda: engine.http().post(
+                    url,
+                    headers={"Content-Type": "application/json"},
+                    params={"key": self.settings.google_api_key},
+                    json=request_json,
+                    timeout=timeout,
+                ),
+            )
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError as exc:
+                raise self._http_error(response, url=url, model_name=model_name, request_json=request_json, timeout=timeout) from exc
+            return response.json()
+
+        return await async_call_with_retry(
+            _call,
+            retries=self.settings.max_api_retries,
+            provider="google",
+            model=model_name,
         )
 
     @staticmethod
     def _text_part(text: str) -> dict[str, Any]:
         return {"text": str(text)}
 
-    @staticmethod
-    def _inline_part(image_path: Path) -> dict[str, Any]:
-        mime_type, _ = mimetypes.guess_type(image_path.as_posix())
-        mime_type = mime_type or "image/jpeg"
-        data = base64.b64encode(image_path.read_bytes()).decode("utf-8")
+    def _inline_part(self, image_path: Path) -> dict[str, Any]:
+        mime_type, data = self.payload_cache.encoded(image_path)
         return {"inlineData": {"mimeType": mime_type, "data": data}}
 
-    @staticmethod
-    def _temp_suffix(mime_type: str) -> str:
-        guessed = mimetypes.guess_extension(mime_type or "")
-        if guessed:
-            return guessed
-        return ".bin"
-
     @staticmethod
     def _response_text(response_json: dict[str, Any]) -> str:
         texts: list[str] = []
@@ -208,10 +257,11 @@ class GoogleImageClient:
         aspect_ratio: str | None = None,
         image_size: str | None = None,
         safety_level: str | None = None,
+        file_sources: bool = False,
     ) -> dict[str, Any]:
         parts = [self._text_part(prompt)]
         for image_path in image_paths or []:
-            parts.append(self._inline_part(image_path))
+            parts.append((self.file_cache.part_for(image_path) if file_sources else None) or self._inline_part(image_path))
         request = {
             "contents": [{"parts": parts}],
             "generationConfig": self._generation_config(aspect_ratio=aspect_ratio, image_size=image_size),
@@ -224,7 +274,6 @@ class GoogleImageClient:
     def _run_generation(
         self,
         *,
-        run_id: str,
         model_name: str,
         prompt: str,
         image_paths: list[Path] | None = None,
@@ -232,6 +281,8 @@ class GoogleImageClient:
         image_size: str | None = None,
         safety_level: str | None = None,
         timeout: int = 300,
+        hedge_stage: str = "",
+        file_sources: bool = False,
     ) -> dict[str, Any]:
         request_json = self._build_request(
             prompt=prompt,
@@ -239,8 +290,52 @@ class GoogleImageClient:
             aspect_ratio=aspect_ratio,
             image_size=image_size,
             safety_level=safety_level,
+            file_sources=file_sources,
+        )
+        response_json, hedge = self.hedging.run(hedge_stage, lambda: self._request(model_name, request_json, timeout=timeout))
+        result = self._generation_result(model_name=model_name, request_json=request_json, response_json=response_json)
+        if hedge:
+            result["hedge"] = hedge
+        return result
+
+    async def _run_generation_async(
+        self,
+        engine: AsyncEngine,
+        *,
+        model_name: str,
+        prompt: str,
+        image_paths: list[Path] | None = None,
+        aspect_ratio: str | None = None,
+        image_size: str | None = None,
+        safety_level: str | None = None,
+        timeout: int = 300,
+        file_sources: bool = False,
+    ) -> dict[str, Any]:
+        async with engine.in_flight():
+            request_json = await engine.blocking(
+                self._build_request,
+                prompt=prompt,
+                image_paths=image_paths,
+                aspect_ratio=aspect_ratio,
+                image_size=image_size,
+                safety_level=safety_level,
+                file_sources=file_sources,
+            )
+            response_json = await self._request_async(engine, model_name, request_json, timeout=timeout)
+        return await engine.blocking(
+            self._generation_result,
+            model_name=model_name,
+            request_json=request_json,
+            response_json=response_json,
         )
-        response_json = self._request(model_name, request_json, timeout=timeout)
+
+    def _generation_result(
+        self,
+        *,
+        model_name: str,
+        request_json: dict[str, Any],
+        response_json: dict[str, Any],
+    ) -> dict[str, Any]:
         image_payload = self._response_inline_image(response_json)
         text_output = self._response_text(response_json)
         sanitized_request_json = self._sanitize_payload(request_json)
@@ -260,16 +355,8 @@ class GoogleImageClient:
 
         image_bytes, mime_type = image_payload
         inline_url = f"google-inline://{prediction_id}"
-        temp_path = write_temp_binary(
-            run_id,
-            suffix=self._temp_suffix(mime_type),
-            payload=image_bytes,
-        )
         with self._lock:
-            self._inline_assets[inline_url] = {
-                "path": temp_path.as_posix(),
-                "mime_type": mime_type,
-            }
+            self._inline_assets[inline_url] = InlineImage(data=image_bytes, mime_type=mime_type, sha256=sha256_bytes(image_bytes))
         return {
             "status": "succeeded",
             "id": prediction_id,
@@ -294,12 +381,12 @@ class GoogleImageClient:
         selected = normalize_stage3_generation_model(model_choice)
         model_name = google_image_model_name(selected)
         return self._run_generation(
-            run_id=run_id,
             model_name=model_name,
             prompt=prompt,
             aspect_ratio=aspect_ratio,
             image_size=image_size,
             safety_level=self.settings.nano_banana_safety_level,
+            hedge_stage="stage3_generate",
         ), model_name
 
     def nano_banana_white_bg(
@@ -320,13 +407,13 @@ class GoogleImageClient:
             "Do not add text in the image."
         )
         return self._run_generation(
-            run_id=run_id,
             model_name=google_image_model_name("nano-banana-2"),
             prompt=prompt,
             image_paths=[image_path],
             aspect_ratio=aspect_ratio,
             image_size=image_size,
             safety_level=self.settings.nano_banana_safety_level,
+            hedge_stage="stage4_background",
         )
 
     def profile_variant_request_summary(
@@ -392,11 +479,9 @@ class GoogleImageClient:
     ) -> dict[str, Any]:
         prediction_id = f"google_pred_{uuid.uuid4().hex}"
         model_name = google_image_model_name("nano-banana-2")
-        future = self._prediction_executor.submit(
-            self._run_generation,
-            run_id=run_id,
-            model_name=model_name,
-            prompt=str(
+        generation = {
+            "model_name": model_name,
+            "prompt": str(
                 self.profile_variant_request_summary(
                     image_path,
                     word=word,
@@ -407,16 +492,39 @@ class GoogleImageClient:
                     edit_instruction=edit_instruction,
                 )["prompt"]
             ),
-            image_paths=[image_path],
-            aspect_ratio=aspect_ratio,
-            image_size=image_size,
-            safety_level=self.settings.nano_banana_safety_level,
-        )
+            "image_paths": [image_path],
+            "aspect_ratio": aspect_ratio,
+            "image_size": image_size,
+            "safety_level": self.settings.nano_banana_safety_level,
+            "file_sources": True,
+        }
+        engine = self._async_engine
+        if engine is not None:
+            future = engine.submit(self._run_generation_async(engine, **generation))
+        else:
+            future = self._prediction_executor.submit(self._run_generation, **generation)
         with self._lock:
             self._prediction_futures[prediction_id] = future
             self._prediction_models[prediction_id] = model_name
         return {"id": prediction_id, "status": "processing", "model": model_name, "provider": "google"}
 
+    def wait_prediction(self, prediction_id: str, *, timeout: float | None = None) -> dict[str, Any]:
+        with self._lock:
+            future = self._prediction_futures.get(prediction_id)
+        if future is not None:
+            wait([future], timeout=timeout)
+        return self.get_prediction(prediction_id)
+
+    def iter_completed_predictions(self, prediction_ids: list[str]) -> Iterator[tuple[str, dict[str, Any]]]:
+        with self._lock:
+            futures = {self._prediction_futures[prediction_id]: prediction_id for prediction_id in prediction_ids if prediction_id in self._prediction_futures}
+        for prediction_id in prediction_ids:
+            if prediction_id not in futures.values():
+                yield prediction_id, self.get_prediction(prediction_id)
+        for future in as_completed(futures):
+            prediction_id = futures[future]
+            yield prediction_id, self.get_prediction(prediction_id)
+
     def get_prediction(self, prediction_id: str) -> dict[str, Any]:
         with self._lock:
             future = self._prediction_futures.get(prediction_id)
@@ -450,7 +558,7 @@ class GoogleImageClient:
             }
         return {**result, "id": prediction_id}
 
-    def download_image(self, url: str) -> bytes:
+    def take_inline_image(self, url: str) -> InlineImage:
         with self._lock:
             stored = self._inline_assets.pop(url, None)
         if stored is None:
@@ -459,28 +567,13 @@ class GoogleImageClient:
                 request_json={"url": url},
                 response_json={},
             )
-        path = Path(str(stored.get("path") or ""))
-        if not path.exists():
-            raise GoogleImageAPIError(
-                f"Inline Google image temp file is missing for {url}",
-                request_json={"url": url, "path": path.as_posix()},
-                response_json={},
-            )
-        try:
-            return path.read_bytes()
-        finally:
-            path.unlink(missing_ok=True)
+        return stored
 
     def clear_transient_state(self) -> None:
         with self._lock:
             self._prediction_futures.clear()
             self._prediction_models.clear()
-            inline_assets = list(self._inline_assets.values())
             self._inline_assets.clear()
-        for item in inline_assets:
-            path = Path(str(item.get("path") or ""))
-            if path.exists():
-                path.unlink(missing_ok=True)
 
     def close(self) -> None:
         self._prediction_executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _quantile(values: list[float], quantile: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(quantile * len(ordered)) - 1))]
+
+
+@dataclass
+class _StageStats:
+    latencies: deque = field(default_factory=deque)
+    calls: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+
+
+class HedgingPolicy:
+    def __init__(
+        self,
+        *,
+        stages: set[str] | None = None,
+        quantile: float | None = None,
+        max_ratio: float | None = None,
+        min_samples: int | None = None,
+        window: int = 200,
+        max_workers: int = 32,
+    ) -> None:
+        settings = get_settings()
+        configured = stages if stages is not None else {item.strip() for item in str(settings.hedge_stages or "").split(",")}
+        self.stages = {item for item in configured if item}
+        self.quantile = min(0.999, max(0.5, float(quantile if quantile is not None else settings.hedge_quantile)))
+        self.max_ratio = min(1.0, max(0.0, float(max_ratio if max_ratio is not None else settings.hedge_max_ratio)))
+        self.min_samples = max(1, int(min_samples if min_samples is not None else settings.hedge_min_samples))
+        self.window = max(self.min_samples, int(window))
+        self._stats: dict[str, _StageStats] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(2, int(max_workers)), thread_name_prefix="aac-hedge")
+
+    def enabled(self, stage: str) -> bool:
+        return stage in self.stages
+
+    def _stage_stats(self, stage: str) -> _StageStats:
+        stats = self._stats.get(stage)
+        if stats is None:
+            stats = _StageStats(latencies=deque(maxlen=self.window))
+            self._stats[stage] = stats
+        return stats
+
+    def threshold(self, stage: str) -> float | None:
+        with self._lock:
+            latencies = list(self._stage_stats(stage).latencies)
+        if len(latencies) < self.min_samples:
+            return None
+        return _quantile(latencies, self.quantile)
+
+    def _submit(self, stage: str, fn: Callable[[], T]) -> Future:
+        def _timed() -> T:
+            started = time.monotonic()
+            result = fn()
+            with self._lock:
+                self._stage_stats(stage).latencies.append(time.monotonic() - started)
+            return result
+
+        return self._executor.submit(_timed)
+
+    def _may_hedge(self, stage: str) -> bool:
+        with self._lock:
+            stats = self._stage_stats(stage)
+            if stats.hedged + 1 > stats.calls * self.max_ratio:
+                return False
+            stats.hedged += 1
+            return True
+
+    def run(self, stage: str, fn: Callable[[], T]) -> tuple[T, dict[str, Any]]:
+        if not self.enabled(stage):
+            return fn(), {}
+        threshold = self.threshold(stage)
+        with self._lock:
+            self._stage_stats(stage).calls += 1
+        started = time.monotonic()
+        primary = self._submit(stage, fn)
+        outcome: dict[str, Any] = {
+            "stage": stage,
+            "hedged": False,
+            "winner": "primary",
+            "threshold_ms": int(threshold * 1000) if threshold is not None else None,
+            "extra_calls": 0,
+        }
+        if threshold is None or wait([primary], timeout=threshold).done or not self._may_hedge(stage):
+            result = primary.result()
+            outcome["latency_ms"] = int((time.monotonic() - started) * 1000)
+            return result, outcome
+
+        hedge = self._submit(stage, fn)
+        outcome["hedged"] = True
+        outcome["extra_calls"] = 1
+        pending = {primary, hedge}
+        first_error: BaseException | None = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((future for future in done if future.exception() is None), None)
+            if winner is not None:
+                for future in pending:
+                    future.cancel()
+                if hedge.cancelled():
+                    outcome["hedged"] = False
+                    outcome["extra_calls"] = 0
+                    with self._lock:
+                        self._stage_stats(stage).hedged -= 1
+                outcome["winner"] = "hedge" if winner is hedge else "primary"
+                outcome["latency_ms"] = int((time.monotonic() - started) * 1000)
+                if winner is hedge:
+                    with self._lock:
+                        self._stage_stats(stage).hedge_wins += 1
+                logger.info(
+                    "hedged request finished",
+                    extra={"stage_name": stage, "status": f"winner={outcome['winner']}", "latency_ms": outcome["latency_ms"]},
+                )
+                return winner.result(), outcome
+            first_error = first_error or next(iter(done)).exception()
+        if first_error is None:
+            raise RuntimeError(f"Hedged {stage} call finished without a result")
+        raise first_error
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        with self._lock:
+            rows = [
+                {
+                    "stage": stage,
+                    "calls": stats.calls,
+                    "hedged": stats.hedged,
+                    "hedge_wins": stats.hedge_wins,
+                    "hedge_rate": round(stats.hedged / stats.calls, 4) if stats.calls else 0.0,
+                }
+                for stage, stats in sorted(self._stats.items())
+            ]
+        for row in rows:
+            threshold = self.threshold(row["stage"])
+            row["threshold_ms"] = int(threshold * 1000) if threshold is not None else None
+        return rows
+
+
+_default_policy: HedgingPolicy | None = None
+_default_lock = threading.Lock()
+
+
+def get_hedging_policy() -> HedgingPolicy:
+    global _default_policy
+    with _default_lock:
+        if _default_policy is None:
+            _default_policy = HedgingPolicy()
+        return _default_policy
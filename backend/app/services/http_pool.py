@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import threading
+from typing import Any
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.config import get_settings
+
+WORKER_EXECUTOR_THREADS = 24
+
+
+def default_pool_maxsize() -> int:
+    settings = get_settings()
+    if int(settings.http_pool_maxsize or 0) > 0:
+        return int(settings.http_pool_maxsize)
+    variant_fanout = max(1, int(settings.max_parallel_runs)) * max(1, int(settings.max_variant_workers))
+    return max(10, min(WORKER_EXECUTOR_THREADS + variant_fanout, int(settings.adaptive_concurrency_max) * 4))
+
+
+class HttpPoolManager:
+    def __init__(self, *, pool_maxsize: int | None = None) -> None:
+        self.pool_maxsize = max(1, int(pool_maxsize if pool_maxsize is not None else default_pool_maxsize()))
+        self._sessions: dict[str, requests.Session] = {}
+        self._adapters: dict[str, HTTPAdapter] = {}
+        self._requests: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _origin(url: str) -> str:
+        parts = urlsplit(str(url))
+        return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+    def session_for(self, url: str) -> requests.Session:
+        origin = self._origin(url)
+        with self._lock:
+            session = self._sessions.get(origin)
+            if session is None:
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_maxsize, max_retries=0)
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[origin] = session
+                self._adapters[origin] = adapter
+                self._requests[origin] = 0
+            return session
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        session = self.session_for(url)
+        origin = self._origin(url)
+        with self._lock:
+            self._requests[origin] = self._requests.get(origin, 0) + 1
+        return session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        with self._lock:
+            adapters = dict(self._adapters)
+            request_counts = dict(self._requests)
+        rows = []
+        for origin, adapter in sorted(adapters.items()):
+            pools = adapter.poolmanager.pools
+            connections = 0
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    connections += int(getattr(pool, "num_connections", 0) or 0)
+            request_count = request_counts.get(origin, 0)
+            rows.append(
+                {
+                    "host": origin,
+                    "requests": request_count,
+                    "new_connections": connections,
+                    "reuse_ratio": round(1.0 - connections / request_count, 4) if request_count else 0.0,
+                    "pool_maxsize": self.pool_maxsize,
+                }
+            )
+        return rows
+
+    def close(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._adapters.clear()
+            self._requests.clear()
+        for session in sessions:
+            session.close()
+
+
+_default_pool: HttpPoolManager | None = None
+_default_lock = threading.Lock()
+
+
+def get_http_pool() -> HttpPoolManager:
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = HttpPoolManager()
+        return _default_pool
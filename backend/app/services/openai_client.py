@@ -1,7 +1,5 @@
 from __future__ import annotations
 
-import base64
-import mimetypes
 import time
 from pathlib import Path
 from typing import Any
@@ -10,8 +8,13 @@ from urllib.parse import quote
 import requests
 
 from app.core.config import get_settings
+from app.services.adaptive_concurrency import get_concurrency_controller
+from app.services.hedging import get_hedging_policy
+from app.services.http_pool import HttpPoolManager, get_http_pool
 from app.services.model_catalog import is_gemini_model, normalize_prompt_engineer_model, normalize_vision_model
-from app.services.retry import with_backoff
+from app.services.payload_cache import get_payload_cache
+from app.services.rate_limiter import estimate_request_tokens, get_rate_limiter
+from app.services.retry import call_with_retry
 from app.services.utils import parse_json_relaxed
 
 OPENAI_BASE_URL = "https://api.openai.com/v1"
@@ -33,8 +36,13 @@ class ProviderAPIError(RuntimeError):
 
 
 class OpenAIClient:
-    def __init__(self) -> None:
+    def __init__(self, *, http_pool: HttpPoolManager | None = None) -> None:
         self.settings = get_settings()
+        self.http = http_pool or get_http_pool()
+        self.rate_limiter = get_rate_limiter()
+        self.concurrency = get_concurrency_controller()
+        self.hedging = get_hedging_policy()
+        self.payload_cache = get_payload_cache()
 
     def _headers(self, assistants_v2: bool = False) -> dict[str, str]:
         headers = {
@@ -46,15 +54,22 @@ class OpenAIClient:
         return headers
 
     def _request(self, method: str, url: str, *, params: dict[str, Any] | None = None, json_body: dict[str, Any] | None = None, assistants_v2: bool = False, timeout: int = 180) -> dict[str, Any]:
+        model = str((json_body or {}).get("model") or "")
+        tokens = estimate_request_tokens(json_body or {})
+
         def _call() -> dict[str, Any]:
+            self.rate_limiter.acquire("openai", model, tokens=tokens)
             headers = self._headers(assistants_v2=assistants_v2)
-            response = requests.request(
-                method,
-                url,
-                headers=headers,
-                params=params,
-                json=json_body,
-                timeout=timeout,
+            response = self.concurrency.observe(
+                "openai",
+                lambda: self.http.request(
+                    method,
+                    url,
+                    headers=headers,
+                    params=params,
+                    json=json_body,
+                    timeout=timeout,
+                ),
             )
             try:
                 response.raise_for_status()
@@ -76,24 +91,31 @@ class OpenAIClient:
                 ) from exc
             return response.json()
 
-        return with_backoff(
+        return call_with_retry(
             _call,
             retries=self.settings.max_api_retries,
-            retryable=(requests.RequestException,),
+            provider="openai",
+            model=model,
         )
 
     def _request_gemini(self, method: str, url: str, *, json_body: dict[str, Any] | None = None, timeout: int = 180) -> dict[str, Any]:
         if not self.settings.google_api_key:
             raise RuntimeError("GOOGLE_API_KEY is required when using Gemini models")
+        model = url.rsplit("/models/", 1)[-1].split(":", 1)[0] if "/models/" in url else ""
+        tokens = estimate_request_tokens(json_body or {})
 
         def _call() -> dict[str, Any]:
-            response = requests.request(
-                method,
-                url,
-                headers={"Content-Type": "application/json"},
-                params={"key": self.settings.google_api_key},
-                json=json_body,
-                timeout=timeout,
+            self.rate_limiter.acquire("google", model, tokens=tokens)
+            response = self.concurrency.observe(
+                "google",
+                lambda: self.http.request(
+                    method,
+                    url,
+                    headers={"Content-Type": "application/json"},
+                    params={"key": self.settings.google_api_key},
+                    json=json_body,
+                    timeout=timeout,
+                ),
             )
             try:
                 response.raise_for_status()
@@ -113,10 +135,11 @@ class OpenAIClient:
                 ) from exc
             return response.json()
 
-        return with_backoff(
+        return call_with_retry(
             _call,
             retries=self.settings.max_api_retries,
-            retryable=(requests.RequestException,),
+            provider="google",
+            model=model,
         )
 
     def resolve_assistant_id(self, configured_id: str, configured_name: str) -> str:
@@ -313,13 +336,12 @@ class OpenAIClient:
             return self._responses_json(user_text, model=responses_model, vector_store_id=vector_store_id)
         return self._assistant_json(user_text=user_text, assistant_id=assistant_id)
 
-    @staticmethod
-    def _read_image(path: Path) -> tuple[str, str]:
-        mime, _ = mimetypes.guess_type(path.as_posix())
-        if not mime:
-            mime = "image/jpeg"
-        b64 = base64.b64encode(path.read_bytes()).decode("utf-8")
-        return mime, b64
+    def _read_image(self, path: Path) -> tuple[str, str, dict[str, Any]]:
+        return self.payload_cache.vision_payload(
+            path,
+            max_edge=int(self.settings.vision_input_max_edge or 0),
+            quality=min(95, max(30, int(self.settings.vision_input_jpeg_quality or 85))),
+        )
 
     def _vision_json(
         self,
@@ -328,9 +350,10 @@ class OpenAIClient:
         prompt: str,
         model: str,
         temperature: float,
+        hedge_stage: str = "",
     ) -> tuple[dict[str, Any], dict[str, Any]]:
         normalized_model = normalize_vision_model(model)
-        mime, b64 = self._read_image(image_path)
+        mime, b64, vision_input = self._read_image(image_path)
 
         if is_gemini_model(normalized_model):
             model_path = quote(normalized_model, safe="")
@@ -350,11 +373,16 @@ class OpenAIClient:
                     "responseMimeType": "application/json",
                 },
             }
-            response = self._request_gemini("POST", url, json_body=payload)
+            response, hedge = self.hedging.run(hedge_stage, lambda: self._request_gemini("POST", url, json_body=payload))
             candidates = response.get("candidates", [])
             parts = candidates[0].get("content", {}).get("parts", []) if candidates else []
             content = "\n".join(str(part.get("text", "")) for part in parts if part.get("text")).strip()
-            return parse_json_relaxed(content), {"provider": "google", "model": normalized_model, "raw_response": response, "raw_text": content}
+            meta = {"provider": "google", "model": normalized_model, "raw_response": response, "raw_text": content}
+            if hedge:
+                meta["hedge"] = hedge
+            if vision_input:
+                meta["vision_input"] = vision_input
+            return parse_json_relaxed(content), meta
 
         image_data_uri = f"data:{mime};base64,{b64}"
         payload = {
@@ -370,9 +398,14 @@ class OpenAIClient:
             ],
             "temperature": temperature,
         }
-        response = self._request("POST", f"{OPENAI_BASE_URL}/chat/completions", json_body=payload)
+        response, hedge = self.hedging.run(hedge_stage, lambda: self._request("POST", f"{OPENAI_BASE_URL}/chat/completions", json_body=payload))
         content = response["choices"][0]["message"]["content"]
-        return parse_json_relaxed(content), {"provider": "openai", "model": normalized_model, "raw_response": response, "raw_text": content}
+        meta = {"provider": "openai", "model": normalized_model, "raw_response": response, "raw_text": content}
+        if hedge:
+            meta["hedge"] = hedge
+        if vision_input:
+            meta["vision_input"] = vision_input
+        return parse_json_relaxed(content), meta
 
     def analyze_image(
         self,
@@ -400,7 +433,7 @@ class OpenAIClient:
             "person_presence_problem=unnecessary_person. Otherwise return person_presence_problem=none. "
             "In person_decision_reasoning, explain in one short sentence why a person is or is not needed for clarity."
         )
-        return self._vision_json(image_path=image_path, prompt=prompt, model=model, temperature=0.2)
+        return self._vision_json(image_path=image_path, prompt=prompt, model=model, temperature=0.2, hedge_stage="stage3_critique")
 
     def score_image(
         self,
@@ -420,7 +453,7 @@ class OpenAIClient:
             f"Pass threshold is {threshold}. "
             f"Expected render style is {expected_render_style_mode or 'not specified'}."
         )
-        parsed, raw = self._vision_json(image_path=image_path, prompt=prompt, model=model, temperature=0.1)
+        parsed, raw = self._vision_json(image_path=image_path, prompt=prompt, model=model, temperature=0.1, hedge_stage="quality_gate")
         if "score" not in parsed:
             parsed["score"] = 0
         return parsed, raw
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import base64
+import mimetypes
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from app.core.config import get_settings
+from app.services.storage import downscale_image_for_vision, file_sha256
+
+DIGEST_MEMO_LIMIT = 4096
+
+
+def guess_image_mime(path: Path) -> str:
+    mime_type, _ = mimetypes.guess_type(path.as_posix())
+    return mime_type or "image/jpeg"
+
+
+class EncodedPayloadCache:
+    def __init__(self, *, max_bytes: int | None = None) -> None:
+        settings = get_settings()
+        self.max_bytes = max(0, int(max_bytes if max_bytes is not None else settings.payload_cache_max_bytes))
+        self._entries: OrderedDict[tuple[str, str], tuple[str, str, dict[str, Any]]] = OrderedDict()
+        self._digests: OrderedDict[tuple[str, int, int], str] = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def digest(self, path: Path) -> str:
+        stat = path.stat()
+        key = (path.resolve().as_posix(), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            digest = self._digests.get(key)
+            if digest is not None:
+                self._digests.move_to_end(key)
+                return digest
+        digest = file_sha256(path)
+        with self._lock:
+            self._digests[key] = digest
+            while len(self._digests) > DIGEST_MEMO_LIMIT:
+                self._digests.popitem(last=False)
+        return digest
+
+    def _lookup(self, key: tuple[str, str]) -> tuple[str, str, dict[str, Any]] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+            else:
+                self._misses += 1
+            return entry
+
+    def _store(self, key: tuple[str, str], entry: tuple[str, str, dict[str, Any]]) -> None:
+        size = len(entry[1])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted[1])
+                self._evictions += 1
+
+    def encoded(self, path: Path, *, mime_type: str | None = None, sha256: str = "") -> tuple[str, str]:
+        mime_type = mime_type or guess_image_mime(path)
+        if self.max_bytes <= 0:
+            return mime_type, base64.b64encode(path.read_bytes()).decode("utf-8")
+        key = (sha256 or self.digest(path), mime_type)
+        entry = self._lookup(key)
+        if entry is None:
+            entry = (mime_type, base64.b64encode(path.read_bytes()).decode("utf-8"), {})
+            self._store(key, entry)
+        return entry[0], entry[1]
+
+    def _vision_entry(self, path: Path, *, max_edge: int, quality: int) -> tuple[str, str, dict[str, Any]]:
+        source_bytes = path.stat().st_size
+        derived, width, height = downscale_image_for_vision(path, max_edge=max_edge, quality=quality)
+        if len(derived) >= source_bytes:
+            mime_type, payload = guess_image_mime(path), base64.b64encode(path.read_bytes()).decode("utf-8")
+            sent_bytes, downscaled = source_bytes, False
+        else:
+            mime_type, payload = "image/jpeg", base64.b64encode(derived).decode("utf-8")
+            sent_bytes, downscaled = len(derived), True
+        info: dict[str, Any] = {
+            "source_bytes": source_bytes,
+            "sent_bytes": sent_bytes,
+            "bytes_saved": source_bytes - sent_bytes,
+            "max_edge": max_edge,
+            "jpeg_quality": quality,
+            "downscaled": downscaled,
+        }
+        if downscaled:
+            info["width"], info["height"] = width, height
+        return mime_type, payload, info
+
+    def vision_payload(self, path: Path, *, max_edge: int, quality: int) -> tuple[str, str, dict[str, Any]]:
+        if max_edge <= 0:
+            mime_type, payload = self.encoded(path)
+            return mime_type, payload, {}
+        if self.max_bytes <= 0:
+            return self._vision_entry(path, max_edge=max_edge, quality=quality)
+        key = (self.digest(path), f"vision:{max_edge}:{quality}")
+        entry = self._lookup(key)
+        if entry is None:
+            entry = self._vision_entry(path, max_edge=max_edge, quality=quality)
+            self._store(key, entry)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._digests.clear()
+            self._bytes = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_default_cache: EncodedPayloadCache | None = None
+_default_lock = threading.Lock()
+
+
+def get_payload_cache() -> EncodedPayloadCache:
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = EncodedPayloadCache()
+        return _default_cache
@@ -2,15 +2,19 @@ from __future__ import annotations
 
 import json
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from time import perf_counter, sleep
+from time import perf_counter
 from typing import Any
 
 from sqlalchemy import desc, select
 from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
 from app.models import Asset, Entry, Prompt, Run, StageResult
+from app.services.adaptive_concurrency import get_concurrency_controller
 from app.services.google_image_client import GoogleImageClient
 from app.services.model_catalog import is_google_image_generation_model
 from app.services.openai_client import AssistantRunFailedError, OpenAIClient
@@ -26,13 +30,13 @@ from app.services.prompt_templates import (
 from app.services.replicate_client import ReplicateClient
 from app.services.repository import Repository
 from app.services.storage import (
-    image_dimensions,
+    InlineImage,
+    ingest_run_image,
+    is_remote_path,
     materialize_path,
-    normalize_saved_image,
-    persist_run_image,
-    sha256_bytes,
     write_metadata,
 )
+from app.services.storage_uploader import enqueue_asset_upload, get_storage_uploader
 from app.services.utils import sanitize_filename
 
 logger = logging.getLogger(__name__)
@@ -46,6 +50,29 @@ class RunCanceledError(RuntimeError):
         self.response_json = {}
 
 
+def run_sliding_window(
+    jobs: list[dict[str, Any]],
+    worker_count: int,
+    run_job: Callable[[dict[str, Any]], dict[str, Any]],
+    on_result: Callable[[dict[str, Any], int], None],
+) -> None:
+    executor = ThreadPoolExecutor(max_workers=max(1, worker_count))
+    queued_jobs = deque(jobs)
+    in_flight: set[Future[dict[str, Any]]] = set()
+    try:
+        while queued_jobs and len(in_flight) < worker_count:
+            in_flight.add(executor.submit(run_job, queued_jobs.popleft()))
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                in_flight.discard(future)
+                if queued_jobs:
+                    in_flight.add(executor.submit(run_job, queued_jobs.popleft()))
+                on_result(future.result(), len(in_flight))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
 class PipelineRunner:
     def __init__(
         self,
@@ -61,6 +88,7 @@ class PipelineRunner:
         self.replicate = replicate_client or ReplicateClient()
         self.google_images = google_image_client or GoogleImageClient()
         self._asset_storage_prefix: str | None = None
+        self.async_variants = False
 
     def _record_stage(
         self,
@@ -179,12 +207,15 @@ class PipelineRunner:
         }
         if compact_response:
             compact["response_json"] = compact_response
+        hedge = result.get("hedge")
+        if isinstance(hedge, dict) and hedge:
+            compact["hedge"] = hedge
         return compact
 
-    def _download_generated_image(self, url: str) -> bytes:
+    def _download_generated_image(self, url: str, *, run_id: str) -> tuple[Path, str] | InlineImage:
         if str(url or "").startswith("google-inline://"):
-            return self.google_images.download_image(url)
-        return self.replicate.download_image(url)
+            return self.google_images.take_inline_image(url)
+        return self.replicate.download_image_to_file(url, run_id)
 
     def _latest_prompt(self, run_id: str, stage_name: str) -> Prompt | None:
         return self.db.execute(
@@ -220,34 +251,44 @@ class PipelineRunner:
         stage_name: str,
         attempt: int,
         filename: str,
-        image_bytes: bytes,
+        image_file: tuple[Path, str] | InlineImage,
         origin_url: str,
         model_name: str,
         output_mime_type: str | None = None,
     ) -> Asset:
         resolved_output_mime = output_mime_type or getattr(self.repo.get_runtime_config(), "image_format", "image/jpeg")
-        normalized_bytes, mime_type, suffix = normalize_saved_image(image_bytes, resolved_output_mime)
-        stored = persist_run_image(
-            run_id,
-            Path(sanitize_filename(filename)).with_suffix(suffix).name,
-            normalized_bytes,
-            mime_type=mime_type,
-            storage_prefix=self._asset_storage_prefix,
-        )
-        width, height = image_dimensions(stored.local_path)
-        return self.repo.add_asset(
+        source, source_sha256 = (image_file, "") if isinstance(image_file, InlineImage) else image_file
+        try:
+            ingested = ingest_run_image(
+                run_id,
+                sanitize_filename(filename),
+                source,
+                output_mime_type=resolved_output_mime,
+                source_sha256=source_sha256,
+                storage_prefix=self._asset_storage_prefix,
+                defer_upload=get_settings().storage_write_behind_enabled,
+            )
+        except Exception:
+            if isinstance(source, Path):
+                source.unlink(missing_ok=True)
+            raise
+        asset = self.repo.add_asset(
             run_id=run_id,
             stage_name=stage_name,
             attempt=attempt,
-            file_name=stored.local_path.name,
-            abs_path=stored.persisted_path,
-            mime_type=mime_type,
-            sha256=sha256_bytes(normalized_bytes),
-            width=width,
-            height=height,
+            file_name=ingested.stored.local_path.name,
+            abs_path=ingested.stored.persisted_path,
+            mime_type=ingested.mime_type,
+            sha256=ingested.sha256,
+            width=ingested.width,
+            height=ingested.height,
             origin_url=origin_url,
             model_name=model_name,
         )
+        if ingested.stored.bucket and not is_remote_path(ingested.stored.persisted_path):
+            enqueue_asset_upload(self.db, asset, ingested.stored, content_type=ingested.mime_type)
+            get_storage_uploader().wake()
+        return asset
 
     def _configure_generation_clients(
         self,
@@ -258,17 +299,7 @@ class PipelineRunner:
     ) -> dict[str, Any]:
         runtime_config = self.repo.get_runtime_config()
         resolved_retries = int(max_api_retries if max_api_retries is not None else runtime_config.max_api_retries)
-        resolved_workers = max(
-            1,
-            min(
-                int(
-                    variant_worker_limit
-                    if variant_worker_limit is not None
-                    else getattr(runtime_config, "max_variant_workers", 2)
-                ),
-                8,
-            ),
-        )
+        resolved_workers = self._variant_worker_limit(runtime_config, variant_worker_limit)
         resolved_safety = str(
             nano_banana_safety_level
             if nano_banana_safety_level is not None
@@ -367,6 +398,14 @@ class PipelineRunner:
             f"{profile.get('gender', 'person')}_{profile.get('age', 'age')}_{profile.get('skin_color', 'skin')}"
         )
 
+    def _variant_worker_limit(self, runtime_config: Any, requested: int | None = None) -> int:
+        if requested is not None:
+            return max(1, min(int(requested), 8))
+        configured = int(getattr(runtime_config, "max_variant_workers", 2))
+        if not getattr(runtime_config, "adaptive_concurrency_enabled", False):
+            return max(1, min(configured, 8))
+        return get_concurrency_controller().limit("variants", "google", initial=configured)
+
     def _variant_pool_size(self, variant_count: int, worker_limit: int) -> int:
         return max(1, min(variant_count, worker_limit))
 
@@ -771,14 +810,14 @@ class PipelineRunner:
                     response_json=result if isinstance(result, dict) else {},
                 )
 
-            image_bytes = self._download_generated_image(output_url)
+            image_file = self._download_generated_image(output_url, run_id=run.id)
             filename = f"stage2_draft_{self._entry_slug(entry)}.jpg"
             saved_asset = self._save_asset(
                 run_id=run.id,
                 stage_name="stage2_draft",
                 attempt=0,
                 filename=filename,
-                image_bytes=image_bytes,
+                image_file=image_file,
                 origin_url=output_url,
                 model_name="black-forest-labs/flux-schnell",
             )
@@ -927,18 +966,19 @@ class PipelineRunner:
         )
         return run
 
+    def _wait_for_google_prediction(self, prediction_id: str, created_status: str) -> tuple[dict[str, Any], list[str]]:
+        prediction_result = self.google_images.wait_prediction(prediction_id)
+        final_status = str(prediction_result.get("status") or "").lower()
+        return prediction_result, [final_status] if final_status and final_status != created_status else []
+
+    def _await_variant_prediction(self, prediction_id: str, created: dict[str, Any]) -> tuple[dict[str, Any], list[str]]:
+        last_status = str(created.get("status") or "").lower() or "processing"
+        if last_status in {"succeeded", "failed", "canceled"}:
+            return created, []
+        return self._wait_for_google_prediction(prediction_id, last_status)
+
     def _poll_prediction_result(self, prediction_id: str) -> tuple[dict[str, Any], list[str]]:
-        status_transitions: list[str] = []
-        prediction_result = self.google_images.get_prediction(prediction_id)
-        last_status = str(prediction_result.get("status") or "").lower() or "processing"
-        while last_status not in {"succeeded", "failed", "canceled"}:
-            sleep(1.0)
-            prediction_result = self.google_images.get_prediction(prediction_id)
-            current_status = str(prediction_result.get("status") or "").lower()
-            if current_status and current_status != last_status:
-                status_transitions.append(current_status)
-            last_status = current_status or last_status
-        return prediction_result, status_transitions
+        return self._wait_for_google_prediction(prediction_id, "processing")
 
     def create_profile_variant_pair(
         self,
@@ -981,6 +1021,7 @@ class PipelineRunner:
             prediction_result, status_transitions = self._poll_prediction_result(prediction_id)
             payload = self._materialize_profile_variant_payload(
                 prediction_result,
+                run_id=owner_run_id,
                 profile=profile,
                 profile_description=str(submitted.get("profile_description") or profile_prompt_fragment(profile)),
                 white_background=False,
@@ -990,7 +1031,7 @@ class PipelineRunner:
                 stage_name="stage4_variant_generate",
                 attempt=winner_attempt,
                 filename=self._variant_filename("stage4_variant_generate", entry, profile, winner_attempt),
-                image_bytes=payload["image_bytes"],
+                image_file=payload["image_file"],
                 origin_url=payload["origin_url"],
                 model_name=payload["model_name"],
                 output_mime_type=image_format,
@@ -1017,13 +1058,13 @@ class PipelineRunner:
                     request_json=self._json_dict(white_bg_result.get("request_json")),
                     response_json=self._json_dict(white_bg_result.get("response_json")) or white_bg_result,
                 )
-            white_bg_bytes = self._download_generated_image(white_bg_url)
+            white_bg_file = self._download_generated_image(white_bg_url, run_id=owner_run_id)
             white_bg_asset = self._save_asset(
                 run_id=owner_run_id,
                 stage_name="stage5_variant_white_bg",
                 attempt=winner_attempt,
                 filename=self._variant_filename("stage5_variant_white_bg", entry, profile, winner_attempt),
-                image_bytes=white_bg_bytes,
+                image_file=white_bg_file,
                 origin_url=white_bg_url,
                 model_name=str(white_bg_result.get("model") or "gemini-3.1-flash-image-preview"),
                 output_mime_type=image_format,
@@ -1261,7 +1302,7 @@ class PipelineRunner:
                 },
             )
         try:
-            image_bytes = self._download_generated_image(output_url)
+            image_file = self._download_generated_image(output_url, run_id=run.id)
         except Exception as exc:  # noqa: BLE001
             self._merge_error_context(
                 exc,
@@ -1279,7 +1320,7 @@ class PipelineRunner:
             stage_name="stage3_upgraded",
             attempt=attempt,
             filename=filename,
-            image_bytes=image_bytes,
+            image_file=image_file,
             origin_url=output_url,
             model_name=model_name,
         )
@@ -1392,7 +1433,7 @@ class PipelineRunner:
         runtime_config = self.repo.get_runtime_config()
         aspect_ratio = runtime_config.image_aspect_ratio
         image_size = runtime_config.image_resolution
-        variant_worker_limit = max(1, min(int(getattr(runtime_config, "max_variant_workers", 2)), 8))
+        variant_worker_limit = self._variant_worker_limit(runtime_config)
 
         stage_names = ("stage4_variant_generate", "stage5_variant_white_bg")
         variants_by_stage: dict[str, list[dict[str, Any]]] = {stage_name: [] for stage_name in stage_names}
@@ -1628,7 +1669,7 @@ class PipelineRunner:
                 )
             return existing
 
-        def run_variant_remote_step(
+        def submit_variant_step(
             *,
             stage_name: str,
             profile: dict[str, str],
@@ -1667,7 +1708,6 @@ class PipelineRunner:
             created = self._json_dict(submitted.get("created"))
             prediction_id = str(created.get("id") or "")
             prediction_status = str(created.get("status") or "").lower() or "processing"
-            status_transitions: list[str] = []
 
             if not prediction_id:
                 return {
@@ -1685,15 +1725,35 @@ class PipelineRunner:
                     "response_json": created,
                 }
 
-            prediction_result = created
-            last_status = prediction_status
-            while last_status not in {"succeeded", "failed", "canceled"}:
-                sleep(1.0)
-                prediction_result = self.google_images.get_prediction(prediction_id)
-                current_status = str(prediction_result.get("status") or "").lower()
-                if current_status and current_status != last_status:
-                    status_transitions.append(current_status)
-                last_status = current_status or last_status
+            return {
+                "pending": True,
+                "stage_name": stage_name,
+                "profile": profile,
+                "branch_role": branch_role,
+                "source_profile": source_profile,
+                "source_asset": source_asset,
+                "white_background": white_background,
+                "profile_description": profile_description,
+                "request_summary": request_summary,
+                "created": created,
+                "prediction_id": prediction_id,
+                "prediction_status": prediction_status,
+            }
+
+        def finish_variant_step(
+            step: dict[str, Any],
+            prediction_result: dict[str, Any],
+            status_transitions: list[str],
+        ) -> dict[str, Any]:
+            profile = step["profile"]
+            branch_role = step["branch_role"]
+            source_profile = step["source_profile"]
+            source_asset = step["source_asset"]
+            profile_description = step["profile_description"]
+            request_summary = step["request_summary"]
+            created = step["created"]
+            prediction_id = step["prediction_id"]
+            last_status = str(prediction_result.get("status") or "").lower() or step["prediction_status"]
 
             if last_status != "succeeded":
                 return {
@@ -1718,9 +1778,10 @@ class PipelineRunner:
             try:
                 payload = self._materialize_profile_variant_payload(
                     prediction_result,
+                    run_id=run.id,
                     profile=profile,
                     profile_description=profile_description,
-                    white_background=white_background,
+                    white_background=step["white_background"],
                 )
             except Exception as exc:  # noqa: BLE001
                 return {
@@ -1756,6 +1817,13 @@ class PipelineRunner:
                 "payload": payload,
             }
 
+        def run_variant_remote_step(**job: Any) -> dict[str, Any]:
+            step = submit_variant_step(**job)
+            if not step.get("pending"):
+                return step
+            prediction_result, status_transitions = self._await_variant_prediction(step["prediction_id"], step["created"])
+            return finish_variant_step(step, prediction_result, status_transitions)
+
         def consume_variant_result(stage_name: str, result: dict[str, Any]) -> Asset | None:
             profile = result["profile"]
             branch_role = str(result["branch_role"])
@@ -1860,7 +1928,7 @@ class PipelineRunner:
                 stage_name=stage_name,
                 attempt=winner_attempt,
                 filename=self._variant_filename(stage_name, entry, profile, winner_attempt),
-                image_bytes=payload["image_bytes"],
+                image_file=payload["image_file"],
                 origin_url=payload["origin_url"],
                 model_name=payload["model_name"],
             )
@@ -1942,40 +2010,61 @@ class PipelineRunner:
                 sync_variant_progress(stage_name)
                 return reused_assets
 
+            if self.async_variants:
+                created_assets = list(reused_assets)
+                steps: dict[str, dict[str, Any]] = {}
+                for job in pending_jobs:
+                    self._raise_if_stop_requested(run, stage_name)
+                    step = submit_variant_step(
+                        stage_name=stage_name,
+                        profile=job["profile"],
+                        branch_role=str(job["branch_role"]),
+                        source_profile=job.get("source_profile"),
+                        source_asset=job["source_asset"],
+                        white_background=white_background,
+                    )
+                    if step.get("pending"):
+                        steps[step["prediction_id"]] = step
+                        continue
+                    asset = consume_variant_result(stage_name, step)
+                    if asset is not None:
+                        created_assets.append(asset)
+                remaining = len(steps)
+                sync_variant_progress(stage_name, active_count=remaining)
+                for prediction_id, prediction_result in self.google_images.iter_completed_predictions(list(steps)):
+                    step = steps[prediction_id]
+                    final_status = str(prediction_result.get("status") or "").lower()
+                    status_transitions = [final_status] if final_status and final_status != step["prediction_status"] else []
+                    asset = consume_variant_result(stage_name, finish_variant_step(step, prediction_result, status_transitions))
+                    if asset is not None:
+                        created_assets.append(asset)
+                    remaining -= 1
+                    sync_variant_progress(stage_name, active_count=remaining)
+                    self._raise_if_stop_requested(run, stage_name)
+                return created_assets
+
             worker_count = self._variant_pool_size(len(pending_jobs), variant_worker_limit)
             sync_variant_progress(stage_name, active_count=min(len(pending_jobs), worker_count))
             created_assets = list(reused_assets)
-            executor = ThreadPoolExecutor(max_workers=worker_count)
-            try:
-                remaining_total = len(pending_jobs)
-                for offset in range(0, len(pending_jobs), worker_count):
-                    batch = pending_jobs[offset : offset + worker_count]
-                    future_map = {
-                        executor.submit(
-                            run_variant_remote_step,
-                            stage_name=stage_name,
-                            profile=job["profile"],
-                            branch_role=str(job["branch_role"]),
-                            source_profile=job.get("source_profile"),
-                            source_asset=job["source_asset"],
-                            white_background=white_background,
-                        ): job
-                        for job in batch
-                    }
-                    remaining = len(future_map)
-                    for future in as_completed(future_map):
-                        result = future.result()
-                        asset = consume_variant_result(stage_name, result)
-                        if asset is not None:
-                            created_assets.append(asset)
-                        remaining -= 1
-                        remaining_total -= 1
-                        sync_variant_progress(stage_name, active_count=min(remaining, worker_count))
-                        self._raise_if_stop_requested(run, stage_name)
-                    if remaining_total > 0:
-                        sync_variant_progress(stage_name, active_count=min(remaining_total, worker_count))
-            finally:
-                executor.shutdown(wait=False, cancel_futures=True)
+
+            def run_job(job: dict[str, Any]) -> dict[str, Any]:
+                return run_variant_remote_step(
+                    stage_name=stage_name,
+                    profile=job["profile"],
+                    branch_role=str(job["branch_role"]),
+                    source_profile=job.get("source_profile"),
+                    source_asset=job["source_asset"],
+                    white_background=white_background,
+                )
+
+            def on_result(result: dict[str, Any], active_count: int) -> None:
+                asset = consume_variant_result(stage_name, result)
+                if asset is not None:
+                    created_assets.append(asset)
+                sync_variant_progress(stage_name, active_count=active_count)
+                self._raise_if_stop_requested(run, stage_name)
+
+            run_sliding_window(pending_jobs, worker_count, run_job, on_result)
             return created_assets
 
         self._raise_if_stop_requested(run, "stage4_variant_generate")
@@ -2246,6 +2335,7 @@ class PipelineRunner:
         self,
         prediction_result: dict[str, Any],
         *,
+        run_id: str,
         profile: dict[str, str],
         profile_description: str,
         white_background: bool,
@@ -2266,11 +2356,11 @@ class PipelineRunner:
                 request_json=self._json_dict(prediction_result.get("request_json")),
                 response_json=prediction_result,
             )
-        image_bytes = self._download_generated_image(output_url)
+        image_file = self._download_generated_image(output_url, run_id=run_id)
         return {
             "profile_description": profile_description,
             "origin_url": output_url,
-            "image_bytes": image_bytes,
+            "image_file": image_file,
             "model_name": str(prediction_result.get("model") or "gemini-3.1-flash-image-preview"),
         }
 
@@ -2354,14 +2444,14 @@ class PipelineRunner:
                 response_json={"generation": result if isinstance(result, dict) else {}},
             )
 
-        image_bytes = self._download_generated_image(output_url)
+        image_file = self._download_generated_image(output_url, run_id=run.id)
         filename = f"stage4_white_bg_{self._entry_slug(entry)}_attempt_{winner_attempt}.jpg"
         self._save_asset(
             run_id=run.id,
             stage_name="stage4_white_bg",
             attempt=winner_attempt,
             filename=filename,
-            image_bytes=image_bytes,
+            image_file=image_file,
             origin_url=output_url,
             model_name="gemini-3.1-flash-image-preview",
         )
@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal
+from app.models import ReplicatePrediction, utcnow
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {"succeeded", "failed", "canceled"}
+MIN_POLL_INTERVAL_SECONDS = 1.0
+MAX_POLL_INTERVAL_SECONDS = 10.0
+POLL_BACKOFF = 1.5
+WEBHOOK_FALLBACK_INTERVAL_SECONDS = 30.0
+TICK_SECONDS = 0.25
+WEBHOOK_TIMESTAMP_TOLERANCE_SECONDS = 300
+WEBHOOK_RETENTION_SECONDS = 3600.0
+
+
+@dataclass
+class _TrackedPrediction:
+    prediction_id: str
+    fetch: Callable[[str], dict[str, Any]]
+    future: Future = field(default_factory=Future)
+    callbacks: list[Callable[[dict[str, Any]], None]] = field(default_factory=list)
+    interval: float = MIN_POLL_INTERVAL_SECONDS
+    next_poll_at: float = 0.0
+    deadline: float = 0.0
+    polling: bool = False
+    polls: int = 0
+
+
+class PredictionPoller:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] | None = None,
+        *,
+        batch_size: int | None = None,
+        timeout_seconds: float | None = None,
+    ) -> None:
+        settings = get_settings()
+        self.session_factory = session_factory
+        self.batch_size = max(1, int(batch_size if batch_size is not None else settings.replicate_poll_batch_size))
+        self.timeout_seconds = float(timeout_seconds if timeout_seconds is not None else settings.replicate_poll_timeout_seconds)
+        self._tracked: dict[str, _TrackedPrediction] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._executor = ThreadPoolExecutor(max_workers=self.batch_size, thread_name_prefix="aac-prediction-poll")
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="aac-prediction-poller", daemon=True)
+        self._thread.start()
+
+    def track(
+        self,
+        prediction_id: str,
+        fetch: Callable[[str], dict[str, Any]],
+        *,
+        on_done: Callable[[dict[str, Any]], None] | None = None,
+        webhook: bool = False,
+    ) -> Future:
+        now = time.monotonic()
+        with self._lock:
+            tracked = self._tracked.get(prediction_id)
+            if tracked is None:
+                tracked = _TrackedPrediction(
+                    prediction_id=prediction_id,
+                    fetch=fetch,
+                    next_poll_at=now + (WEBHOOK_FALLBACK_INTERVAL_SECONDS if webhook else MIN_POLL_INTERVAL_SECONDS),
+                    deadline=now + self.timeout_seconds,
+                )
+                self._tracked[prediction_id] = tracked
+            if on_done is not None:
+                tracked.callbacks.append(on_done)
+            self._ensure_started()
+        self._wake.set()
+        return tracked.future
+
+    def wait(self, prediction_id: str, fetch: Callable[[str], dict[str, Any]], *, webhook: bool = False) -> dict[str, Any]:
+        return self.track(prediction_id, fetch, webhook=webhook).result()
+
+    def resolve(self, prediction_id: str, payload: dict[str, Any]) -> bool:
+        status = str(payload.get("status") or "").lower()
+        if status not in TERMINAL_STATUSES and status != "timeout":
+            return False
+        with self._lock:
+            tracked = self._tracked.pop(prediction_id, None)
+        if tracked is None:
+            return False
+        if not tracked.future.done():
+            tracked.future.set_result(payload)
+        for callback in tracked.callbacks:
+            try:
+                callback(payload)
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("prediction callback failed", extra={"status": prediction_id, "error": str(exc)})
+        return True
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._tracked)
+
+    def _deliveries(self, prediction_ids: list[str]) -> dict[str, dict[str, Any]]:
+        if self.session_factory is None or not prediction_ids:
+            return {}
+        with self.session_factory() as db:
+            rows = db.execute(
+                select(ReplicatePrediction)
+                .where(ReplicatePrediction.id.in_(prediction_ids))
+                .where(ReplicatePrediction.status.in_(sorted(TERMINAL_STATUSES)))
+            ).scalars().all()
+            delivered = {row.id: json.loads(row.payload_json or "{}") for row in rows}
+            if delivered:
+                db.execute(delete(ReplicatePrediction).where(ReplicatePrediction.id.in_(list(delivered))))
+                db.commit()
+            return delivered
+
+    def _poll_one(self, tracked: _TrackedPrediction) -> None:
+        try:
+            payload = tracked.fetch(tracked.prediction_id)
+        except Exception as exc:  # noqa: BLE001
+            payload = {"status": "failed", "id": tracked.prediction_id, "error": str(exc)}
+        tracked.polls += 1
+        if self.resolve(tracked.prediction_id, payload):
+            return
+        with self._lock:
+            tracked.interval = min(MAX_POLL_INTERVAL_SECONDS, tracked.interval * POLL_BACKOFF)
+            tracked.next_poll_at = time.monotonic() + tracked.interval
+            tracked.polling = False
+        self._wake.set()
+
+    def _tick(self) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tracked_ids = list(self._tracked)
+        try:
+            delivered = self._deliveries(tracked_ids)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("prediction webhook lookup failed", extra={"status": "lookup_failed", "error": str(exc)})
+            delivered = {}
+        for prediction_id, payload in delivered.items():
+            self.resolve(prediction_id, payload)
+
+        with self._lock:
+            expired = [item for item in self._tracked.values() if not item.polling and item.deadline <= now]
+            due = sorted(
+                (item for item in self._tracked.values() if not item.polling and item.deadline > now and item.next_poll_at <= now),
+                key=lambda item: item.next_poll_at,
+            )
+            in_flight = sum(1 for item in self._tracked.values() if item.polling)
+            batch = due[: max(0, self.batch_size - in_flight)]
+            for item in batch:
+                item.polling = True
+            upcoming = [item.next_poll_at for item in self._tracked.values() if not item.polling]
+        for item in expired:
+            self.resolve(item.prediction_id, {"status": "timeout", "id": item.prediction_id})
+        for item in batch:
+            self._executor.submit(self._poll_one, item)
+        if not upcoming:
+            return 1.0
+        return max(0.0, min(upcoming) - time.monotonic())
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                delay = self._tick()
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("prediction poller tick failed", extra={"error": str(exc)})
+                delay = 1.0
+            self._wake.wait(max(TICK_SECONDS, min(delay, 1.0)) if self.session_factory is not None else max(0.01, delay))
+            self._wake.clear()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            pending = list(self._tracked)
+        for prediction_id in pending:
+            self.resolve(prediction_id, {"status": "canceled", "id": prediction_id, "error": "poller_closed"})
+
+
+def webhooks_enabled() -> bool:
+    settings = get_settings()
+    return bool(settings.replicate_webhook_url and settings.replicate_webhook_secret)
+
+
+def verify_webhook_signature(
+    secret: str,
+    headers: dict[str, str],
+    body: bytes,
+    *,
+    now: float | None = None,
+    tolerance_seconds: float = WEBHOOK_TIMESTAMP_TOLERANCE_SECONDS,
+) -> bool:
+    webhook_id = headers.get("webhook-id", "")
+    timestamp = headers.get("webhook-timestamp", "")
+    signatures = headers.get("webhook-signature", "")
+    if not (secret and webhook_id and timestamp and signatures):
+        return False
+    try:
+        sent_at = int(timestamp)
+        key = base64.b64decode(secret.split("_", 1)[-1])
+    except (ValueError, binascii.Error):
+        return False
+    if abs((time.time() if now is None else now) - sent_at) > tolerance_seconds:
+        return False
+    signed = f"{webhook_id}.{timestamp}.".encode("utf-8") + body
+    expected = base64.b64encode(hmac.new(key, signed, hashlib.sha256).digest()).decode("utf-8")
+    for candidate in signatures.split():
+        _, _, value = candidate.partition(",")
+        if value and hmac.compare_digest(value, expected):
+            return True
+    return False
+
+
+def record_webhook_prediction(db: Session, payload: dict[str, Any]) -> ReplicatePrediction | None:
+    prediction_id = str(payload.get("id") or "").strip()
+    if not prediction_id:
+        return None
+    row = db.get(ReplicatePrediction, prediction_id)
+    if row is None:
+        row = ReplicatePrediction(id=prediction_id)
+        db.add(row)
+    row.status = str(payload.get("status") or "").lower()
+    row.payload_json = json.dumps(payload)
+    row.received_at = utcnow()
+    prune_webhook_predictions(db)
+    db.commit()
+    return row
+
+
+def discard_webhook_prediction(db: Session, prediction_id: str) -> None:
+    db.execute(delete(ReplicatePrediction).where(ReplicatePrediction.id == prediction_id))
+    db.commit()
+
+
+def prune_webhook_predictions(db: Session, *, older_than_seconds: float | None = None) -> int:
+    retention = older_than_seconds
+    if retention is None:
+        retention = max(WEBHOOK_RETENTION_SECONDS, float(get_settings().replicate_poll_timeout_seconds))
+    cutoff = utcnow() - timedelta(seconds=retention)
+    result = db.execute(delete(ReplicatePrediction).where(ReplicatePrediction.received_at < cutoff))
+    return int(result.rowcount or 0)
+
+
+_default_poller: PredictionPoller | None = None
+_default_lock = threading.Lock()
+
+
+def get_prediction_poller() -> PredictionPoller:
+    global _default_poller
+    with _default_lock:
+        if _default_poller is None:
+            _default_poller = PredictionPoller(SessionLocal if webhooks_enabled() else None)
+        return _default_poller
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import requests
+
+from app.core.config import get_settings
+from app.services.http_pool import HttpPoolManager, get_http_pool
+from app.services.payload_cache import get_payload_cache, guess_image_mime
+from app.services.retry import call_with_retry
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_UPLOAD_URL = "https://generativelanguage.googleapis.com/upload/v1beta/files"
+
+
+class ProviderFileError(RuntimeError):
+    def __init__(self, message: str, *, request_json: dict[str, Any], response_json: dict[str, Any]) -> None:
+        super().__init__(message)
+        self.request_json = request_json
+        self.response_json = response_json
+
+
+@dataclass(frozen=True)
+class FileHandle:
+    uri: str
+    name: str
+    mime_type: str
+    size_bytes: int
+    expires_at: float
+
+    def part(self) -> dict[str, Any]:
+        return {"fileData": {"mimeType": self.mime_type, "fileUri": self.uri}}
+
+
+def _expiry_timestamp(value: Any, default_ttl: float) -> float:
+    text = str(value or "").strip()
+    if text:
+        try:
+            parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            return parsed.timestamp()
+        except ValueError:
+            pass
+    return time.time() + default_ttl
+
+
+class GoogleFileCache:
+    def __init__(
+        self,
+        *,
+        http_pool: HttpPoolManager | None = None,
+        enabled: bool | None = None,
+        ttl_seconds: float | None = None,
+        refresh_margin_seconds: float | None = None,
+        upload_url: str | None = None,
+    ) -> None:
+        self.settings = get_settings()
+        self.http = http_pool or get_http_pool()
+        self.payload_cache = get_payload_cache()
+        self.enabled = bool(self.settings.google_file_uploads_enabled if enabled is None else enabled)
+        self.ttl_seconds = float(ttl_seconds if ttl_seconds is not None else self.settings.google_file_ttl_seconds)
+        self.refresh_margin_seconds = float(
+            refresh_margin_seconds if refresh_margin_seconds is not None else self.settings.google_file_refresh_margin_seconds
+        )
+        self.upload_url = upload_url or GOOGLE_UPLOAD_URL
+        self._handles: dict[tuple[str, str], FileHandle] = {}
+        self._key_locks: dict[tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._uploads = 0
+        self._hits = 0
+        self._bytes_uploaded = 0
+        self._bytes_avoided = 0
+
+    def _fresh(self, handle: FileHandle | None) -> bool:
+        return handle is not None and handle.expires_at - self.refresh_margin_seconds > time.time()
+
+    def _upload(self, path: Path, *, mime_type: str) -> FileHandle:
+        data = path.read_bytes()
+        request_json = {"url": self.upload_url, "file": path.name, "mime_type": mime_type, "size_bytes": len(data)}
+
+        def _call() -> FileHandle:
+            try:
+                start = self.http.post(
+                    self.upload_url,
+                    params={"key": self.settings.google_api_key},
+                    headers={
+                        "X-Goog-Upload-Protocol": "resumable",
+                        "X-Goog-Upload-Command": "start",
+                        "X-Goog-Upload-Header-Content-Length": str(len(data)),
+                        "X-Goog-Upload-Header-Content-Type": mime_type,
+                        "Content-Type": "application/json",
+                    },
+                    json={"file": {"display_name": path.name}},
+                    timeout=60,
+                )
+                start.raise_for_status()
+                session_url = start.headers.get("X-Goog-Upload-URL") or ""
+                if not session_url:
+                    raise ProviderFileError("Google file upload did not return an upload URL", request_json=request_json, response_json={"status_code": start.status_code})
+                finish = self.http.post(
+                    session_url,
+                    headers={
+                        "Content-Length": str(len(data)),
+                        "X-Goog-Upload-Offset": "0",
+                        "X-Goog-Upload-Command": "upload, finalize",
+                    },
+                    data=data,
+                    timeout=120,
+                )
+                finish.raise_for_status()
+            except requests.HTTPError as exc:
+                response = exc.response
+                raise ProviderFileError(
+                    f"Google file upload HTTP {response.status_code if response is not None else 'error'}",
+                    request_json=request_json,
+                    response_json={
+                        "status_code": response.status_code if response is not None else None,
+                        "text": response.text[:4000] if response is not None else "",
+                    },
+                ) from exc
+            file_json = finish.json().get("file") or {}
+            if not file_json.get("uri"):
+                raise ProviderFileError("Google file upload returned no file URI", request_json=request_json, response_json=finish.json())
+            return FileHandle(
+                uri=str(file_json["uri"]),
+                name=str(file_json.get("name") or ""),
+                mime_type=str(file_json.get("mimeType") or mime_type),
+                size_bytes=len(data),
+                expires_at=_expiry_timestamp(file_json.get("expirationTime"), self.ttl_seconds),
+            )
+
+        return call_with_retry(_call, retries=self.settings.max_api_retries, provider="google", model="files")
+
+    def _prune(self, now: float) -> None:
+        expired = [key for key, handle in self._handles.items() if handle.expires_at <= now]
+        for key in expired:
+            del self._handles[key]
+            key_lock = self._key_locks.get(key)
+            if key_lock is not None and not key_lock.locked():
+                del self._key_locks[key]
+
+    def _cached(self, key: tuple[str, str]) -> FileHandle | None:
+        handle = self._handles.get(key)
+        if not self._fresh(handle):
+            return None
+        self._hits += 1
+        self._bytes_avoided += handle.size_bytes
+        return handle
+
+    def handle_for(self, path: Path, *, mime_type: str | None = None) -> FileHandle:
+        mime_type = mime_type or guess_image_mime(path)
+        key = (self.payload_cache.digest(path), mime_type)
+        with self._lock:
+            handle = self._cached(key)
+            if handle is not None:
+                return handle
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                handle = self._cached(key)
+                if handle is not None:
+                    return handle
+            started = time.monotonic()
+            handle = self._upload(path, mime_type=mime_type)
+            with self._lock:
+                self._prune(time.time())
+                self._handles[key] = handle
+                self._uploads += 1
+                self._bytes_uploaded += handle.size_bytes
+            logger.info(
+                "provider file uploaded",
+                extra={"provider": "google", "status": handle.name, "latency_ms": int((time.monotonic() - started) * 1000)},
+            )
+            return handle
+
+    def part_for(self, path: Path) -> dict[str, Any] | None:
+        if not self.enabled:
+            return None
+        try:
+            return self.handle_for(path).part()
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("provider file upload failed, sending inline", extra={"provider": "google", "error": str(exc)})
+            return None
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            self._prune(time.time())
+            return {
+                "enabled": self.enabled,
+                "handles": len(self._handles),
+                "uploads": self._uploads,
+                "hits": self._hits,
+                "bytes_uploaded": self._bytes_uploaded,
+                "bytes_avoided": self._bytes_avoided,
+            }
+
+
+_default_cache: GoogleFileCache | None = None
+_default_lock = threading.Lock()
+
+
+def get_google_file_cache() -> GoogleFileCache:
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = GoogleFileCache()
+        return _default_cache
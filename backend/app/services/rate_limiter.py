@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal
+from app.models import ProviderRateBucket
+
+logger = logging.getLogger(__name__)
+
+IMAGE_TOKEN_ESTIMATE = 1000
+INLINE_PAYLOAD_MIN_CHARS = 1024
+
+
+def estimate_request_tokens(payload: Any) -> int:
+    if isinstance(payload, dict):
+        return sum(estimate_request_tokens(value) for value in payload.values())
+    if isinstance(payload, list):
+        return sum(estimate_request_tokens(value) for value in payload)
+    if isinstance(payload, str):
+        if len(payload) >= INLINE_PAYLOAD_MIN_CHARS and " " not in payload[:INLINE_PAYLOAD_MIN_CHARS]:
+            return IMAGE_TOKEN_ESTIMATE
+        return max(1, len(payload) // 4)
+    return 0
+
+
+def _parse_limits(raw: str) -> dict[str, dict[str, float]]:
+    text = str(raw or "").strip()
+    if not text:
+        return {}
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError:
+        logger.warning("invalid PROVIDER_RATE_LIMITS ignored", extra={"status": "invalid_config"})
+        return {}
+    if not isinstance(parsed, dict):
+        return {}
+    limits: dict[str, dict[str, float]] = {}
+    for key, value in parsed.items():
+        if not isinstance(value, dict):
+            continue
+        rpm = float(value.get("rpm") or 0)
+        tpm = float(value.get("tpm") or 0)
+        if rpm > 0 or tpm > 0:
+            limits[str(key).strip().lower()] = {"rpm": max(0.0, rpm), "tpm": max(0.0, tpm)}
+    return limits
+
+
+class ProviderRateLimiter:
+    def __init__(self, session_factory: Callable[[], Session], *, limits_json: str | None = None) -> None:
+        self.session_factory = session_factory
+        self._limits_json = limits_json
+        self._parsed_source: str | None = None
+        self._limits: dict[str, dict[str, float]] = {}
+
+    def limits(self) -> dict[str, dict[str, float]]:
+        source = self._limits_json if self._limits_json is not None else get_settings().provider_rate_limits
+        if source != self._parsed_source:
+            self._limits = _parse_limits(source)
+            self._parsed_source = source
+        return self._limits
+
+    def _bucket_keys(self, provider: str, model: str) -> list[str]:
+        limits = self.limits()
+        provider_key = str(provider or "").strip().lower()
+        model_key = f"{provider_key}:{str(model or '').strip().lower()}" if model else ""
+        return [key for key in (provider_key, model_key) if key and key in limits]
+
+    def acquire(self, provider: str, model: str = "", *, tokens: int = 0) -> float:
+        keys = self._bucket_keys(provider, model)
+        if not keys:
+            return 0.0
+        wait_seconds = 0.0
+        with self.session_factory() as db:
+            for key in keys:
+                wait_seconds = max(wait_seconds, self._reserve(db, key, self.limits()[key], tokens=tokens))
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+            if wait_seconds >= 1.0:
+                logger.info(
+                    "rate limiter wait",
+                    extra={"provider": provider, "latency_ms": int(wait_seconds * 1000), "status": model or provider},
+                )
+        return wait_seconds
+
+    def _reserve(self, db: Session, key: str, limit: dict[str, float], *, tokens: int) -> float:
+        rpm = float(limit.get("rpm") or 0)
+        tpm = float(limit.get("tpm") or 0)
+        for _ in range(20):
+            bucket = db.execute(select(ProviderRateBucket).where(ProviderRateBucket.bucket_key == key)).scalar_one_or_none()
+            now = time.time()
+            if bucket is None:
+                db.add(
+                    ProviderRateBucket(
+                        bucket_key=key,
+                        request_tokens=rpm,
+                        token_tokens=tpm,
+                        refilled_at=now,
+                        version=0,
+                    )
+                )
+                try:
+                    db.commit()
+                except IntegrityError:
+                    db.rollback()
+                continue
+
+            elapsed = max(0.0, now - float(bucket.refilled_at or now))
+            request_tokens = min(rpm, float(bucket.request_tokens) + elapsed * rpm / 60.0) if rpm else 0.0
+            token_tokens = min(tpm, float(bucket.token_tokens) + elapsed * tpm / 60.0) if tpm else 0.0
+            wait_seconds = 0.0
+            if rpm:
+                request_tokens -= 1.0
+                if request_tokens < 0:
+                    wait_seconds = max(wait_seconds, -request_tokens * 60.0 / rpm)
+            if tpm and tokens:
+                token_tokens -= min(float(tokens), tpm)
+                if token_tokens < 0:
+                    wait_seconds = max(wait_seconds, -token_tokens * 60.0 / tpm)
+
+            updated = db.execute(
+                update(ProviderRateBucket)
+                .where(ProviderRateBucket.bucket_key == key)
+                .where(ProviderRateBucket.version == bucket.version)
+                .values(
+                    request_tokens=request_tokens,
+                    token_tokens=token_tokens,
+                    refilled_at=now,
+                    version=ProviderRateBucket.version + 1,
+                    acquired_count=ProviderRateBucket.acquired_count + 1,
+                    waited_count=ProviderRateBucket.waited_count + (1 if wait_seconds > 0 else 0),
+                    wait_seconds_total=ProviderRateBucket.wait_seconds_total + wait_seconds,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            db.expunge_all()
+            if updated.rowcount:
+                return wait_seconds
+        logger.warning("rate limiter contention, proceeding without reservation", extra={"provider": key, "status": "contended"})
+        return 0.0
+
+
+def rate_limit_snapshot(db: Session) -> list[dict[str, Any]]:
+    rows = db.execute(select(ProviderRateBucket).order_by(ProviderRateBucket.bucket_key.asc())).scalars()
+    return [
+        {
+            "bucket": row.bucket_key,
+            "acquired": int(row.acquired_count or 0),
+            "waited": int(row.waited_count or 0),
+            "wait_seconds_total": round(float(row.wait_seconds_total or 0.0), 3),
+        }
+        for row in rows
+    ]
+
+
+_default_limiter: ProviderRateLimiter | None = None
+_default_lock = threading.Lock()
+
+
+def get_rate_limiter() -> ProviderRateLimiter:
+    global _default_limiter
+    with _default_lock:
+        if _default_limiter is None:
+            _default_limiter = ProviderRateLimiter(SessionLocal)
+        return _default_limiter
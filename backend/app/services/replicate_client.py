@@ -2,15 +2,22 @@ from __future__ import annotations
 
 import base64
 import mimetypes
-import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from contextlib import closing
 from pathlib import Path
 from typing import Any
 
 import requests
 
 from app.core.config import get_settings
+from app.services.adaptive_concurrency import get_concurrency_controller
+from app.services.http_pool import HttpPoolManager, get_http_pool
 from app.services.model_catalog import normalize_stage3_generation_model
-from app.services.retry import with_backoff
+from app.services.prediction_poller import get_prediction_poller, webhooks_enabled
+from app.services.rate_limiter import get_rate_limiter
+from app.services.retry import call_with_retry
+from app.services.storage import DOWNLOAD_CHUNK_BYTES, stream_to_temp_file
 
 
 class ReplicateAPIError(RuntimeError):
@@ -21,10 +28,14 @@ class ReplicateAPIError(RuntimeError):
 
 
 class ReplicateClient:
-    def __init__(self) -> None:
+    def __init__(self, *, http_pool: HttpPoolManager | None = None) -> None:
         self.settings = get_settings()
+        self.http = http_pool or get_http_pool()
         if not self.settings.replicate_cf_base_url:
             raise RuntimeError("REPLICATE_CF_BASE_URL must be configured")
+        self.rate_limiter = get_rate_limiter()
+        self.concurrency = get_concurrency_controller()
+        self.poller = get_prediction_poller()
 
     def _headers(self, *, wait_seconds: int | None = 60) -> dict[str, str]:
         headers = {
@@ -44,14 +55,20 @@ class ReplicateClient:
         timeout: int = 180,
         wait_seconds: int | None = 60,
     ) -> dict[str, Any]:
+        model = url.split("/v1/models/", 1)[-1].rsplit("/predictions", 1)[0] if "/v1/models/" in url else ""
+
         def _call() -> dict[str, Any]:
+            self.rate_limiter.acquire("replicate", model)
             headers = self._headers(wait_seconds=wait_seconds)
-            response = requests.request(
-                method,
-                url,
-                headers=headers,
-                json=json_body,
-                timeout=timeout,
+            response = self.concurrency.observe(
+                "replicate",
+                lambda: self.http.request(
+                    method,
+                    url,
+                    headers=headers,
+                    json=json_body,
+                    timeout=timeout,
+                ),
             )
             try:
                 response.raise_for_status()
@@ -72,10 +89,11 @@ class ReplicateClient:
                 ) from exc
             return response.json()
 
-        return with_backoff(
+        return call_with_retry(
             _call,
             retries=self.settings.max_api_retries,
-            retryable=(requests.RequestException,),
+            provider="replicate",
+            model=model,
         )
 
     def _create_prediction(
@@ -87,21 +105,26 @@ class ReplicateClient:
         timeout: int = 180,
     ) -> dict[str, Any]:
         url = f"{self.settings.replicate_cf_base_url}/v1/models/{model_path}/predictions"
-        return self._request("POST", url, json_body={"input": payload_input}, wait_seconds=wait_seconds, timeout=timeout)
+        json_body: dict[str, Any] = {"input": payload_input}
+        if webhooks_enabled():
+            json_body["webhook"] = self.settings.replicate_webhook_url
+            json_body["webhook_events_filter"] = ["completed"]
+        return self._request("POST", url, json_body=json_body, wait_seconds=wait_seconds, timeout=timeout)
 
     def get_prediction(self, prediction_id: str) -> dict[str, Any]:
         url = f"{self.settings.replicate_cf_base_url}/v1/predictions/{prediction_id}"
         return self._request("GET", url, timeout=90, wait_seconds=None)
 
-    def _poll_prediction(self, prediction_id: str, max_tries: int = 90, interval: float = 2.0) -> dict[str, Any]:
-        url = f"{self.settings.replicate_cf_base_url}/v1/predictions/{prediction_id}"
-        for _ in range(max_tries):
-            data = self._request("GET", url, timeout=90, wait_seconds=None)
-            status = data.get("status")
-            if status in {"succeeded", "failed", "canceled"}:
-                return data
-            time.sleep(interval)
-        return {"status": "timeout", "id": prediction_id}
+    def track_prediction(self, prediction_id: str, *, on_done: Callable[[dict[str, Any]], None] | None = None) -> Future:
+        return self.poller.track(
+            prediction_id,
+            self.get_prediction,
+            on_done=on_done,
+            webhook=webhooks_enabled(),
+        )
+
+    def _poll_prediction(self, prediction_id: str) -> dict[str, Any]:
+        return self.track_prediction(prediction_id).result()
 
     @staticmethod
     def extract_output_url(pred_json: dict[str, Any]) -> str:
@@ -113,7 +136,7 @@ class ReplicateClient:
         return ""
 
     def _run_prediction(self, model_path: str, payload_input: dict[str, Any]) -> dict[str, Any]:
-        created = self._create_prediction(model_path, payload_input)
+        created = self._create_prediction(model_path, payload_input, wait_seconds=self.settings.replicate_prefer_wait_seconds or None)
         if created.get("status") in {"succeeded", "failed", "canceled"}:
             return created
         prediction_id = created.get("id")
@@ -338,21 +361,23 @@ class ReplicateClient:
             "output_format": "jpg",
         }
 
-    def download_image(self, url: str) -> bytes:
-        def _call() -> bytes:
-            response = requests.get(url, timeout=180)
-            try:
-                response.raise_for_status()
-            except requests.HTTPError as exc:
-                raise ReplicateAPIError(
-                    f"Replicate asset download HTTP {response.status_code}: {response.text[:1000]}",
-                    request_json={"method": "GET", "url": url, "timeout": 180},
-                    response_json={"status_code": response.status_code, "text": response.text[:4000]},
-                ) from exc
-            return response.content
+    def download_image_to_file(self, url: str, run_id: str) -> tuple[Path, str]:
+        def _call() -> tuple[Path, str]:
+            response = self.http.get(url, timeout=180, stream=True)
+            with closing(response):
+                try:
+                    response.raise_for_status()
+                except requests.HTTPError as exc:
+                    raise ReplicateAPIError(
+                        f"Replicate asset download HTTP {response.status_code}: {response.text[:1000]}",
+                        request_json={"method": "GET", "url": url, "timeout": 180},
+                        response_json={"status_code": response.status_code, "text": response.text[:4000]},
+                    ) from exc
+                return stream_to_temp_file(run_id, response.iter_content(DOWNLOAD_CHUNK_BYTES))
 
-        return with_backoff(
+        return call_with_retry(
             _call,
             retries=self.settings.max_api_retries,
-            retryable=(requests.RequestException,),
+            provider="replicate",
+            model="delivery",
         )
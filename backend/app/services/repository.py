@@ -2,18 +2,20 @@ from __future__ import annotations
 
 import json
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Any
 
-from sqlalchemy import Select, desc, func, select, update
+from sqlalchemy import and_, delete, desc, func, or_, select, update
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, defer
 
+from app.core.config import get_settings
 from app.models import (
     Asset,
     CsvJob,
     CsvJobItem,
     CsvTaskAttempt,
+    CsvTaskDependency,
     CsvTaskNode,
     Entry,
     Export,
@@ -48,12 +50,22 @@ from app.services.prompt_templates import (
     DEFAULT_VISUAL_STYLE_PROMPT_BLOCK,
 )
 from app.services.utils import deterministic_entry_id, source_row_hash
+from app.services.work_signals import publish_work_available
 
 MIN_QUALITY_THRESHOLD = 95
 MIN_PARALLEL_RUNS = 1
 MAX_PARALLEL_RUNS = 12
 MIN_VARIANT_WORKERS = 1
 MAX_VARIANT_WORKERS = 12
+IN_QUERY_CHUNK = 500
+RESUMABLE_RUN_STAGES = {"stage1_prompt", "stage2_draft", "stage3_upgrade", "stage4_background", "quality_gate"}
+
+
+def _before_cursor(stmt: Any, created_column: Any, id_column: Any, cursor: tuple[datetime, str] | None) -> Any:
+    if cursor is None:
+        return stmt
+    created_at, row_id = cursor
+    return stmt.where(or_(created_column < created_at, and_(created_column == created_at, id_column < row_id)))
 
 
 def _dumps(value: dict[str, Any] | list[Any]) -> str:
@@ -76,6 +88,14 @@ def _loads_list(value: str) -> list[Any]:
         return []
 
 
+def _resume_stage(current_stage: str) -> str:
+    if current_stage in RESUMABLE_RUN_STAGES:
+        return current_stage
+    if current_stage in {"", "queued", "running"}:
+        return "stage1_prompt"
+    return "stage3_upgrade"
+
+
 class Repository:
     def __init__(self, db: Session) -> None:
         self.db = db
@@ -215,8 +235,25 @@ class Repository:
         status: str | None = None,
         min_score: float | None = None,
         max_score: float | None = None,
+        limit: int | None = None,
+        after_word: str | None = None,
+        after_id: str | None = None,
+        deferred: tuple[str, ...] = (),
     ) -> list[tuple[Entry, Run | None]]:
-        stmt: Select[tuple[Entry]] = select(Entry)
+        ranked_runs = select(
+            Run.id.label("run_id"),
+            Run.entry_id.label("entry_id"),
+            func.row_number()
+            .over(partition_by=Run.entry_id, order_by=(Run.created_at.desc(), Run.id.desc()))
+            .label("run_rank"),
+        ).subquery()
+        latest_runs = select(ranked_runs.c.run_id, ranked_runs.c.entry_id).where(ranked_runs.c.run_rank == 1).subquery()
+
+        stmt = (
+            select(Entry, Run)
+            .outerjoin(latest_runs, latest_runs.c.entry_id == Entry.id)
+            .outerjoin(Run, Run.id == latest_runs.c.run_id)
+        )
         if word:
             stmt = stmt.where(Entry.word.ilike(f"%{word}%"))
         if part_of_sentence:
@@ -225,21 +262,22 @@ class Repository:
             stmt = stmt.where(Entry.category == category)
         if batch:
             stmt = stmt.where(Entry.batch == batch)
+        if status:
+            stmt = stmt.where(Run.status == status)
+        if min_score is not None:
+            stmt = stmt.where(Run.quality_score >= min_score)
+        if max_score is not None:
+            stmt = stmt.where(Run.quality_score <= max_score)
+        if after_word is not None:
+            if after_id:
+                stmt = stmt.where(or_(Entry.word > after_word, and_(Entry.word == after_word, Entry.id > after_id)))
+            else:
+                stmt = stmt.where(Entry.word > after_word)
 
-        entries = list(self.db.execute(stmt.order_by(Entry.word.asc())).scalars())
-        output: list[tuple[Entry, Run | None]] = []
-        for entry in entries:
-            latest_run = self.db.execute(
-                select(Run).where(Run.entry_id == entry.id).order_by(desc(Run.created_at)).limit(1)
-            ).scalar_one_or_none()
-            if status and (latest_run is None or latest_run.status != status):
-                continue
-            if min_score is not None and (latest_run is None or latest_run.quality_score is None or latest_run.quality_score < min_score):
-                continue
-            if max_score is not None and (latest_run is None or latest_run.quality_score is None or latest_run.quality_score > max_score):
-                continue
-            output.append((entry, latest_run))
-        return output
+        stmt = stmt.order_by(Entry.word.asc(), Entry.id.asc()).options(*(defer(getattr(Entry, name)) for name in deferred))
+        if limit is not None:
+            stmt = stmt.limit(max(1, int(limit)))
+        return [(entry, run) for entry, run in self.db.execute(stmt).all()]
 
     def create_runs(
         self,
@@ -265,20 +303,22 @@ class Repository:
         self.db.commit()
         for run in runs:
             self.db.refresh(run)
+        if runs:
+            publish_work_available(self.db, reason="runs_created")
         return runs
 
     def get_run(self, run_id: str) -> Run | None:
         return self.db.execute(select(Run).where(Run.id == run_id)).scalar_one_or_none()
 
-    def list_runs(
-        self,
+    @staticmethod
+    def _filter_runs(
+        stmt: Any,
         *,
         status: str | None = None,
         entry_id: str | None = None,
         min_score: float | None = None,
         max_score: float | None = None,
-    ) -> list[Run]:
-        stmt = select(Run)
+    ) -> Any:
         if status:
             stmt = stmt.where(Run.status == status)
         if entry_id:
@@ -287,10 +327,88 @@ class Repository:
             stmt = stmt.where(Run.quality_score >= min_score)
         if max_score is not None:
             stmt = stmt.where(Run.quality_score <= max_score)
-        stmt = stmt.where(Run.execution_mode == "legacy")
+        return stmt.where(Run.execution_mode == "legacy")
+
+    def list_runs(
+        self,
+        *,
+        status: str | None = None,
+        entry_id: str | None = None,
+        min_score: float | None = None,
+        max_score: float | None = None,
+    ) -> list[Run]:
+        stmt = self._filter_runs(select(Run), status=status, entry_id=entry_id, min_score=min_score, max_score=max_score)
         stmt = stmt.order_by(desc(Run.created_at))
         return list(self.db.execute(stmt).scalars())
 
+    def _rows_by_run(self, model: Any, run_ids: list[str]) -> dict[str, list[Any]]:
+        grouped: dict[str, list[Any]] = {run_id: [] for run_id in run_ids}
+        for offset in range(0, len(run_ids), IN_QUERY_CHUNK):
+            chunk = run_ids[offset : offset + IN_QUERY_CHUNK]
+            rows = self.db.execute(
+                select(model).where(model.run_id.in_(chunk)).order_by(model.created_at.asc())
+            ).scalars()
+            for row in rows:
+                grouped[row.run_id].append(row)
+        return grouped
+
+    def list_runs_with_details(
+        self,
+        *,
+        status: str | None = None,
+        entry_id: str | None = None,
+        min_score: float | None = None,
+        max_score: float | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+        cursor: tuple[datetime, str] | None = None,
+        include_costs: bool = True,
+        deferred: tuple[str, ...] = (),
+    ) -> list[tuple[Run, Entry | None, list[StageResult], list[Asset]]]:
+        stmt = self._filter_runs(
+            select(Run, Entry).outerjoin(Entry, Entry.id == Run.entry_id),
+            status=status,
+            entry_id=entry_id,
+            min_score=min_score,
+            max_score=max_score,
+        )
+        stmt = _before_cursor(stmt, Run.created_at, Run.id, cursor)
+        stmt = stmt.order_by(desc(Run.created_at), desc(Run.id)).options(
+            defer(Entry.context),
+            defer(Entry.person_gender_options_json),
+            defer(Entry.person_age_options_json),
+            defer(Entry.person_skin_color_options_json),
+            *(defer(getattr(Run, name)) for name in deferred),
+        )
+        if offset:
+            stmt = stmt.offset(max(0, int(offset)))
+        if limit is not None:
+            stmt = stmt.limit(max(1, int(limit)))
+        rows = list(self.db.execute(stmt).all())
+        if not include_costs:
+            return [(run, entry, [], []) for run, entry in rows]
+        run_ids = [run.id for run, _entry in rows]
+        stages_by_run = self._rows_by_run(StageResult, run_ids)
+        assets_by_run = self._rows_by_run(Asset, run_ids)
+        return [(run, entry, stages_by_run[run.id], assets_by_run[run.id]) for run, entry in rows]
+
+    def get_entries(self, entry_ids: list[str]) -> dict[str, Entry]:
+        ids = sorted({entry_id for entry_id in entry_ids if entry_id})
+        entries: dict[str, Entry] = {}
+        for offset in range(0, len(ids), IN_QUERY_CHUNK):
+            rows = self.db.execute(
+                select(Entry)
+                .where(Entry.id.in_(ids[offset : offset + IN_QUERY_CHUNK]))
+                .options(
+                    defer(Entry.context),
+                    defer(Entry.person_gender_options_json),
+                    defer(Entry.person_age_options_json),
+                    defer(Entry.person_skin_color_options_json),
+                )
+            ).scalars()
+            entries.update({entry.id: entry for entry in rows})
+        return entries
+
     def get_entry(self, entry_id: str) -> Entry | None:
         return self.db.execute(select(Entry).where(Entry.id == entry_id)).scalar_one_or_none()
 
@@ -298,20 +416,25 @@ class Repository:
         batch = str(batch_id or "").strip()
         if not batch:
             return None
-
-        rows = list(
-            self.db.execute(
-                select(Run, Entry)
+        return self.batch_job_summaries([batch]).get(batch)
+
+    def batch_job_summaries(self, batch_ids: list[str]) -> dict[str, dict[str, Any]]:
+        batches = sorted({str(batch_id or "").strip() for batch_id in batch_ids} - {""})
+        runs_by_batch: dict[str, list[Run]] = {}
+        for offset in range(0, len(batches), IN_QUERY_CHUNK):
+            rows = self.db.execute(
+                select(Run, Entry.batch)
                 .join(Entry, Entry.id == Run.entry_id)
-                .where(Entry.batch == batch)
+                .where(Entry.batch.in_(batches[offset : offset + IN_QUERY_CHUNK]))
                 .where(Run.execution_mode == "legacy")
                 .order_by(Run.created_at.asc())
             )
-        )
-        if not rows:
-            return None
+            for run, batch in rows:
+                runs_by_batch.setdefault(batch, []).append(run)
+        return {batch: self._summarize_batch_runs(batch, runs) for batch, runs in runs_by_batch.items()}
 
-        runs = [run for run, _entry in rows]
+    @staticmethod
+    def _summarize_batch_runs(batch: str, runs: list[Run]) -> dict[str, Any]:
         terminal_statuses = {"completed_pass", "completed_fail_threshold", "failed_technical", "canceled"}
         completed_statuses = {"completed_pass", "completed_fail_threshold"}
         passed_runs = [run for run in runs if run.status == "completed_pass"]
@@ -449,29 +572,43 @@ class Repository:
         return deleted_ids
 
     def claim_next_queued_run(self) -> Run | None:
-        candidate = self.db.execute(
-            select(Run)
+        claimed = self.claim_queued_runs(limit=1)
+        return claimed[0] if claimed else None
+
+    def _lease_expiry(self, lease_seconds: float | None) -> datetime:
+        seconds = get_settings().worker_lease_seconds if lease_seconds is None else lease_seconds
+        return datetime.utcnow() + timedelta(seconds=max(1.0, float(seconds)))
+
+    def claim_queued_runs(self, *, limit: int, worker_id: str = "", lease_seconds: float | None = None) -> list[Run]:
+        if limit <= 0:
+            return []
+        candidates = (
+            select(Run.id)
             .where(Run.execution_mode == "legacy")
             .where(Run.status.in_(["queued", "retry_queued"]))
             .order_by(Run.created_at.asc())
-            .limit(1)
-        ).scalar_one_or_none()
-        if candidate is None:
-            return None
-
-        updated = self.db.execute(
-            update(Run)
-            .where(Run.id == candidate.id)
-            .where(Run.execution_mode == "legacy")
-            .where(Run.status.in_(["queued", "retry_queued"]))
-            .values(status="running", current_stage=candidate.retry_from_stage or candidate.current_stage)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        claimed = list(
+            self.db.execute(
+                update(Run)
+                .where(Run.id.in_(candidates.scalar_subquery()))
+                .where(Run.status.in_(["queued", "retry_queued"]))
+                .values(
+                    status="running",
+                    current_stage=func.coalesce(func.nullif(Run.retry_from_stage, ""), Run.current_stage),
+                    claimed_by=worker_id,
+                    claimed_at=datetime.utcnow(),
+                    lease_expires_at=self._lease_expiry(lease_seconds),
+                )
+                .returning(Run)
+                .execution_options(synchronize_session=False, populate_existing=True)
+            ).scalars()
         )
-        if updated.rowcount == 0:
-            self.db.rollback()
-            return None
-
         self.db.commit()
-        return self.get_run(candidate.id)
+        claimed.sort(key=lambda run: run.created_at)
+        return [self._release_instance(run) for run in claimed]
 
     def request_stop_run(self, run: Run) -> Run:
         current_status = str(run.status or "").strip().lower()
@@ -801,8 +938,36 @@ class Repository:
     def get_csv_job_by_batch(self, batch_id: str) -> CsvJob | None:
         return self.db.execute(select(CsvJob).where(CsvJob.batch_id == batch_id)).scalar_one_or_none()
 
-    def list_csv_jobs(self) -> list[CsvJob]:
-        return list(self.db.execute(select(CsvJob).order_by(desc(CsvJob.created_at))).scalars())
+    def list_csv_jobs(
+        self,
+        *,
+        limit: int | None = None,
+        cursor: tuple[datetime, str] | None = None,
+        deferred: tuple[str, ...] = (),
+    ) -> list[CsvJob]:
+        stmt = _before_cursor(select(CsvJob), CsvJob.created_at, CsvJob.id, cursor)
+        stmt = stmt.order_by(desc(CsvJob.created_at), desc(CsvJob.id)).options(*(defer(getattr(CsvJob, name)) for name in deferred))
+        if limit is not None:
+            stmt = stmt.limit(max(1, int(limit)))
+        return list(self.db.execute(stmt).scalars())
+
+    @staticmethod
+    def csv_job_duration_seconds(job: CsvJob) -> float:
+        if not job.started_at:
+            return 0.0
+        duration_end = job.finished_at or datetime.utcnow()
+        return max(0.0, (duration_end - job.started_at).total_seconds())
+
+    def csv_job_row_counts(self, csv_job_ids: list[str]) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for offset in range(0, len(csv_job_ids), IN_QUERY_CHUNK):
+            rows = self.db.execute(
+                select(CsvJobItem.csv_job_id, func.count())
+                .where(CsvJobItem.csv_job_id.in_(csv_job_ids[offset : offset + IN_QUERY_CHUNK]))
+                .group_by(CsvJobItem.csv_job_id)
+            )
+            counts.update({job_id: int(count) for job_id, count in rows})
+        return counts
 
     def update_csv_job(self, job: CsvJob, **updates: Any) -> CsvJob:
         for key, value in updates.items():
@@ -866,6 +1031,7 @@ class Repository:
         dependency_task_ids: list[str],
         max_attempts: int = 2,
         status: str = "pending",
+        priority: int = 0,
     ) -> CsvTaskNode:
         node = CsvTaskNode(
             csv_job_id=csv_job_id,
@@ -879,10 +1045,13 @@ class Repository:
             dependency_task_ids_json=_dumps(dependency_task_ids),
             max_attempts=max(1, int(max_attempts)),
             status=status,
+            priority=int(priority),
         )
         self.db.add(node)
         self.db.commit()
         self.db.refresh(node)
+        if dependency_task_ids:
+            return self.set_csv_task_dependencies(node, dependency_task_ids)
         return self._release_instance(node)
 
     def list_csv_tasks(self, csv_job_id: str) -> list[CsvTaskNode]:
@@ -898,6 +1067,16 @@ class Repository:
         return self.db.execute(select(CsvTaskNode).where(CsvTaskNode.id == task_id)).scalar_one_or_none()
 
     def update_csv_task(self, task: CsvTaskNode, **updates: Any) -> CsvTaskNode:
+        if updates.get("status") == "completed":
+            transitioned = self.db.execute(
+                update(CsvTaskNode)
+                .where(CsvTaskNode.id == task.id)
+                .where(CsvTaskNode.status != "completed")
+                .values(status="completed")
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if transitioned:
+                self._release_csv_task_dependents(task.id)
         for key, value in updates.items():
             setattr(task, key, value)
         self.db.add(task)
@@ -905,6 +1084,39 @@ class Repository:
         self.db.refresh(task)
         return self._release_instance(task)
 
+    def _release_csv_task_dependents(self, task_id: str) -> None:
+        self.db.execute(
+            update(CsvTaskNode)
+            .where(
+                CsvTaskNode.id.in_(
+                    select(CsvTaskDependency.task_id).where(CsvTaskDependency.depends_on_task_id == task_id).scalar_subquery()
+                )
+            )
+            .where(CsvTaskNode.remaining_dependency_count > 0)
+            .values(remaining_dependency_count=CsvTaskNode.remaining_dependency_count - 1)
+            .execution_options(synchronize_session=False)
+        )
+
+    def set_csv_task_dependencies(self, task: CsvTaskNode, dependency_task_ids: list[str]) -> CsvTaskNode:
+        dependency_ids = list(dict.fromkeys(str(value) for value in dependency_task_ids if str(value)))
+        self.db.execute(delete(CsvTaskDependency).where(CsvTaskDependency.task_id == task.id))
+        for dependency_id in dependency_ids:
+            self.db.add(CsvTaskDependency(task_id=task.id, depends_on_task_id=dependency_id))
+        completed = 0
+        if dependency_ids:
+            completed = self.db.execute(
+                select(func.count())
+                .select_from(CsvTaskNode)
+                .where(CsvTaskNode.id.in_(dependency_ids))
+                .where(CsvTaskNode.status == "completed")
+            ).scalar_one()
+        task.dependency_task_ids_json = _dumps(dependency_ids)
+        task.remaining_dependency_count = len(dependency_ids) - int(completed)
+        self.db.add(task)
+        self.db.commit()
+        self.db.refresh(task)
+        return self._release_instance(task)
+
     def add_csv_task_attempt(
         self,
         *,
@@ -940,50 +1152,177 @@ class Repository:
         )
 
     def claim_next_ready_csv_task(self) -> CsvTaskNode | None:
-        queued = list(
+        claimed = self.claim_ready_csv_tasks(limit=1)
+        return claimed[0] if claimed else None
+
+    def claim_ready_csv_tasks(self, *, limit: int, worker_id: str = "", lease_seconds: float | None = None) -> list[CsvTaskNode]:
+        if limit <= 0:
+            return []
+        candidates = (
+            select(CsvTaskNode.id)
+            .join(CsvJob, CsvJob.id == CsvTaskNode.csv_job_id)
+            .where(CsvTaskNode.status == "queued")
+            .where(CsvTaskNode.remaining_dependency_count == 0)
+            .where(CsvJob.status.in_(["queued", "running", "retry_queued", "imported"]))
+            .order_by(CsvTaskNode.priority.asc(), CsvTaskNode.created_at.asc())
+            .limit(limit)
+            .with_for_update(skip_locked=True, of=CsvTaskNode)
+        )
+        now = datetime.utcnow()
+        claimed = list(
             self.db.execute(
-                select(CsvTaskNode)
-                .join(CsvJob, CsvJob.id == CsvTaskNode.csv_job_id)
+                update(CsvTaskNode)
+                .where(CsvTaskNode.id.in_(candidates.scalar_subquery()))
                 .where(CsvTaskNode.status == "queued")
-                .where(CsvJob.status.in_(["queued", "running", "retry_queued", "imported"]))
-                .order_by(CsvTaskNode.created_at.asc())
+                .values(status="running", started_at=now, claimed_by=worker_id, lease_expires_at=self._lease_expiry(lease_seconds))
+                .returning(CsvTaskNode)
+                .execution_options(synchronize_session=False, populate_existing=True)
             ).scalars()
         )
-        for task in queued:
-            dependency_ids = [str(value) for value in _loads_list(task.dependency_task_ids_json) if str(value)]
-            if dependency_ids:
-                statuses = {
-                    row.id: row.status
-                    for row in self.db.execute(
-                        select(CsvTaskNode.id, CsvTaskNode.status).where(CsvTaskNode.id.in_(dependency_ids))
-                    )
+        if not claimed:
+            self.db.commit()
+            return []
+        job_ids = {task.csv_job_id for task in claimed}
+        item_ids = {task.csv_job_item_id for task in claimed}
+        self.db.execute(
+            update(CsvJob)
+            .where(CsvJob.id.in_(job_ids))
+            .where(CsvJob.started_at.is_(None))
+            .values(status="running", started_at=now, error_detail="")
+            .execution_options(synchronize_session=False)
+        )
+        self.db.execute(
+            update(CsvJob)
+            .where(CsvJob.id.in_(job_ids))
+            .where(CsvJob.status.in_(["queued", "imported", "retry_queued"]))
+            .values(status="running", error_detail="")
+            .execution_options(synchronize_session=False)
+        )
+        self.db.execute(
+            update(CsvJobItem)
+            .where(CsvJobItem.id.in_(item_ids))
+            .where(CsvJobItem.status.in_(["pending", "queued"]))
+            .values(status="running", error_detail="")
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        claimed.sort(key=lambda task: (task.priority, task.created_at))
+        return [self._release_instance(task) for task in claimed]
+
+    def extend_leases(
+        self,
+        *,
+        worker_id: str,
+        run_ids: list[str],
+        task_ids: list[str],
+        lease_seconds: float | None = None,
+    ) -> int:
+        expires_at = self._lease_expiry(lease_seconds)
+        extended = 0
+        if run_ids:
+            extended += self.db.execute(
+                update(Run)
+                .where(Run.id.in_(run_ids))
+                .where(Run.claimed_by == worker_id)
+                .where(Run.status.in_(["running", "cancel_requested"]))
+                .values(lease_expires_at=expires_at, updated_at=Run.updated_at)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        if task_ids:
+            extended += self.db.execute(
+                update(CsvTaskNode)
+                .where(CsvTaskNode.id.in_(task_ids))
+                .where(CsvTaskNode.claimed_by == worker_id)
+                .where(CsvTaskNode.status == "running")
+                .values(lease_expires_at=expires_at, updated_at=CsvTaskNode.updated_at)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        self.db.commit()
+        return extended
+
+    def reap_expired_leases(self, *, max_reclaims: int | None = None) -> dict[str, list[str]]:
+        limit = get_settings().worker_max_reclaims if max_reclaims is None else max_reclaims
+        now = datetime.utcnow()
+        reaped: dict[str, list[str]] = {"requeued_runs": [], "failed_runs": [], "requeued_tasks": [], "failed_tasks": []}
+
+        expired_runs = list(
+            self.db.execute(
+                select(Run.id, Run.status, Run.current_stage, Run.reclaim_count, Run.claimed_by)
+                .where(Run.status.in_(["running", "cancel_requested"]))
+                .where(Run.lease_expires_at.is_not(None))
+                .where(Run.lease_expires_at < now)
+            )
+        )
+        for row in expired_runs:
+            detail = f"Worker {row.claimed_by or 'unknown'} stopped heartbeating during {row.current_stage}"
+            if row.status == "cancel_requested":
+                values: dict[str, Any] = {"status": "canceled", "current_stage": "canceled", "error_detail": "Stopped by user"}
+                bucket = "failed_runs"
+            elif int(row.reclaim_count or 0) >= limit:
+                values = {"status": "failed_technical", "error_detail": f"{detail}; reclaim limit {limit} reached"}
+                bucket = "failed_runs"
+            else:
+                values = {
+                    "status": "retry_queued",
+                    "retry_from_stage": _resume_stage(row.current_stage),
+                    "reclaim_count": Run.reclaim_count + 1,
+                    "error_detail": detail,
                 }
-                if any(statuses.get(dep_id) != "completed" for dep_id in dependency_ids):
-                    continue
+                bucket = "requeued_runs"
+            updated = self.db.execute(
+                update(Run)
+                .where(Run.id == row.id)
+                .where(Run.status == row.status)
+                .where(Run.lease_expires_at < now)
+                .values(claimed_by="", lease_expires_at=None, **values)
+                .execution_options(synchronize_session=False)
+            )
+            if updated.rowcount:
+                reaped[bucket].append(row.id)
 
+        expired_tasks = list(
+            self.db.execute(
+                select(CsvTaskNode.id, CsvTaskNode.csv_job_id, CsvTaskNode.csv_job_item_id, CsvTaskNode.reclaim_count, CsvTaskNode.claimed_by)
+                .where(CsvTaskNode.status == "running")
+                .where(CsvTaskNode.lease_expires_at.is_not(None))
+                .where(CsvTaskNode.lease_expires_at < now)
+            )
+        )
+        touched_jobs: set[str] = set()
+        for row in expired_tasks:
+            detail = f"Worker {row.claimed_by or 'unknown'} stopped heartbeating"
+            if int(row.reclaim_count or 0) >= limit:
+                values = {"status": "failed", "error_summary": f"{detail}; reclaim limit {limit} reached", "finished_at": now}
+                bucket = "failed_tasks"
+            else:
+                values = {"status": "queued", "error_summary": detail, "reclaim_count": CsvTaskNode.reclaim_count + 1, "started_at": None}
+                bucket = "requeued_tasks"
             updated = self.db.execute(
                 update(CsvTaskNode)
-                .where(CsvTaskNode.id == task.id)
-                .where(CsvTaskNode.status == "queued")
-                .values(status="running", started_at=datetime.utcnow())
+                .where(CsvTaskNode.id == row.id)
+                .where(CsvTaskNode.status == "running")
+                .where(CsvTaskNode.lease_expires_at < now)
+                .values(claimed_by="", lease_expires_at=None, **values)
+                .execution_options(synchronize_session=False)
             )
-            if updated.rowcount == 0:
-                self.db.rollback()
-                continue
-            self.db.commit()
-            claimed = self.get_csv_task(task.id)
-            if claimed is None:
+            if not updated.rowcount:
                 continue
-            job = self.get_csv_job(claimed.csv_job_id)
-            if job and job.started_at is None:
-                self.update_csv_job(job, status="running", started_at=datetime.utcnow(), error_detail="")
-            elif job and job.status in {"queued", "imported", "retry_queued"}:
-                self.update_csv_job(job, status="running", error_detail="")
-            item = self.get_csv_job_item(claimed.csv_job_item_id)
-            if item is not None and item.status in {"pending", "queued"}:
-                self.update_csv_job_item(item, status="running", error_detail="")
-            return claimed
-        return None
+            reaped[bucket].append(row.id)
+            touched_jobs.add(row.csv_job_id)
+            if bucket == "failed_tasks":
+                self.db.execute(
+                    update(CsvJobItem)
+                    .where(CsvJobItem.id == row.csv_job_item_id)
+                    .values(status="failed", error_detail=values["error_summary"])
+                    .execution_options(synchronize_session=False)
+                )
+
+        self.db.commit()
+        for job_id in touched_jobs:
+            self.finalize_csv_job_status(job_id)
+        if reaped["requeued_runs"] or reaped["requeued_tasks"]:
+            publish_work_available(self.db, reason="leases_reclaimed")
+        return reaped
 
     def retry_failed_csv_tasks(self, csv_job_id: str) -> int:
         tasks = list(
@@ -1005,6 +1344,7 @@ class Repository:
             job = self.get_csv_job(csv_job_id)
             if job is not None:
                 self.update_csv_job(job, status="retry_queued", error_detail="", finished_at=None)
+            publish_work_available(self.db, reason="csv_tasks_requeued")
         return count
 
     def cancel_csv_job(self, csv_job_id: str) -> int:
@@ -1041,6 +1381,11 @@ class Repository:
         jobs = list(self.db.execute(stmt).scalars())
         count = 0
         for job in jobs:
+            self.db.execute(
+                delete(CsvTaskDependency).where(
+                    CsvTaskDependency.task_id.in_(select(CsvTaskNode.id).where(CsvTaskNode.csv_job_id == job.id).scalar_subquery())
+                )
+            )
             self.db.delete(job)
             count += 1
         if count:
@@ -1138,11 +1483,7 @@ class Repository:
                     }
                 )
         total_rows = len(items)
-        started_at = job.started_at
-        duration_seconds = 0.0
-        if started_at:
-            duration_end = job.finished_at or datetime.utcnow()
-            duration_seconds = max(0.0, (duration_end - started_at).total_seconds())
+        duration_seconds = self.csv_job_duration_seconds(job)
         return {
             "job": job,
             "items": items,
@@ -1153,6 +1494,77 @@ class Repository:
             "duration_seconds": duration_seconds,
         }
 
+    def csv_job_overview_page(
+        self,
+        csv_job_id: str,
+        *,
+        limit: int | None = None,
+        after_row: tuple[int, str] | None = None,
+    ) -> dict[str, Any] | None:
+        job = self.get_csv_job(csv_job_id)
+        if job is None:
+            return None
+        stmt = select(CsvJobItem).where(CsvJobItem.csv_job_id == csv_job_id).options(defer(CsvJobItem.source_row_json))
+        if after_row is not None:
+            row_index, item_id = after_row
+            stmt = stmt.where(
+                or_(CsvJobItem.row_index > row_index, and_(CsvJobItem.row_index == row_index, CsvJobItem.id > item_id))
+            )
+        stmt = stmt.order_by(CsvJobItem.row_index.asc(), CsvJobItem.id.asc())
+        if limit is not None:
+            stmt = stmt.limit(max(1, int(limit)))
+        items = list(self.db.execute(stmt).scalars())
+        item_ids = [item.id for item in items]
+        tasks: list[CsvTaskNode] = []
+        for offset in range(0, len(item_ids), IN_QUERY_CHUNK):
+            tasks.extend(
+                self.db.execute(
+                    select(CsvTaskNode)
+                    .where(CsvTaskNode.csv_job_item_id.in_(item_ids[offset : offset + IN_QUERY_CHUNK]))
+                    .options(defer(CsvTaskNode.dependency_keys_json))
+                ).scalars()
+            )
+        tasks.sort(key=lambda task: (task.created_at, task.id))
+
+        step_counts: dict[str, dict[str, int]] = {}
+        item_task_counts: dict[str, dict[str, int]] = {}
+        for item_id, step_name, status, count in self.db.execute(
+            select(CsvTaskNode.csv_job_item_id, CsvTaskNode.step_name, CsvTaskNode.status, func.count())
+            .where(CsvTaskNode.csv_job_id == csv_job_id)
+            .group_by(CsvTaskNode.csv_job_item_id, CsvTaskNode.step_name, CsvTaskNode.status)
+        ):
+            bucket = step_counts.setdefault(step_name, {})
+            bucket[status] = bucket.get(status, 0) + int(count)
+            item_bucket = item_task_counts.setdefault(item_id, {})
+            item_bucket[status] = item_bucket.get(status, 0) + int(count)
+        issues_by_step: dict[str, list[dict[str, Any]]] = {}
+        for task_id, step_name, task_key, profile_key, error_summary in self.db.execute(
+            select(CsvTaskNode.id, CsvTaskNode.step_name, CsvTaskNode.task_key, CsvTaskNode.profile_key, CsvTaskNode.error_summary)
+            .where(CsvTaskNode.csv_job_id == csv_job_id)
+            .where(CsvTaskNode.status == "failed")
+            .order_by(CsvTaskNode.created_at.asc())
+        ):
+            issues_by_step.setdefault(step_name, []).append(
+                {"task_id": task_id, "task_key": task_key, "profile_key": profile_key, "error": error_summary}
+            )
+        item_shadow_runs = {
+            item_id: shadow_run_id
+            for item_id, shadow_run_id in self.db.execute(
+                select(CsvJobItem.id, CsvJobItem.shadow_run_id).where(CsvJobItem.csv_job_id == csv_job_id)
+            )
+        }
+        return {
+            "job": job,
+            "items": items,
+            "tasks": tasks,
+            "step_counts": step_counts,
+            "issues_by_step": issues_by_step,
+            "item_task_counts": item_task_counts,
+            "item_shadow_runs": item_shadow_runs,
+            "total_row_count": len(item_shadow_runs),
+            "duration_seconds": self.csv_job_duration_seconds(job),
+        }
+
     def create_export(self, filter_json: dict[str, Any]) -> Export:
         record = Export(filter_json=_dumps(filter_json), status="pending")
         self.db.add(record)
@@ -1160,8 +1572,18 @@ class Repository:
         self.db.refresh(record)
         return record
 
-    def list_exports(self) -> list[Export]:
-        return list(self.db.execute(select(Export).order_by(desc(Export.updated_at), desc(Export.created_at))).scalars())
+    def list_exports(
+        self,
+        *,
+        limit: int | None = None,
+        cursor: tuple[datetime, str] | None = None,
+        deferred: tuple[str, ...] = (),
+    ) -> list[Export]:
+        stmt = _before_cursor(select(Export), Export.updated_at, Export.id, cursor)
+        stmt = stmt.order_by(desc(Export.updated_at), desc(Export.id)).options(*(defer(getattr(Export, name)) for name in deferred))
+        if limit is not None:
+            stmt = stmt.limit(max(1, int(limit)))
+        return list(self.db.execute(stmt).scalars())
 
     def update_export(self, export: Export, **updates: Any) -> Export:
         for key, value in updates.items():
@@ -1217,6 +1639,7 @@ class Repository:
         self.db.add(run)
         self.db.commit()
         self.db.refresh(run)
+        publish_work_available(self.db, reason="run_retry_queued")
         return run
 
     def count_runs(self) -> int:
@@ -1,9 +1,22 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 import random
+import threading
 import time
-from collections.abc import Callable
-from typing import TypeVar
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, TypeVar
+
+import httpx
+import requests
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
 
 T = TypeVar("T")
 
@@ -32,3 +45,267 @@ def with_backoff(
     if last_error is not None:
         raise last_error
     raise RetryExceededError("retry exceeded without captured error")
+
+
+RETRYABLE = "retryable"
+THROTTLED = "throttled"
+FATAL = "fatal"
+RETRYABLE_STATUS_CODES = {408, 409, 425, 500, 502, 503, 504}
+
+
+class CircuitOpenError(RuntimeError):
+    def __init__(self, key: str, retry_in: float) -> None:
+        super().__init__(f"Circuit breaker open for {key}; retry in {retry_in:.1f}s")
+        self.key = key
+        self.retry_in = retry_in
+        self.request_json: dict[str, Any] = {"circuit_breaker": key}
+        self.response_json: dict[str, Any] = {"circuit_state": "open", "retry_in_seconds": round(retry_in, 3)}
+
+
+def _error_response(exc: BaseException) -> Any:
+    response = getattr(exc, "response", None)
+    if response is None and exc.__cause__ is not None:
+        response = getattr(exc.__cause__, "response", None)
+    return response
+
+
+def error_status_code(exc: BaseException) -> int | None:
+    response = _error_response(exc)
+    if response is not None and getattr(response, "status_code", None) is not None:
+        return int(response.status_code)
+    response_json = getattr(exc, "response_json", None)
+    if isinstance(response_json, dict) and str(response_json.get("status_code") or "").isdigit():
+        return int(response_json["status_code"])
+    return None
+
+
+def retry_after_seconds(exc: BaseException) -> float | None:
+    response = _error_response(exc)
+    headers = getattr(response, "headers", None) or {}
+    value = str(headers.get("Retry-After") or "").strip()
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def classify_error(exc: BaseException) -> str:
+    if isinstance(exc, CircuitOpenError):
+        return FATAL
+    status_code = error_status_code(exc)
+    if status_code is not None:
+        if status_code == 429:
+            return THROTTLED
+        if status_code in RETRYABLE_STATUS_CODES or status_code >= 500:
+            return RETRYABLE
+        return FATAL
+    if isinstance(
+        exc,
+        (
+            requests.ConnectionError,
+            requests.Timeout,
+            requests.exceptions.ChunkedEncodingError,
+            requests.exceptions.JSONDecodeError,
+            httpx.TransportError,
+        ),
+    ):
+        return RETRYABLE
+    return FATAL
+
+
+def decorrelated_jitter(previous: float, *, base_delay: float, max_delay: float) -> float:
+    return min(max_delay, random.uniform(base_delay, max(base_delay, previous * 3)))
+
+
+@dataclass
+class CircuitBreaker:
+    key: str
+    failure_threshold: int
+    reset_seconds: float
+    state: str = "closed"
+    consecutive_failures: int = 0
+    opened_at: float = 0.0
+    probing: bool = False
+    total_failures: int = 0
+    rejected: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def before_call(self) -> None:
+        with self.lock:
+            if self.state == "closed":
+                return
+            elapsed = time.monotonic() - self.opened_at
+            if self.state == "open" and elapsed >= self.reset_seconds:
+                self.state = "half_open"
+                self.probing = False
+            if self.state == "half_open" and not self.probing:
+                self.probing = True
+                return
+            self.rejected += 1
+            retry_in = max(0.0, self.reset_seconds - elapsed)
+        raise CircuitOpenError(self.key, retry_in)
+
+    def record_success(self) -> None:
+        with self.lock:
+            if self.state != "closed":
+                logger.info("circuit breaker closed", extra={"provider": self.key, "status": "closed"})
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self.probing = False
+
+    def release(self) -> None:
+        with self.lock:
+            self.probing = False
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.consecutive_failures += 1
+            self.total_failures += 1
+            self.probing = False
+            if self.state == "half_open" or (self.state == "closed" and self.consecutive_failures >= self.failure_threshold):
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                logger.warning(
+                    "circuit breaker opened",
+                    extra={"provider": self.key, "status": f"open after {self.consecutive_failures} failures"},
+                )
+
+    def snapshot(self) -> dict[str, Any]:
+        with self.lock:
+            retry_in = max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at)) if self.state == "open" else 0.0
+            return {
+                "key": self.key,
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "total_failures": self.total_failures,
+                "rejected": self.rejected,
+                "retry_in_seconds": round(retry_in, 3),
+            }
+
+
+class CircuitBreakerRegistry:
+    def __init__(self, *, failure_threshold: int | None = None, reset_seconds: float | None = None) -> None:
+        settings = get_settings()
+        self.failure_threshold = max(1, int(failure_threshold if failure_threshold is not None else settings.circuit_breaker_failure_threshold))
+        self.reset_seconds = max(0.0, float(reset_seconds if reset_seconds is not None else settings.circuit_breaker_reset_seconds))
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str, model: str = "") -> CircuitBreaker:
+        key = f"{provider}:{model}" if model else provider
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(key=key, failure_threshold=self.failure_threshold, reset_seconds=self.reset_seconds)
+                self._breakers[key] = breaker
+            return breaker
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        with self._lock:
+            breakers = sorted(self._breakers.values(), key=lambda item: item.key)
+        return [breaker.snapshot() for breaker in breakers]
+
+
+class _RetrySchedule:
+    def __init__(self, breaker: CircuitBreaker, *, retries: int, base_delay: float, max_delay: float | None) -> None:
+        settings = get_settings()
+        self.breaker = breaker
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = float(max_delay if max_delay is not None else settings.retry_max_delay_seconds)
+        self.max_retry_after = float(settings.retry_after_max_seconds)
+        self.delay = base_delay
+
+    def next_delay(self, exc: BaseException, attempt: int) -> float | None:
+        kind = classify_error(exc)
+        if kind == FATAL:
+            self.breaker.release()
+            return None
+        if kind == RETRYABLE:
+            self.breaker.record_failure()
+        else:
+            self.breaker.release()
+        if attempt >= self.retries:
+            return None
+        self.delay = decorrelated_jitter(self.delay, base_delay=self.base_delay, max_delay=self.max_delay)
+        retry_after = retry_after_seconds(exc)
+        if retry_after is not None:
+            return min(self.max_retry_after, max(self.delay, retry_after))
+        return self.delay
+
+
+def call_with_retry(
+    fn: Callable[[], T],
+    *,
+    retries: int,
+    provider: str,
+    model: str = "",
+    base_delay: float = 0.5,
+    max_delay: float | None = None,
+    breakers: CircuitBreakerRegistry | None = None,
+) -> T:
+    breaker = (breakers or get_circuit_breakers()).get(provider, model)
+    schedule = _RetrySchedule(breaker, retries=retries, base_delay=base_delay, max_delay=max_delay)
+    attempt = 0
+    while True:
+        breaker.before_call()
+        try:
+            result = fn()
+        except Exception as exc:
+            delay = schedule.next_delay(exc, attempt)
+            if delay is None:
+                raise
+            attempt += 1
+            time.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
+
+
+async def async_call_with_retry(
+    fn: Callable[[], Awaitable[T]],
+    *,
+    retries: int,
+    provider: str,
+    model: str = "",
+    base_delay: float = 0.5,
+    max_delay: float | None = None,
+    breakers: CircuitBreakerRegistry | None = None,
+) -> T:
+    breaker = (breakers or get_circuit_breakers()).get(provider, model)
+    schedule = _RetrySchedule(breaker, retries=retries, base_delay=base_delay, max_delay=max_delay)
+    attempt = 0
+    while True:
+        breaker.before_call()
+        try:
+            result = await fn()
+        except Exception as exc:
+            delay = schedule.next_delay(exc, attempt)
+            if delay is None:
+                raise
+            attempt += 1
+            await asyncio.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
+
+
+_default_breakers: CircuitBreakerRegistry | None = None
+_default_lock = threading.Lock()
+
+
+def get_circuit_breakers() -> CircuitBreakerRegistry:
+    global _default_breakers
+    with _default_lock:
+        if _default_breakers is None:
+            _default_breakers = CircuitBreakerRegistry()
+        return _default_breakers
@@ -1,22 +1,42 @@
 from __future__ import annotations
 
+import base64
 import hashlib
 import json
+import os
+import shutil
 import tempfile
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from io import BytesIO
 from pathlib import Path
-from urllib.parse import quote
+from typing import BinaryIO
+from urllib.parse import quote, urljoin
 
 import requests
 from PIL import Image
 
 from app.core.config import get_settings
+from app.services.http_pool import get_http_pool
+from app.services.retry import with_backoff
 from app.services.utils import sanitize_filename
 
 settings = get_settings()
 
 SUPABASE_URI_PREFIX = "supabase://"
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+RESUMABLE_CHUNK_BYTES = 6 * 1024 * 1024
+TUS_VERSION = "1.0.0"
+IMAGE_OUTPUT_FORMATS = {
+    "image/jpeg": ("JPEG", ".jpg"),
+    "image/png": ("PNG", ".png"),
+    "image/webp": ("WEBP", ".webp"),
+}
+
+
+class StorageTransientError(RuntimeError):
+    pass
 
 
 @dataclass
@@ -27,6 +47,35 @@ class StoredObject:
     object_key: str = ""
 
 
+@dataclass(frozen=True)
+class InlineImage:
+    data: bytes
+    mime_type: str
+    sha256: str
+
+
+@dataclass
+class IngestedImage:
+    stored: StoredObject
+    mime_type: str
+    sha256: str
+    width: int
+    height: int
+
+
+class _HashingWriter:
+    def __init__(self, handle: BinaryIO) -> None:
+        self.handle = handle
+        self.digest = hashlib.sha256()
+
+    def write(self, data: bytes) -> int:
+        self.digest.update(data)
+        return self.handle.write(data)
+
+    def flush(self) -> None:
+        self.handle.flush()
+
+
 def storage_backend() -> str:
     configured = str(getattr(settings, "storage_backend", "local") or "local").strip().lower()
     if configured == "supabase" and settings.supabase_url and settings.supabase_service_role_key:
@@ -66,8 +115,8 @@ def _parse_supabase_uri(uri: str) -> tuple[str, str]:
     return bucket, key
 
 
-def _upload_to_supabase(bucket: str, object_key: str, payload: bytes, *, content_type: str) -> str:
-    response = requests.post(
+def _upload_to_supabase(bucket: str, object_key: str, payload: bytes | BinaryIO, *, content_type: str) -> str:
+    response = get_http_pool().post(
         _supabase_upload_url(bucket, object_key),
         headers=_supabase_headers(content_type=content_type),
         data=payload,
@@ -78,9 +127,119 @@ def _upload_to_supabase(bucket: str, object_key: str, payload: bytes, *, content
     return f"{SUPABASE_URI_PREFIX}{bucket}/{object_key}"
 
 
+def _supabase_resumable_url() -> str:
+    base = str(settings.supabase_url or "").rstrip("/")
+    return f"{base}/storage/v1/upload/resumable"
+
+
+def _tus_headers(**extra: str) -> dict[str, str]:
+    headers = _supabase_headers()
+    headers.pop("Content-Type")
+    headers["Tus-Resumable"] = TUS_VERSION
+    headers.update(extra)
+    return headers
+
+
+def _check_upload_response(response: requests.Response, action: str, expected: set[int]) -> None:
+    if response.status_code in expected:
+        return
+    message = f"Supabase resumable {action} failed ({response.status_code}): {response.text[:400]}"
+    if response.status_code == 429 or response.status_code >= 500:
+        raise StorageTransientError(message)
+    raise RuntimeError(message)
+
+
+def _create_resumable_upload(bucket: str, object_key: str, size: int, *, content_type: str) -> str:
+    metadata = {"bucketName": bucket, "objectName": object_key, "contentType": content_type, "cacheControl": "3600"}
+    response = get_http_pool().post(
+        _supabase_resumable_url(),
+        headers=_tus_headers(
+            **{
+                "Upload-Length": str(size),
+                "Upload-Metadata": ",".join(f"{key} {base64.b64encode(value.encode('utf-8')).decode('ascii')}" for key, value in metadata.items()),
+            }
+        ),
+        timeout=60,
+    )
+    _check_upload_response(response, "create", {200, 201})
+    location = str(response.headers.get("Location") or "")
+    if not location:
+        raise RuntimeError("Supabase resumable create returned no upload location")
+    return urljoin(_supabase_resumable_url() + "/", location)
+
+
+def _resumable_offset(upload_url: str) -> int | None:
+    response = get_http_pool().request("HEAD", upload_url, headers=_tus_headers(), timeout=60)
+    if response.status_code in {404, 410}:
+        return None
+    _check_upload_response(response, "status", {200, 204})
+    return int(response.headers.get("Upload-Offset") or 0)
+
+
+def _resume_state_path(local_path: Path) -> Path:
+    return local_path.with_name(f".{local_path.name}.upload.json")
+
+
+def upload_file_resumable(bucket: str, object_key: str, local_path: Path, *, content_type: str) -> str:
+    stat = local_path.stat()
+    size = stat.st_size
+    fingerprint = {"object": f"{bucket}/{object_key}", "size": size, "mtime_ns": stat.st_mtime_ns}
+    state_path = _resume_state_path(local_path)
+    state: dict[str, object] = {}
+    if state_path.exists():
+        try:
+            state = json.loads(state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            state = {}
+    upload_url = str(state.get("url") or "") if all(state.get(key) == value for key, value in fingerprint.items()) else ""
+    known_offset: int | None = None
+
+    def _send_chunk() -> int:
+        nonlocal upload_url, known_offset
+        try:
+            if known_offset is None:
+                known_offset = _resumable_offset(upload_url) if upload_url else None
+                if known_offset is None:
+                    upload_url = _create_resumable_upload(bucket, object_key, size, content_type=content_type)
+                    state_path.write_text(json.dumps({**fingerprint, "url": upload_url}), encoding="utf-8")
+                    known_offset = 0
+            if known_offset >= size:
+                return known_offset
+            with local_path.open("rb") as handle:
+                handle.seek(known_offset)
+                chunk = handle.read(RESUMABLE_CHUNK_BYTES)
+            response = get_http_pool().request(
+                "PATCH",
+                upload_url,
+                headers=_tus_headers(**{"Upload-Offset": str(known_offset), "Content-Type": "application/offset+octet-stream"}),
+                data=chunk,
+                timeout=300,
+            )
+            _check_upload_response(response, "chunk", {204})
+            known_offset = int(response.headers.get("Upload-Offset") or known_offset + len(chunk))
+            return known_offset
+        except (requests.RequestException, StorageTransientError):
+            known_offset = None
+            raise
+
+    offset = 0
+    while offset < size:
+        previous_offset = offset
+        offset = with_backoff(
+            _send_chunk,
+            retries=settings.max_api_retries,
+            retryable=(requests.RequestException, StorageTransientError),
+        )
+        if offset <= previous_offset and offset < size:
+            state_path.unlink(missing_ok=True)
+            raise RuntimeError(f"Supabase resumable upload stalled at offset {offset} of {size} for {bucket}/{object_key}")
+    state_path.unlink(missing_ok=True)
+    return f"{SUPABASE_URI_PREFIX}{bucket}/{object_key}"
+
+
 def _download_from_supabase(uri: str) -> bytes:
     bucket, object_key = _parse_supabase_uri(uri)
-    response = requests.get(
+    response = get_http_pool().get(
         _supabase_download_url(bucket, object_key),
         headers=_supabase_headers(),
         timeout=120,
@@ -126,21 +285,32 @@ def write_image(run_id: str, filename: str, image_bytes: bytes) -> Path:
     return path
 
 
-def persist_run_image(
+def upload_file_to_supabase(bucket: str, object_key: str, local_path: Path, *, content_type: str) -> str:
+    with local_path.open("rb") as handle:
+        return _upload_to_supabase(bucket, object_key, handle, content_type=content_type)
+
+
+def _publish_run_image(
     run_id: str,
-    filename: str,
-    image_bytes: bytes,
+    local_path: Path,
     *,
     mime_type: str,
-    storage_prefix: str | None = None,
+    storage_prefix: str | None,
+    defer_upload: bool = False,
 ) -> StoredObject:
-    local_path = write_image(run_id, filename, image_bytes)
     if storage_backend() != "supabase":
         return StoredObject(local_path=local_path, persisted_path=local_path.as_posix())
 
     normalized_prefix = str(storage_prefix or f"runs/{sanitize_filename(run_id)}").strip().strip("/")
-    object_key = f"{normalized_prefix}/{sanitize_filename(filename)}"
-    persisted_path = _upload_to_supabase(settings.supabase_image_bucket, object_key, image_bytes, content_type=mime_type)
+    object_key = f"{normalized_prefix}/{local_path.name}"
+    if defer_upload:
+        return StoredObject(
+            local_path=local_path,
+            persisted_path=local_path.as_posix(),
+            bucket=settings.supabase_image_bucket,
+            object_key=object_key,
+        )
+    persisted_path = upload_file_to_supabase(settings.supabase_image_bucket, object_key, local_path, content_type=mime_type)
     return StoredObject(
         local_path=local_path,
         persisted_path=persisted_path,
@@ -149,16 +319,139 @@ def persist_run_image(
     )
 
 
-def persist_export_artifact(export_id: str, filename: str, payload: bytes, *, content_type: str = "application/octet-stream") -> StoredObject:
+def persist_run_image(
+    run_id: str,
+    filename: str,
+    image_bytes: bytes,
+    *,
+    mime_type: str,
+    storage_prefix: str | None = None,
+) -> StoredObject:
+    local_path = write_image(run_id, filename, image_bytes)
+    return _publish_run_image(run_id, local_path, mime_type=mime_type, storage_prefix=storage_prefix)
+
+
+def stream_to_temp_file(run_id: str, chunks: Iterable[bytes], *, suffix: str = ".img", prefix: str = "download_") -> tuple[Path, str]:
+    with tempfile.NamedTemporaryFile(
+        mode="wb",
+        prefix=prefix,
+        suffix=suffix,
+        dir=run_temp_dir(run_id),
+        delete=False,
+    ) as tmp:
+        writer = _HashingWriter(tmp)
+        try:
+            for chunk in chunks:
+                if chunk:
+                    writer.write(chunk)
+        except BaseException:
+            tmp.close()
+            Path(tmp.name).unlink(missing_ok=True)
+            raise
+        return Path(tmp.name), writer.digest.hexdigest()
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(DOWNLOAD_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _image_for_output(image: Image.Image, output_mime: str) -> Image.Image:
+    if output_mime != "image/jpeg":
+        return image
+    if image.mode in {"RGBA", "LA"} or (image.mode == "P" and "transparency" in image.info):
+        rgba_image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(rgba_image, mask=rgba_image.getchannel("A"))
+        return background
+    if image.mode != "RGB":
+        return image.convert("RGB")
+    return image
+
+
+def downscale_image_for_vision(path: Path, *, max_edge: int, quality: int) -> tuple[bytes, int, int]:
+    with Image.open(path) as img:
+        if img.format == "JPEG":
+            img.draft("RGB", (max_edge, max_edge))
+        image = img.copy()
+    image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+    image = _image_for_output(image, "image/jpeg")
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue(), image.width, image.height
+
+
+def ingest_run_image(
+    run_id: str,
+    filename: str,
+    source: Path | InlineImage,
+    *,
+    output_mime_type: str,
+    source_sha256: str = "",
+    storage_prefix: str | None = None,
+    defer_upload: bool = False,
+) -> IngestedImage:
+    output_mime = str(output_mime_type or "image/jpeg").strip().lower()
+    if output_mime not in IMAGE_OUTPUT_FORMATS:
+        output_mime = "image/jpeg"
+    format_name, suffix = IMAGE_OUTPUT_FORMATS[output_mime]
+    target = run_dir(run_id) / Path(sanitize_filename(filename)).with_suffix(suffix).name
+    inline = isinstance(source, InlineImage)
+    staged: Path | None = None
+    try:
+        with Image.open(BytesIO(source.data) if inline else source) as img:
+            width, height = img.size
+            passthrough = img.format == format_name and (output_mime != "image/jpeg" or img.mode == "RGB")
+            if passthrough and not inline:
+                staged = source
+                digest = source_sha256 or file_sha256(source)
+            else:
+                with tempfile.NamedTemporaryFile(
+                    mode="wb",
+                    prefix="ingest_",
+                    suffix=suffix,
+                    dir=run_temp_dir(run_id),
+                    delete=False,
+                ) as tmp:
+                    staged = Path(tmp.name)
+                    if passthrough:
+                        tmp.write(source.data)
+                        digest = source_sha256 or source.sha256 or sha256_bytes(source.data)
+                    else:
+                        image = _image_for_output(img, output_mime)
+                        save_kwargs: dict[str, object] = {"quality": 95} if output_mime == "image/jpeg" else {}
+                        writer = _HashingWriter(tmp)
+                        image.save(writer, format=format_name, **save_kwargs)
+                        digest = writer.digest.hexdigest()
+        os.replace(staged, target)
+    except BaseException:
+        if staged is not None and staged != source:
+            staged.unlink(missing_ok=True)
+        raise
+    finally:
+        if not inline and staged != source:
+            source.unlink(missing_ok=True)
+    stored = _publish_run_image(run_id, target, mime_type=output_mime, storage_prefix=storage_prefix, defer_upload=defer_upload)
+    return IngestedImage(stored=stored, mime_type=output_mime, sha256=digest, width=width, height=height)
+
+
+def _persist_export_file(export_id: str, source_path: Path, content_type: str) -> StoredObject:
     local_dir = exports_root() / sanitize_filename(export_id)
     local_dir.mkdir(parents=True, exist_ok=True)
-    local_path = local_dir / sanitize_filename(filename)
-    local_path.write_bytes(payload)
+    local_path = local_dir / sanitize_filename(source_path.name)
+    if source_path.resolve() != local_path.resolve():
+        shutil.copyfile(source_path, local_path)
     if storage_backend() != "supabase":
         return StoredObject(local_path=local_path, persisted_path=local_path.as_posix())
 
-    object_key = f"exports/{sanitize_filename(export_id)}/{sanitize_filename(filename)}"
-    persisted_path = _upload_to_supabase(settings.supabase_export_bucket, object_key, payload, content_type=content_type)
+    object_key = f"exports/{sanitize_filename(export_id)}/{local_path.name}"
+    if local_path.stat().st_size > RESUMABLE_CHUNK_BYTES:
+        persisted_path = upload_file_resumable(settings.supabase_export_bucket, object_key, local_path, content_type=content_type)
+    else:
+        persisted_path = upload_file_to_supabase(settings.supabase_export_bucket, object_key, local_path, content_type=content_type)
     return StoredObject(
         local_path=local_path,
         persisted_path=persisted_path,
@@ -167,6 +460,15 @@ def persist_export_artifact(export_id: str, filename: str, payload: bytes, *, co
     )
 
 
+def persist_export_artifacts(export_id: str, artifacts: list[tuple[Path, str]]) -> list[StoredObject]:
+    if not artifacts:
+        return []
+    workers = max(1, min(len(artifacts), int(settings.export_upload_workers)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="aac-export-upload") as executor:
+        futures = [executor.submit(_persist_export_file, export_id, path, content_type) for path, content_type in artifacts]
+        return [future.result() for future in futures]
+
+
 def export_artifact_uri(export_id: str, filename: str) -> str:
     normalized_id = sanitize_filename(export_id)
     normalized_name = sanitize_filename(filename)
@@ -193,18 +495,6 @@ def persist_csv_source(job_id: str, filename: str, payload: bytes) -> StoredObje
     )
 
 
-def write_temp_binary(run_id: str, *, suffix: str, payload: bytes, prefix: str = "google_inline_") -> Path:
-    with tempfile.NamedTemporaryFile(
-        mode="wb",
-        prefix=prefix,
-        suffix=suffix,
-        dir=run_temp_dir(run_id),
-        delete=False,
-    ) as tmp:
-        tmp.write(payload)
-        return Path(tmp.name)
-
-
 def write_metadata(run_id: str, attempt: int, payload: dict) -> Path:
     path = run_dir(run_id) / f"metadata_attempt_{attempt}.json"
     path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
@@ -237,37 +527,6 @@ def sha256_bytes(content: bytes) -> str:
     return hashlib.sha256(content).hexdigest()
 
 
-def normalize_saved_image(image_bytes: bytes, output_mime_type: str) -> tuple[bytes, str, str]:
-    output_mime = str(output_mime_type or "image/jpeg").strip().lower()
-    format_name = "JPEG"
-    suffix = ".jpg"
-    save_kwargs: dict[str, object] = {}
-    if output_mime == "image/png":
-        format_name = "PNG"
-        suffix = ".png"
-    elif output_mime == "image/webp":
-        format_name = "WEBP"
-        suffix = ".webp"
-    else:
-        output_mime = "image/jpeg"
-        save_kwargs["quality"] = 95
-
-    with Image.open(BytesIO(image_bytes)) as img:
-        image = img.copy()
-    if output_mime == "image/jpeg":
-        if image.mode in {"RGBA", "LA"} or (image.mode == "P" and "transparency" in image.info):
-            rgba_image = image.convert("RGBA")
-            background = Image.new("RGB", image.size, (255, 255, 255))
-            background.paste(rgba_image, mask=rgba_image.getchannel("A"))
-            image = background
-        elif image.mode != "RGB":
-            image = image.convert("RGB")
-
-    buffer = BytesIO()
-    image.save(buffer, format=format_name, **save_kwargs)
-    return buffer.getvalue(), output_mime, suffix
-
-
 def image_dimensions(path_or_uri: Path | str) -> tuple[int, int]:
     materialized = materialize_path(path_or_uri.as_posix() if isinstance(path_or_uri, Path) else path_or_uri)
     with Image.open(materialized) as img:
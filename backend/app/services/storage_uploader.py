@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import logging
+import socket
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal
+from app.models import Asset, StorageUpload, utcnow
+from app.services.storage import StoredObject, upload_file_to_supabase
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_SECONDS = 2.0
+RETRY_MAX_SECONDS = 300.0
+STALE_UPLOAD_SECONDS = 600.0
+IDLE_POLL_SECONDS = 5.0
+
+
+def enqueue_asset_upload(db: Session, asset: Asset, stored: StoredObject, *, content_type: str) -> StorageUpload:
+    row = StorageUpload(
+        asset_id=asset.id,
+        local_path=stored.local_path.as_posix(),
+        bucket=stored.bucket,
+        object_key=stored.object_key,
+        content_type=content_type,
+        host=socket.gethostname(),
+    )
+    db.add(row)
+    db.commit()
+    return row
+
+
+def upload_backlog(db: Session) -> dict[str, Any]:
+    rows = db.execute(
+        select(StorageUpload.status, func.count(), func.min(StorageUpload.created_at)).group_by(StorageUpload.status)
+    ).all()
+    counts = {status: count for status, count, _ in rows}
+    oldest = min((created_at for status, _, created_at in rows if status != "failed" and created_at is not None), default=None)
+    return {
+        "pending": int(counts.get("pending", 0)) + int(counts.get("uploading", 0)),
+        "failed": int(counts.get("failed", 0)),
+        "oldest_pending_seconds": int((utcnow() - oldest).total_seconds()) if oldest is not None else 0,
+    }
+
+
+class StorageUploader:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        *,
+        workers: int | None = None,
+        max_attempts: int | None = None,
+        host: str | None = None,
+    ) -> None:
+        settings = get_settings()
+        self.session_factory = session_factory
+        self.workers = max(1, int(workers if workers is not None else settings.storage_upload_workers))
+        self.max_attempts = max(1, int(max_attempts if max_attempts is not None else settings.storage_upload_max_attempts))
+        self.host = host or socket.gethostname()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="aac-storage-upload")
+        self._in_flight: set[str] = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> StorageUploader:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="aac-storage-uploader", daemon=True)
+                self._thread.start()
+        return self
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _claim(self, limit: int) -> list[StorageUpload]:
+        if limit <= 0:
+            return []
+        now = utcnow()
+        due = or_(
+            (StorageUpload.status == "pending") & (StorageUpload.next_attempt_at <= now),
+            (StorageUpload.status == "uploading") & (StorageUpload.updated_at <= now - timedelta(seconds=STALE_UPLOAD_SECONDS)),
+        )
+        with self.session_factory() as db:
+            candidates = (
+                select(StorageUpload.id)
+                .where(StorageUpload.host == self.host)
+                .where(due)
+                .order_by(StorageUpload.created_at.asc())
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            claimed = list(
+                db.execute(
+                    update(StorageUpload)
+                    .where(StorageUpload.id.in_(candidates.scalar_subquery()))
+                    .where(due)
+                    .values(status="uploading", updated_at=now)
+                    .returning(StorageUpload)
+                    .execution_options(synchronize_session=False)
+                ).scalars()
+            )
+            db.commit()
+            for row in claimed:
+                db.expunge(row)
+            return claimed
+
+    def _adopt_orphans(self, limit: int) -> int:
+        if limit <= 0:
+            return 0
+        cutoff = utcnow() - timedelta(seconds=STALE_UPLOAD_SECONDS)
+        orphaned = or_(
+            (StorageUpload.status == "pending") & (StorageUpload.next_attempt_at <= cutoff),
+            (StorageUpload.status == "uploading") & (StorageUpload.updated_at <= cutoff),
+        )
+        with self.session_factory() as db:
+            rows = db.execute(
+                select(StorageUpload.id, StorageUpload.local_path)
+                .where(StorageUpload.host != self.host)
+                .where(orphaned)
+                .order_by(StorageUpload.created_at.asc())
+            ).all()
+            adoptable = [upload_id for upload_id, local_path in rows if Path(local_path).exists()][:limit]
+            if not adoptable:
+                return 0
+            adopted = db.execute(
+                update(StorageUpload)
+                .where(StorageUpload.id.in_(adoptable))
+                .where(StorageUpload.host != self.host)
+                .where(orphaned)
+                .values(host=self.host, status="pending", next_attempt_at=utcnow())
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+        if adopted:
+            logger.info("storage uploads adopted", extra={"status": f"{adopted} from other hosts"})
+        return int(adopted or 0)
+
+    def _finish(self, upload_id: str, persisted_path: str) -> None:
+        with self.session_factory() as db:
+            row = db.get(StorageUpload, upload_id)
+            if row is None:
+                return
+            asset = db.get(Asset, row.asset_id)
+            if asset is not None and asset.abs_path == row.local_path:
+                asset.abs_path = persisted_path
+            db.delete(row)
+            db.commit()
+
+    def _fail(self, upload_id: str, error: str) -> None:
+        with self.session_factory() as db:
+            row = db.get(StorageUpload, upload_id)
+            if row is None:
+                return
+            row.attempts += 1
+            row.last_error = error[:2000]
+            if row.attempts >= self.max_attempts:
+                row.status = "failed"
+                logger.error("storage upload abandoned", extra={"status": f"{row.bucket}/{row.object_key}", "error": row.last_error})
+            else:
+                row.status = "pending"
+                delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * (2 ** (row.attempts - 1)))
+                row.next_attempt_at = utcnow() + timedelta(seconds=delay)
+                logger.warning(
+                    "storage upload failed, retrying",
+                    extra={"status": f"{row.bucket}/{row.object_key} attempt={row.attempts}", "latency_ms": int(delay * 1000), "error": row.last_error},
+                )
+            db.commit()
+
+    def _upload(self, row: StorageUpload) -> None:
+        try:
+            started = time.monotonic()
+            persisted_path = upload_file_to_supabase(row.bucket, row.object_key, Path(row.local_path), content_type=row.content_type)
+            self._finish(row.id, persisted_path)
+            logger.info(
+                "storage upload finished",
+                extra={"status": persisted_path, "latency_ms": int((time.monotonic() - started) * 1000)},
+            )
+        except Exception as exc:  # noqa: BLE001
+            self._fail(row.id, str(exc))
+        finally:
+            with self._lock:
+                self._in_flight.discard(row.id)
+            self._wake.set()
+
+    def _tick(self) -> None:
+        with self._lock:
+            free = self.workers - len(self._in_flight)
+        self._adopt_orphans(free)
+        for row in self._claim(free):
+            with self._lock:
+                self._in_flight.add(row.id)
+            self._executor.submit(self._upload, row)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._tick()
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("storage uploader tick failed", extra={"error": str(exc)})
+            self._wake.wait(IDLE_POLL_SECONDS)
+            self._wake.clear()
+
+    def backlog(self) -> int:
+        with self.session_factory() as db:
+            return int(
+                db.execute(
+                    select(func.count())
+                    .select_from(StorageUpload)
+                    .where(StorageUpload.host == self.host)
+                    .where(StorageUpload.status.in_(["pending", "uploading"]))
+                ).scalar_one()
+            )
+
+    def drain(self, timeout: float) -> bool:
+        deadline = time.monotonic() + max(0.0, timeout)
+        self.start()
+        while True:
+            with self._lock:
+                idle = not self._in_flight
+            if idle and self.backlog() == 0:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            self._wake.set()
+            time.sleep(0.05)
+
+    def close(self, *, drain_timeout: float = 0.0) -> None:
+        if drain_timeout > 0 and not self.drain(drain_timeout):
+            logger.warning("storage uploads still pending at shutdown", extra={"status": f"pending={self.backlog()}"})
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._executor.shutdown(wait=True)
+
+
+_default_uploader: StorageUploader | None = None
+_default_lock = threading.Lock()
+
+
+def get_storage_uploader() -> StorageUploader:
+    global _default_uploader
+    with _default_lock:
+        if _default_uploader is None:
+            _default_uploader = StorageUploader()
+        return _default_uploader
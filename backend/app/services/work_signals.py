@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import logging
+import os
+import select
+import socket
+import threading
+from pathlib import Path
+from uuid import uuid4
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+WORK_AVAILABLE_CHANNEL = "aac_work_available"
+
+_listeners: set[WorkSignalListener] = set()
+_listeners_lock = threading.Lock()
+
+
+def _signal_dir() -> Path:
+    return get_settings().runtime_data_root / "worker_signals"
+
+
+def _is_sqlite(url: str) -> bool:
+    return str(url).startswith("sqlite")
+
+
+def _wake_local_listeners() -> None:
+    with _listeners_lock:
+        listeners = list(_listeners)
+    for listener in listeners:
+        listener.wake()
+
+
+def _publish_socket(reason: str) -> None:
+    if not hasattr(socket, "AF_UNIX"):
+        return
+    directory = _signal_dir()
+    if not directory.exists():
+        return
+    payload = reason.encode("utf-8")[:256] or b"work"
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sender:
+        sender.setblocking(False)
+        for path in directory.glob("*.sock"):
+            try:
+                sender.sendto(payload, path.as_posix())
+            except (ConnectionRefusedError, FileNotFoundError):
+                path.unlink(missing_ok=True)
+            except (BlockingIOError, OSError):
+                continue
+
+
+def publish_work_available(db: Session, *, reason: str = "") -> None:
+    _wake_local_listeners()
+    try:
+        url = str(db.get_bind().url)
+        if _is_sqlite(url):
+            _publish_socket(reason)
+        else:
+            db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": WORK_AVAILABLE_CHANNEL, "payload": reason[:256]})
+            db.commit()
+    except Exception as exc:  # noqa: BLE001
+        db.rollback()
+        logger.warning("work signal publish failed", extra={"status": "signal_failed", "error": str(exc)})
+
+
+class WorkSignalListener:
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._wake_reader.setblocking(False)
+        self._wake_writer.setblocking(False)
+        self._socket: socket.socket | None = None
+        self._socket_path: Path | None = None
+        self._pg_connection = None
+
+    def start(self) -> WorkSignalListener:
+        with _listeners_lock:
+            _listeners.add(self)
+        try:
+            if _is_sqlite(str(self.engine.url)):
+                self._bind_socket()
+            else:
+                self._listen_postgres()
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("work signal listener unavailable, using polling only", extra={"status": "signal_unavailable", "error": str(exc)})
+            self._close_channel()
+        return self
+
+    def _bind_socket(self) -> None:
+        if not hasattr(socket, "AF_UNIX"):
+            return
+        directory = _signal_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{os.getpid()}_{uuid4().hex[:8]}.sock"
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        listener.setblocking(False)
+        listener.bind(path.as_posix())
+        self._socket = listener
+        self._socket_path = path
+
+    def _listen_postgres(self) -> None:
+        raw = self.engine.raw_connection()
+        connection = raw.driver_connection
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {WORK_AVAILABLE_CHANNEL}")
+        self._pg_connection = raw
+
+    def _channel_fd(self):
+        if self._socket is not None:
+            return self._socket
+        if self._pg_connection is not None:
+            return self._pg_connection.driver_connection
+        return None
+
+    def wake(self) -> None:
+        try:
+            self._wake_writer.send(b"1")
+        except (BlockingIOError, OSError):
+            pass
+
+    def _drain(self, readable) -> None:
+        if self._wake_reader in readable:
+            try:
+                while self._wake_reader.recv(4096):
+                    pass
+            except (BlockingIOError, OSError):
+                pass
+        if self._socket is not None and self._socket in readable:
+            try:
+                while self._socket.recv(512):
+                    pass
+            except (BlockingIOError, OSError):
+                pass
+        if self._pg_connection is not None and self._pg_connection.driver_connection in readable:
+            connection = self._pg_connection.driver_connection
+            try:
+                connection.poll()
+                connection.notifies.clear()
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("work signal listener lost its connection, using polling only", extra={"status": "signal_unavailable", "error": str(exc)})
+                self._close_channel()
+
+    def wait(self, timeout: float) -> bool:
+        watched = [self._wake_reader]
+        channel = self._channel_fd()
+        if channel is not None:
+            watched.append(channel)
+        readable, _, _ = select.select(watched, [], [], max(0.0, float(timeout)))
+        if not readable:
+            return False
+        self._drain(readable)
+        return True
+
+    def _close_channel(self) -> None:
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+        if self._socket_path is not None:
+            self._socket_path.unlink(missing_ok=True)
+            self._socket_path = None
+        if self._pg_connection is not None:
+            try:
+                self._pg_connection.close()
+            except Exception:  # noqa: BLE001
+                pass
+            self._pg_connection = None
+
+    def close(self) -> None:
+        with _listeners_lock:
+            _listeners.discard(self)
+        self._close_channel()
+        self._wake_reader.close()
+        self._wake_writer.close()
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import json
+from datetime import timedelta
+from typing import Any
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.db.sqlite_profile import get_sqlite_write_gate
+from app.models import WorkerHealthSnapshot, utcnow
+from app.services.hedging import get_hedging_policy
+from app.services.http_pool import get_http_pool
+from app.services.payload_cache import get_payload_cache
+from app.services.provider_files import get_google_file_cache
+from app.services.retry import get_circuit_breakers
+
+SNAPSHOT_RETENTION_SECONDS = 3600.0
+
+
+def worker_health_sections() -> dict[str, Any]:
+    return {
+        "http_pools": get_http_pool().snapshot(),
+        "circuit_breakers": get_circuit_breakers().snapshot(),
+        "hedging": get_hedging_policy().snapshot(),
+        "payload_cache": get_payload_cache().snapshot(),
+        "provider_files": get_google_file_cache().snapshot(),
+        "sqlite_writes": get_sqlite_write_gate().snapshot(),
+    }
+
+
+def persist_worker_health(db: Session, *, worker_id: str, sections: dict[str, Any] | None = None) -> None:
+    now = utcnow()
+    db.execute(
+        delete(WorkerHealthSnapshot).where(WorkerHealthSnapshot.updated_at < now - timedelta(seconds=SNAPSHOT_RETENTION_SECONDS))
+    )
+    for section, payload in (worker_health_sections() if sections is None else sections).items():
+        snapshot_key = f"{worker_id}:{section}"
+        existing = db.get(WorkerHealthSnapshot, snapshot_key)
+        if existing is None:
+            existing = WorkerHealthSnapshot(snapshot_key=snapshot_key)
+            db.add(existing)
+        existing.worker_id = worker_id
+        existing.section = section
+        existing.payload_json = json.dumps(payload, default=str)
+        existing.updated_at = now
+    db.commit()
+    db.expunge_all()
+
+
+def worker_health_snapshot(db: Session) -> dict[str, list[dict[str, Any]]]:
+    rows = db.execute(
+        select(WorkerHealthSnapshot).order_by(WorkerHealthSnapshot.section.asc(), WorkerHealthSnapshot.worker_id.asc())
+    ).scalars()
+    sections: dict[str, list[dict[str, Any]]] = {}
+    for row in rows:
+        sections.setdefault(row.section, []).append(
+            {"worker_id": row.worker_id, "updated_at": row.updated_at, "snapshot": json.loads(row.payload_json or "null")}
+        )
+    return sections
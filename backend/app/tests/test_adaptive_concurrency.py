@@ -0,0 +1,49 @@
+from app.services.adaptive_concurrency import AdaptiveConcurrencyController, concurrency_limits_snapshot, persist_concurrency_snapshot
+
+
+def test_limit_grows_additively_while_healthy() -> None:
+    controller = AdaptiveConcurrencyController(maximum=6, window=4)
+    assert controller.limit("variants", "google", initial=2) == 2
+    for _ in range(8):
+        controller.record("google", 1.0, 200)
+    assert controller.limit("variants", "google", initial=2) == 4
+    for _ in range(40):
+        controller.record("google", 1.0, 200)
+    assert controller.limit("variants", "google", initial=2) == 6
+
+
+def test_limit_halves_on_throttling_and_ignores_other_providers() -> None:
+    controller = AdaptiveConcurrencyController(maximum=16, window=4)
+    assert controller.limit("runs", ("openai", "google"), initial=8) == 8
+    controller.record("openai", 0.5, 200)
+    controller.record("google", 0.5, 429)
+    assert controller.limit("runs", ("openai", "google"), initial=8) == 4
+    controller.record("google", 0.5, 503)
+    assert controller.limit("runs", ("openai", "google"), initial=8) == 4
+    assert controller.limit("runs", "openai", initial=8) == 8
+
+
+def test_latency_regression_holds_the_limit() -> None:
+    controller = AdaptiveConcurrencyController(maximum=16, window=4)
+    controller.limit("variants", "google", initial=3)
+    for _ in range(4):
+        controller.record("google", 1.0, 200)
+    assert controller.limit("variants", "google", initial=3) == 4
+    for _ in range(4):
+        controller.record("google", 5.0, 200)
+    assert controller.limit("variants", "google", initial=3) == 4
+
+
+def test_snapshot_is_persisted_for_config_api(db_session) -> None:
+    controller = AdaptiveConcurrencyController(maximum=16, window=4)
+    controller.limit("variants", "google", initial=3)
+    controller.record("google", 0.25, 429)
+    persist_concurrency_snapshot(db_session, controller, worker_id="host:1")
+    other = AdaptiveConcurrencyController(maximum=16, window=4)
+    other.limit("variants", "google", initial=3)
+    persist_concurrency_snapshot(db_session, other, worker_id="host:2")
+    rows = concurrency_limits_snapshot(db_session)
+    assert [(row.scope, row.provider, row.current_limit, row.worker_id) for row in rows] == [
+        ("variants", "google", 1, "host:1"),
+        ("variants", "google", 3, "host:2"),
+    ]
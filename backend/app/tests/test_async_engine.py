@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import threading
+from io import BytesIO
+from pathlib import Path
+
+import httpx
+from PIL import Image
+
+from app.core.config import get_settings
+from app.services.async_engine import AsyncEngine
+from app.services.google_image_client import GoogleImageClient
+
+
+def _png_bytes() -> bytes:
+    image = Image.new("RGB", (8, 8), color=(0, 128, 255))
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_async_engine_keeps_many_google_predictions_in_flight(tmp_path: Path, monkeypatch) -> None:
+    settings = get_settings()
+    settings.runtime_data_root = tmp_path / "runtime_data"
+    settings.runtime_data_root.mkdir(parents=True, exist_ok=True)
+    monkeypatch.setattr(settings, "google_api_key", "test-key")
+    source = tmp_path / "source.png"
+    source.write_bytes(_png_bytes())
+    encoded = base64.b64encode(_png_bytes()).decode("utf-8")
+    in_flight = 0
+    peak = 0
+    release = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        if peak >= 40:
+            release.set()
+        await asyncio.wait_for(release.wait(), timeout=5)
+        in_flight -= 1
+        return httpx.Response(
+            200,
+            json={"candidates": [{"content": {"parts": [{"inlineData": {"mimeType": "image/png", "data": encoded}}]}}]},
+        )
+
+    engine = AsyncEngine(max_connections=64, blocking_workers=2, max_in_flight=64).start()
+    engine._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    client = GoogleImageClient()
+    client.use_async_engine(engine)
+    threads_before = threading.active_count()
+    try:
+        prediction_ids = [
+            client.submit_nano_banana_profile_variant(
+                source,
+                run_id="run_async",
+                word="jump",
+                profile_description=f"profile {index}",
+            )["id"]
+            for index in range(40)
+        ]
+        results = dict(client.iter_completed_predictions(prediction_ids))
+        assert threading.active_count() - threads_before <= 2
+    finally:
+        engine.close()
+        client.close()
+
+    assert peak == 40
+    assert sorted(results) == sorted(prediction_ids)
+    assert {result["status"] for result in results.values()} == {"succeeded"}
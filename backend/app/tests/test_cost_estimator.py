@@ -123,3 +123,19 @@ def test_summarize_run_costs_counts_saved_variant_assets_before_stage_summary_ex
         and row["unit_count"] == 1
         for row in summary["stage_costs"]
     )
+
+
+def test_vision_downscale_savings_are_reported_per_call() -> None:
+    entries = estimate_stage_costs(
+        "quality_gate",
+        {},
+        {
+            "raw": {
+                "provider": "openai",
+                "model": "gpt-4o-mini",
+                "hedge": {"hedged": True, "extra_calls": 1},
+                "vision_input": {"source_bytes": 5000, "sent_bytes": 1200},
+            }
+        },
+    )
+    assert (entries[0]["vision_source_bytes"], entries[0]["vision_sent_bytes"], entries[0]["vision_bytes_saved"]) == (10000, 2400, 7600)
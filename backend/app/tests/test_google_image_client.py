@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import base64
+import hashlib
 from io import BytesIO
 from pathlib import Path
 
@@ -26,7 +27,7 @@ class InlineResponseGoogleImageClient(GoogleImageClient):
         return self._response_json
 
 
-def test_google_generation_spills_inline_asset_to_temp_and_deletes_after_download(tmp_path: Path):
+def test_google_generation_keeps_inline_asset_in_memory_until_taken(tmp_path: Path):
     settings = get_settings()
     settings.runtime_data_root = tmp_path / "runtime_data"
     settings.runtime_data_root.mkdir(parents=True, exist_ok=True)
@@ -60,19 +61,17 @@ def test_google_generation_spills_inline_asset_to_temp_and_deletes_after_downloa
     )
 
     inline_url = result["output"][0]
-    stored = client._inline_assets[inline_url]
-    temp_path = Path(stored["path"])
-    assert temp_path.exists()
+    assert not (settings.runtime_data_root / "runs" / "run_test").exists()
 
-    image_bytes = client.download_image(inline_url)
+    image = client.take_inline_image(inline_url)
 
-    assert image_bytes == payload
-    assert not temp_path.exists()
+    assert image.data == payload
+    assert (image.mime_type, image.sha256) == ("image/png", hashlib.sha256(payload).hexdigest())
     assert inline_url not in client._inline_assets
     client.close()
 
 
-def test_google_client_close_removes_orphaned_temp_assets(tmp_path: Path):
+def test_google_client_close_drops_untaken_inline_assets(tmp_path: Path):
     settings = get_settings()
     settings.runtime_data_root = tmp_path / "runtime_data"
     settings.runtime_data_root.mkdir(parents=True, exist_ok=True)
@@ -106,10 +105,9 @@ def test_google_client_close_removes_orphaned_temp_assets(tmp_path: Path):
     )
 
     inline_url = result["output"][0]
-    temp_path = Path(client._inline_assets[inline_url]["path"])
-    assert temp_path.exists()
+    assert inline_url in client._inline_assets
 
     client.close()
 
-    assert not temp_path.exists()
     assert not client._inline_assets
+    assert not (settings.runtime_data_root / "runs" / "run_test_close").exists()
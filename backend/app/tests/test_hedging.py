@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from app.services.cost_estimator import estimate_stage_costs
+from app.services.hedging import HedgingPolicy
+
+
+def _warm(policy: HedgingPolicy, stage: str, samples: int) -> None:
+    for _ in range(samples):
+        policy.run(stage, lambda: "ok")
+
+
+def test_disabled_stage_calls_through_without_stats() -> None:
+    policy = HedgingPolicy(stages={"quality_gate"}, quantile=0.9, max_ratio=1.0, min_samples=2)
+    assert policy.run("stage3_generate", lambda: "direct") == ("direct", {})
+    assert policy.snapshot() == []
+
+
+def test_slow_primary_is_hedged_and_first_success_wins() -> None:
+    policy = HedgingPolicy(stages={"quality_gate"}, quantile=0.9, max_ratio=1.0, min_samples=3)
+    _warm(policy, "quality_gate", 3)
+    calls = {"count": 0}
+    lock = threading.Lock()
+
+    def tail_latency_call() -> str:
+        with lock:
+            calls["count"] += 1
+            call_number = calls["count"]
+        if call_number == 1:
+            time.sleep(1.0)
+            return "slow"
+        return "fast"
+
+    started = time.monotonic()
+    result, outcome = policy.run("quality_gate", tail_latency_call)
+    assert result == "fast"
+    assert time.monotonic() - started < 0.8
+    assert outcome["hedged"] is True
+    assert outcome["winner"] == "hedge"
+    assert outcome["extra_calls"] == 1
+    row = policy.snapshot()[0]
+    assert (row["calls"], row["hedged"], row["hedge_wins"]) == (4, 1, 1)
+
+
+def test_hedge_that_never_started_is_not_billed() -> None:
+    policy = HedgingPolicy(stages={"quality_gate"}, quantile=0.9, max_ratio=1.0, min_samples=3, max_workers=2)
+    _warm(policy, "quality_gate", 3)
+    release = threading.Event()
+    policy._executor.submit(release.wait)
+
+    def primary_that_fills_the_pool() -> str:
+        policy._executor.submit(release.wait)
+        time.sleep(0.2)
+        return "primary"
+
+    try:
+        result, outcome = policy.run("quality_gate", primary_that_fills_the_pool)
+    finally:
+        release.set()
+    assert result == "primary"
+    assert outcome["winner"] == "primary"
+    assert (outcome["hedged"], outcome["extra_calls"]) == (False, 0)
+    assert policy.snapshot()[0]["hedged"] == 0
+
+
+def test_queue_wait_is_not_counted_as_latency() -> None:
+    policy = HedgingPolicy(stages={"quality_gate"}, quantile=0.9, max_ratio=1.0, min_samples=1, max_workers=2)
+    for _ in range(2):
+        policy._executor.submit(time.sleep, 0.3)
+    assert policy.run("quality_gate", lambda: "ok")[0] == "ok"
+    assert policy.snapshot()[0]["threshold_ms"] < 100
+
+
+def test_hedge_ratio_caps_duplicate_requests() -> None:
+    policy = HedgingPolicy(stages={"stage3_generate"}, quantile=0.5, max_ratio=0.25, min_samples=2)
+    _warm(policy, "stage3_generate", 2)
+    outcomes = [policy.run("stage3_generate", lambda: time.sleep(0.05) or "ok")[1] for _ in range(4)]
+    assert sum(1 for outcome in outcomes if outcome["hedged"]) == 1
+
+
+def test_hedged_calls_add_extra_spend_to_cost_estimate() -> None:
+    entries = estimate_stage_costs(
+        "stage4_background",
+        {},
+        {"model": "gemini-3.1-flash-image-preview", "hedge": {"hedged": True, "extra_calls": 1}},
+    )
+    assert entries[0]["hedge_extra_calls"] == 1
+    assert entries[0]["estimated_cost_usd"] == round(entries[0]["hedge_extra_cost_usd"] * 2, 6)
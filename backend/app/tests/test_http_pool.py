@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.services.http_pool import HttpPoolManager
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args) -> None:
+        return
+
+
+def test_pool_reuses_connections_per_host_and_reports_metrics() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    pool = HttpPoolManager(pool_maxsize=4)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/ping"
+        for _ in range(10):
+            assert pool.get(url, timeout=5).json() == {"ok": True}
+        assert pool.session_for(url) is pool.session_for(f"{url}?again=1")
+        snapshot = pool.snapshot()
+    finally:
+        pool.close()
+        server.shutdown()
+        server.server_close()
+
+    assert len(snapshot) == 1
+    row = snapshot[0]
+    assert row["host"] == f"http://127.0.0.1:{server.server_address[1]}"
+    assert row["requests"] == 10
+    assert row["new_connections"] == 1
+    assert row["reuse_ratio"] == 0.9
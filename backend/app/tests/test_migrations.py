@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from pathlib import Path
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import Session
+
+from app.db.migrations import HOT_PATH_INDEXES, MIGRATIONS, current_version, run_migrations
+from app.models import Base
+from app.services.pipeline import PipelineRunner
+from app.services.repository import Repository
+
+
+def _legacy_engine(tmp_path: Path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}", future=True)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for name, _table, _columns in HOT_PATH_INDEXES:
+            conn.execute(text(f"DROP INDEX {name}"))
+    return engine
+
+
+def _index_names(engine) -> set[str]:
+    inspector = inspect(engine)
+    return {index["name"] for table in inspector.get_table_names() for index in inspector.get_indexes(table)}
+
+
+def test_run_migrations_applies_each_version_once(tmp_path: Path) -> None:
+    engine = _legacy_engine(tmp_path)
+    assert not {name for name, *_ in HOT_PATH_INDEXES} & _index_names(engine)
+
+    assert run_migrations(engine) == [migration.version for migration in MIGRATIONS]
+    assert {name for name, *_ in HOT_PATH_INDEXES} <= _index_names(engine)
+    assert run_migrations(engine) == []
+    with engine.connect() as conn:
+        assert current_version(conn) == MIGRATIONS[-1].version
+
+
+def test_hot_queries_do_not_scan_tables(tmp_path: Path) -> None:
+    engine = _legacy_engine(tmp_path)
+    run_migrations(engine)
+    with Session(engine, expire_on_commit=False) as db:
+        repo = Repository(db)
+        entry = repo.create_entry(
+            {
+                "word": "cup",
+                "part_of_sentence": "noun",
+                "category": "things",
+                "context": "",
+                "boy_or_girl": "",
+                "batch": "",
+            }
+        )
+        run = repo.create_runs([entry.id], quality_threshold=95, max_optimization_attempts=3)[0]
+
+        statements: list[tuple[str, object]] = []
+
+        def listener(_conn, _cursor, statement, parameters, *_args) -> None:
+            if statement.lstrip().upper().startswith(("SELECT", "UPDATE")):
+                statements.append((statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            runner = SimpleNamespace(db=db)
+            PipelineRunner._latest_prompt(runner, run.id, "stage1_prompt")
+            PipelineRunner._latest_asset(runner, run.id, "stage2_draft")
+            PipelineRunner._latest_stage_result(runner, run.id, "stage2_draft")
+            PipelineRunner._asset_for_attempt(runner, run.id, "stage3_upgraded", 1)
+            repo.add_stage_result(
+                run_id=run.id,
+                stage_name="stage2_draft",
+                attempt=0,
+                status="ok",
+                idempotency_key=f"{run.id}:stage2",
+                request_json={},
+                response_json={},
+            )
+            repo.retry_failed_csv_tasks("csvjob_missing")
+            repo.claim_queued_runs(limit=1, worker_id="test")
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert statements
+        with engine.connect() as conn:
+            for statement, parameters in statements:
+                plan = [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+                scans = [detail for detail in plan if detail.startswith("SCAN")]
+                assert not scans, f"{statement} -> {plan}"
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException, Response
+
+from app.api.pagination import (
+    NEXT_CURSOR_HEADER,
+    decode_cursor,
+    decode_time_cursor,
+    encode_cursor,
+    page_response,
+    parse_fields,
+    wants,
+)
+from app.schemas import RunOut
+
+
+def test_cursor_round_trips_sort_value_and_id() -> None:
+    created_at = datetime(2026, 3, 1, 12, 30, 5, 123456)
+    assert decode_time_cursor(encode_cursor(created_at, "run_1")) == (created_at, "run_1")
+    assert decode_cursor(encode_cursor("apple", "ent_1")) == ("apple", "ent_1")
+    assert decode_cursor(None) is None
+    assert decode_cursor("") is None
+
+
+def test_invalid_cursor_is_rejected() -> None:
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor")
+    assert exc.value.status_code == 400
+    with pytest.raises(HTTPException):
+        decode_time_cursor(encode_cursor("apple", "ent_1"))
+
+
+def test_parse_fields_validates_and_keeps_id() -> None:
+    assert parse_fields(None, RunOut) is None
+    assert parse_fields(" status, word ", RunOut) == {"id", "status", "word"}
+    with pytest.raises(HTTPException) as exc:
+        parse_fields("status,bogus", RunOut)
+    assert "bogus" in exc.value.detail
+    assert wants(None, "error_detail")
+    assert not wants({"id", "status"}, "error_detail")
+
+
+def test_page_response_projects_rows_and_sets_cursor_header() -> None:
+    row = RunOut(
+        id="run_1",
+        entry_id="ent_1",
+        status="completed_pass",
+        current_stage="completed",
+        quality_score=97,
+        quality_threshold=95,
+        optimization_attempt=0,
+        max_optimization_attempts=3,
+        technical_retry_count=0,
+        error_detail="boom",
+        created_at=datetime(2026, 3, 1),
+        updated_at=datetime(2026, 3, 1),
+    )
+    response = Response()
+    assert page_response([row], response=response, fields=None, next_cursor="abc") == [row]
+    assert response.headers[NEXT_CURSOR_HEADER] == "abc"
+
+    projected = page_response([row], response=Response(), fields={"id", "status"}, next_cursor="abc")
+    assert projected.body == b'[{"id":"run_1","status":"completed_pass"}]'
+    assert projected.headers[NEXT_CURSOR_HEADER] == "abc"
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import base64
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image
+
+from app.services.payload_cache import EncodedPayloadCache
+
+
+def test_repeated_encodes_hit_the_cache(tmp_path: Path) -> None:
+    image = tmp_path / "stage3.png"
+    image.write_bytes(b"png-bytes" * 10)
+    copy = tmp_path / "copy.png"
+    copy.write_bytes(image.read_bytes())
+    cache = EncodedPayloadCache(max_bytes=1024)
+
+    first = cache.encoded(image)
+    assert first == ("image/png", base64.b64encode(image.read_bytes()).decode("utf-8"))
+    assert cache.encoded(image) == first
+    assert cache.encoded(copy) == first
+    snapshot = cache.snapshot()
+    assert (snapshot["entries"], snapshot["hits"], snapshot["misses"]) == (1, 2, 1)
+
+
+def test_cache_evicts_least_recently_used_within_byte_budget(tmp_path: Path) -> None:
+    paths = []
+    for index in range(3):
+        path = tmp_path / f"img{index}.jpg"
+        path.write_bytes(bytes([index]) * 60)
+        paths.append(path)
+    cache = EncodedPayloadCache(max_bytes=200)
+
+    cache.encoded(paths[0])
+    cache.encoded(paths[1])
+    cache.encoded(paths[0])
+    cache.encoded(paths[2])
+    snapshot = cache.snapshot()
+    assert (snapshot["entries"], snapshot["evictions"]) == (2, 1)
+    assert snapshot["bytes"] <= 200
+
+    cache.encoded(paths[0])
+    assert cache.snapshot()["hits"] == 2
+
+
+def test_rewritten_file_is_not_served_stale(tmp_path: Path) -> None:
+    image = tmp_path / "variant.jpg"
+    image.write_bytes(b"first")
+    cache = EncodedPayloadCache(max_bytes=1024)
+    cache.encoded(image)
+    image.write_bytes(b"second-version")
+    assert cache.encoded(image)[1] == base64.b64encode(b"second-version").decode("utf-8")
+
+
+def test_vision_payload_downscales_large_images_once(tmp_path: Path) -> None:
+    source = tmp_path / "stage3.png"
+    Image.effect_noise((2048, 1536), 64).convert("RGB").save(source, format="PNG")
+    cache = EncodedPayloadCache(max_bytes=64 * 1024 * 1024)
+
+    mime_type, payload, info = cache.vision_payload(source, max_edge=512, quality=80)
+    assert mime_type == "image/jpeg"
+    with Image.open(BytesIO(base64.b64decode(payload))) as img:
+        assert img.size == (512, 384)
+    assert (info["width"], info["height"], info["downscaled"]) == (512, 384, True)
+    assert info["bytes_saved"] == source.stat().st_size - info["sent_bytes"] > 0
+
+    assert cache.vision_payload(source, max_edge=512, quality=80) == (mime_type, payload, info)
+    assert cache.snapshot()["hits"] == 1
+
+
+def test_vision_payload_keeps_small_originals(tmp_path: Path) -> None:
+    source = tmp_path / "tiny.png"
+    Image.new("RGB", (16, 16), color=(255, 255, 255)).save(source, format="PNG")
+    cache = EncodedPayloadCache(max_bytes=1024 * 1024)
+
+    mime_type, payload, info = cache.vision_payload(source, max_edge=512, quality=80)
+    assert (mime_type, base64.b64decode(payload)) == ("image/png", source.read_bytes())
+    assert (info["bytes_saved"], info["downscaled"]) == (0, False)
+    assert cache.vision_payload(source, max_edge=0, quality=80)[2] == {}
@@ -9,6 +9,7 @@ from PIL import Image
 from app.services.pipeline import PipelineRunner
 from app.services.openai_client import AssistantRunFailedError
 from app.services.repository import Repository
+from app.services.storage import InlineImage, sha256_bytes, stream_to_temp_file
 
 
 class MockOpenAI:
@@ -168,11 +169,11 @@ class MockReplicate:
             return out
         return ""
 
-    def download_image(self, url: str) -> bytes:
+    def download_image_to_file(self, url: str, run_id: str) -> tuple[Path, str]:
         img = Image.new("RGB", (16, 12), color=(255, 255, 255))
         buf = BytesIO()
         img.save(buf, format="JPEG")
-        return buf.getvalue()
+        return stream_to_temp_file(run_id, [buf.getvalue()])
 
 
 class VariantCapableReplicate(MockReplicate):
@@ -210,6 +211,12 @@ class VariantCapableReplicate(MockReplicate):
         }
         return {"id": prediction_id, "status": "processing"}
 
+    def wait_prediction(self, prediction_id: str, *, timeout: float | None = None) -> dict[str, object]:
+        prediction = self.get_prediction(prediction_id)
+        while prediction["status"] not in {"succeeded", "failed", "canceled"}:
+            prediction = self.get_prediction(prediction_id)
+        return prediction
+
     def get_prediction(self, prediction_id: str) -> dict[str, object]:
         state = self._variant_predictions[prediction_id]
         polls_remaining = int(state["polls_remaining"])
@@ -341,6 +348,12 @@ class MockGoogleImageClient:
         }
         return {"id": prediction_id, "status": "processing", "model": "gemini-3.1-flash-image-preview"}
 
+    def wait_prediction(self, prediction_id: str, *, timeout: float | None = None) -> dict[str, object]:
+        prediction = self.get_prediction(prediction_id)
+        while prediction["status"] not in {"succeeded", "failed", "canceled"}:
+            prediction = self.get_prediction(prediction_id)
+        return prediction
+
     def get_prediction(self, prediction_id: str) -> dict[str, object]:
         state = self._variant_predictions[prediction_id]
         polls_remaining = int(state["polls_remaining"])
@@ -356,8 +369,9 @@ class MockGoogleImageClient:
             "response_json": state["response_json"],
         }
 
-    def download_image(self, url: str) -> bytes:
-        return self._inline_assets.pop(url)
+    def take_inline_image(self, url: str) -> InlineImage:
+        data = self._inline_assets.pop(url)
+        return InlineImage(data=data, mime_type="image/jpeg", sha256=sha256_bytes(data))
 
     def close(self) -> None:
         self._inline_assets.clear()
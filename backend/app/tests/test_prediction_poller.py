@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, ReplicatePrediction, utcnow
+from app.services.prediction_poller import (
+    PredictionPoller,
+    prune_webhook_predictions,
+    record_webhook_prediction,
+    verify_webhook_signature,
+)
+
+
+def test_poller_resolves_many_predictions_with_backoff() -> None:
+    polls: dict[str, int] = {}
+
+    def fetch(prediction_id: str) -> dict:
+        polls[prediction_id] = polls.get(prediction_id, 0) + 1
+        if polls[prediction_id] < 2:
+            return {"id": prediction_id, "status": "processing"}
+        return {"id": prediction_id, "status": "succeeded", "output": [f"https://example.test/{prediction_id}.jpg"]}
+
+    poller = PredictionPoller(batch_size=4, timeout_seconds=30)
+    finished: list[str] = []
+    try:
+        futures = [poller.track(f"pred_{index}", fetch, on_done=lambda payload: finished.append(payload["id"])) for index in range(12)]
+        results = [future.result(timeout=20) for future in futures]
+    finally:
+        poller.close()
+
+    assert {result["status"] for result in results} == {"succeeded"}
+    assert sorted(finished) == sorted(f"pred_{index}" for index in range(12))
+    assert set(polls.values()) == {2}
+    assert poller.pending_count() == 0
+
+
+def test_poller_times_out_unfinished_predictions() -> None:
+    poller = PredictionPoller(batch_size=1, timeout_seconds=0.2)
+    try:
+        started = time.monotonic()
+        result = poller.wait("pred_slow", lambda prediction_id: {"id": prediction_id, "status": "processing"})
+    finally:
+        poller.close()
+    assert result == {"status": "timeout", "id": "pred_slow"}
+    assert time.monotonic() - started < 5
+
+
+def test_webhook_delivery_resolves_without_polling(tmp_path: Path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'poller.db'}", future=True)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine, expire_on_commit=False, future=True)
+    poller = PredictionPoller(session_factory, batch_size=2, timeout_seconds=30)
+    fetched: list[str] = []
+    try:
+        future = poller.track("pred_hook", lambda prediction_id: fetched.append(prediction_id) or {"status": "processing"}, webhook=True)
+        with session_factory() as db:
+            record_webhook_prediction(db, {"id": "pred_hook", "status": "succeeded", "output": ["https://example.test/a.jpg"]})
+        result = future.result(timeout=5)
+    finally:
+        poller.close()
+    assert result["output"] == ["https://example.test/a.jpg"]
+    assert fetched == []
+    with session_factory() as db:
+        assert db.get(ReplicatePrediction, "pred_hook") is None
+
+
+def test_webhook_signature_verification() -> None:
+    key = b"replicate-test-secret"
+    secret = "whsec_" + base64.b64encode(key).decode("utf-8")
+    body = b'{"id": "pred_1", "status": "succeeded"}'
+    signature = base64.b64encode(hmac.new(key, b"msg_1.1700000000." + body, hashlib.sha256).digest()).decode("utf-8")
+    headers = {"webhook-id": "msg_1", "webhook-timestamp": "1700000000", "webhook-signature": f"v1,bogus v1,{signature}"}
+    assert verify_webhook_signature(secret, headers, body, now=1700000010)
+    assert not verify_webhook_signature(secret, headers, body + b" ", now=1700000010)
+    assert not verify_webhook_signature(secret, headers, body, now=1700000000 + 301)
+    assert not verify_webhook_signature(secret, {**headers, "webhook-timestamp": "soon"}, body, now=1700000010)
+    assert not verify_webhook_signature("", headers, body, now=1700000010)
+
+
+def test_late_webhook_rows_are_pruned(tmp_path: Path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'poller.db'}", future=True)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine, expire_on_commit=False, future=True)
+    with session_factory() as db:
+        record_webhook_prediction(db, {"id": "pred_late", "status": "succeeded"})
+        db.get(ReplicatePrediction, "pred_late").received_at = utcnow() - timedelta(hours=2)
+        db.commit()
+        record_webhook_prediction(db, {"id": "pred_fresh", "status": "succeeded"})
+        assert db.get(ReplicatePrediction, "pred_late") is None
+        assert db.get(ReplicatePrediction, "pred_fresh") is not None
+        assert prune_webhook_predictions(db, older_than_seconds=0) == 1
+        db.commit()
+        assert db.get(ReplicatePrediction, "pred_fresh") is None
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from app.services.google_image_client import GoogleImageClient
+from app.services.http_pool import HttpPoolManager
+from app.services.provider_files import GoogleFileCache
+
+
+class _FileApiStandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    uploads: list[bytes] = []
+    expires_in = timedelta(hours=48)
+
+    def _reply(self, status: int, body: dict | None = None, headers: dict[str, str] | None = None) -> None:
+        payload = json.dumps(body or {}).encode("utf-8")
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.headers.get("X-Goog-Upload-Command") == "start":
+            host, port = self.server.server_address[:2]
+            self._reply(200, headers={"X-Goog-Upload-URL": f"http://{host}:{port}/session/{len(self.uploads)}"})
+            return
+        self.uploads.append(body)
+        name = f"files/f{len(self.uploads)}"
+        expires = (datetime.now(timezone.utc) + self.expires_in).isoformat().replace("+00:00", "Z")
+        self._reply(200, {"file": {"name": name, "uri": f"https://files.example/{name}", "mimeType": "image/png", "expirationTime": expires}})
+
+    def log_message(self, *_args) -> None:
+        return
+
+
+@pytest.fixture()
+def file_api():
+    _FileApiStandIn.uploads = []
+    _FileApiStandIn.expires_in = timedelta(hours=48)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FileApiStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield _FileApiStandIn, f"http://127.0.0.1:{server.server_address[1]}/upload/v1beta/files"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _client(cache: GoogleFileCache) -> GoogleImageClient:
+    client = GoogleImageClient(http_pool=HttpPoolManager(pool_maxsize=4))
+    client.file_cache = cache
+    return client
+
+
+def test_variant_requests_reference_one_uploaded_handle(tmp_path: Path, file_api) -> None:
+    stand_in, upload_url = file_api
+    source = tmp_path / "stage3.png"
+    source.write_bytes(b"p" * 50_000)
+    client = _client(GoogleFileCache(http_pool=HttpPoolManager(pool_maxsize=4), enabled=True, upload_url=upload_url))
+
+    requests_json = [client._build_request(prompt=f"variant {index}", image_paths=[source], file_sources=True) for index in range(5)]
+
+    assert stand_in.uploads == [source.read_bytes()]
+    parts = [request["contents"][0]["parts"][1] for request in requests_json]
+    assert all(part == {"fileData": {"mimeType": "image/png", "fileUri": "https://files.example/files/f1"}} for part in parts)
+    assert len(json.dumps(requests_json[0])) < 1000
+    snapshot = client.file_cache.snapshot()
+    assert (snapshot["uploads"], snapshot["hits"], snapshot["bytes_avoided"]) == (1, 4, 200_000)
+
+
+def test_handles_near_expiry_are_uploaded_again(tmp_path: Path, file_api) -> None:
+    stand_in, upload_url = file_api
+    stand_in.expires_in = timedelta(minutes=5)
+    source = tmp_path / "seed.png"
+    source.write_bytes(b"seed")
+    cache = GoogleFileCache(http_pool=HttpPoolManager(pool_maxsize=4), enabled=True, refresh_margin_seconds=600, upload_url=upload_url)
+
+    first = cache.handle_for(source)
+    second = cache.handle_for(source)
+    assert first.uri != second.uri
+    assert len(stand_in.uploads) == 2
+
+
+def test_expired_handles_and_their_locks_are_pruned(tmp_path: Path, file_api) -> None:
+    stand_in, upload_url = file_api
+    stand_in.expires_in = timedelta(seconds=-1)
+    cache = GoogleFileCache(http_pool=HttpPoolManager(pool_maxsize=4), enabled=True, refresh_margin_seconds=0, upload_url=upload_url)
+    for index in range(3):
+        source = tmp_path / f"expired_{index}.png"
+        source.write_bytes(f"expired {index}".encode("utf-8"))
+        cache.handle_for(source)
+
+    assert len(cache._handles) == 1
+    assert cache.snapshot()["handles"] == 0
+    assert cache._handles == {}
+    assert cache._key_locks == {}
+
+
+def test_failed_upload_falls_back_to_inline_data(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    source = tmp_path / "stage3.png"
+    source.write_bytes(b"inline")
+    cache = GoogleFileCache(http_pool=HttpPoolManager(pool_maxsize=2), enabled=True, upload_url="http://127.0.0.1:9/upload")
+    monkeypatch.setattr(cache.settings, "max_api_retries", 0)
+    client = _client(cache)
+
+    request_json = client._build_request(prompt="variant", image_paths=[source], file_sources=True)
+    assert request_json["contents"][0]["parts"][1]["inlineData"]["mimeType"] == "image/png"
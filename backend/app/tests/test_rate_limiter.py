@@ -0,0 +1,46 @@
+from sqlalchemy.orm import sessionmaker
+
+from app.services import rate_limiter as rate_limiter_module
+from app.services.rate_limiter import ProviderRateLimiter, estimate_request_tokens, rate_limit_snapshot
+
+
+def _limiter(db_session, limits_json: str) -> ProviderRateLimiter:
+    factory = sessionmaker(bind=db_session.get_bind(), autoflush=False, expire_on_commit=False, future=True)
+    return ProviderRateLimiter(factory, limits_json=limits_json)
+
+
+def test_unconfigured_provider_is_not_limited(db_session) -> None:
+    limiter = _limiter(db_session, "")
+    assert limiter.acquire("openai", "gpt-5.4", tokens=100) == 0.0
+    assert rate_limit_snapshot(db_session) == []
+
+
+def test_request_budget_is_shared_and_records_wait_metrics(db_session, monkeypatch) -> None:
+    sleeps: list[float] = []
+    monkeypatch.setattr(rate_limiter_module.time, "sleep", sleeps.append)
+    limiter = _limiter(db_session, '{"replicate": {"rpm": 2}}')
+    other_process = _limiter(db_session, '{"replicate": {"rpm": 2}}')
+
+    assert limiter.acquire("replicate", "google/nano-banana-2") == 0.0
+    assert other_process.acquire("replicate", "black-forest-labs/flux-schnell") == 0.0
+    waited = limiter.acquire("replicate")
+    assert 25.0 <= waited <= 30.0
+    assert sleeps == [waited]
+
+    snapshot = rate_limit_snapshot(db_session)
+    assert snapshot[0]["bucket"] == "replicate"
+    assert snapshot[0]["acquired"] == 3
+    assert snapshot[0]["waited"] == 1
+
+
+def test_model_budget_applies_token_limit(db_session, monkeypatch) -> None:
+    monkeypatch.setattr(rate_limiter_module.time, "sleep", lambda _seconds: None)
+    limiter = _limiter(db_session, '{"openai:gpt-5.4": {"tpm": 1000}}')
+    assert limiter.acquire("openai", "gpt-5.4", tokens=800) == 0.0
+    assert limiter.acquire("openai", "gpt-4o-mini", tokens=800) == 0.0
+    assert limiter.acquire("openai", "gpt-5.4", tokens=800) > 30.0
+
+
+def test_estimate_request_tokens_counts_inline_images_as_fixed_cost() -> None:
+    payload = {"messages": [{"content": "a" * 400}, {"image_url": "Q" * 50_000}]}
+    assert estimate_request_tokens(payload) == 100 + rate_limiter_module.IMAGE_TOKEN_ESTIMATE
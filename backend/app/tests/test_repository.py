@@ -1,3 +1,8 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
 from app.services.repository import Repository
 
 
@@ -138,3 +143,389 @@ def test_add_asset_is_idempotent_by_run_stage_attempt_and_file_name(db_session)
     )
     assert first.id == second.id
     assert second.abs_path == "/tmp/second.jpg"
+
+
+def test_claim_queued_runs_claims_up_to_limit_in_creation_order(db_session) -> None:
+    repo = Repository(db_session)
+    entry_ids = [
+        repo.create_entry(
+            {
+                "word": word,
+                "part_of_sentence": "noun",
+                "category": "things",
+                "context": "",
+                "boy_or_girl": "",
+                "batch": "1",
+            }
+        ).id
+        for word in ("cup", "ball", "book")
+    ]
+    runs = repo.create_runs(entry_ids, quality_threshold=95, max_optimization_attempts=3)
+
+    claimed = repo.claim_queued_runs(limit=2, worker_id="worker-a")
+    assert [run.id for run in claimed] == [runs[0].id, runs[1].id]
+    assert all(run.status == "running" and run.claimed_by == "worker-a" for run in claimed)
+    assert all(run.claimed_at is not None for run in claimed)
+
+    remaining = repo.claim_queued_runs(limit=5, worker_id="worker-b")
+    assert [run.id for run in remaining] == [runs[2].id]
+    assert repo.claim_queued_runs(limit=5, worker_id="worker-b") == []
+
+
+def test_claim_queued_runs_resumes_retry_stage(db_session) -> None:
+    repo = Repository(db_session)
+    entry = repo.create_entry(
+        {
+            "word": "swim",
+            "part_of_sentence": "verb",
+            "category": "actions",
+            "context": "",
+            "boy_or_girl": "",
+            "batch": "1",
+        }
+    )
+    run = repo.create_runs([entry.id], quality_threshold=95, max_optimization_attempts=3)[0]
+    repo.update_run(run, status="retry_queued", retry_from_stage="stage3_upgrade", current_stage="failed")
+
+    claimed = repo.claim_next_queued_run()
+    assert claimed is not None
+    assert claimed.current_stage == "stage3_upgrade"
+    assert repo.get_run(run.id).status == "running"
+
+
+def _queued_task(repo: Repository, *, job_id: str, item_id: str, step_name: str, dependency_task_ids: list[str]):
+    task = repo.create_csv_task_node(
+        csv_job_id=job_id,
+        csv_job_item_id=item_id,
+        step_name=step_name,
+        task_key=f"{item_id}:{step_name}",
+        profile_key="male:kid:white",
+        source_profile_key="",
+        branch_role="",
+        dependency_keys=[],
+        dependency_task_ids=dependency_task_ids,
+    )
+    return repo.update_csv_task(task, status="queued")
+
+
+def test_ready_csv_tasks_are_released_when_dependencies_complete(db_session) -> None:
+    repo = Repository(db_session)
+    entry = repo.create_entry(
+        {
+            "word": "eat",
+            "part_of_sentence": "verb",
+            "category": "actions",
+            "context": "",
+            "boy_or_girl": "",
+            "batch": "csv_test",
+        }
+    )
+    job = repo.create_csv_job(batch_id="csv_test", source_file_name="words.csv", execution_mode="csv_dag", config_snapshot={})
+    item = repo.create_csv_job_item(csv_job_id=job.id, entry_id=entry.id, row_index=1, source_row={})
+    base = _queued_task(repo, job_id=job.id, item_id=item.id, step_name="step1_base", dependency_task_ids=[])
+    child = _queued_task(repo, job_id=job.id, item_id=item.id, step_name="step2_male_age", dependency_task_ids=[base.id])
+    grandchild = _queued_task(repo, job_id=job.id, item_id=item.id, step_name="step4_race_variant", dependency_task_ids=[child.id])
+    assert child.remaining_dependency_count == 1
+
+    claimed = repo.claim_ready_csv_tasks(limit=5, worker_id="worker-a")
+    assert [task.id for task in claimed] == [base.id]
+    assert claimed[0].claimed_by == "worker-a"
+    assert repo.get_csv_job(job.id).status == "running"
+    assert repo.get_csv_job(job.id).started_at is not None
+    assert repo.get_csv_job_item(item.id).status == "running"
+    assert repo.claim_ready_csv_tasks(limit=5) == []
+
+    repo.update_csv_task(repo.get_csv_task(base.id), status="completed")
+    assert repo.get_csv_task(child.id).remaining_dependency_count == 0
+    assert repo.get_csv_task(grandchild.id).remaining_dependency_count == 1
+    assert [task.id for task in repo.claim_ready_csv_tasks(limit=5)] == [child.id]
+
+
+def test_completing_a_reclaimed_task_twice_releases_dependents_once(db_session) -> None:
+    repo = Repository(db_session)
+    entry = repo.create_entry(
+        {
+            "word": "jump",
+            "part_of_sentence": "verb",
+            "category": "actions",
+            "context": "",
+            "boy_or_girl": "",
+            "batch": "csv_twice",
+        }
+    )
+    job = repo.create_csv_job(batch_id="csv_twice", source_file_name="words.csv", execution_mode="csv_dag", config_snapshot={})
+    item = repo.create_csv_job_item(csv_job_id=job.id, entry_id=entry.id, row_index=1, source_row={})
+    first = _queued_task(repo, job_id=job.id, item_id=item.id, step_name="step1_base", dependency_task_ids=[])
+    second = _queued_task(repo, job_id=job.id, item_id=item.id, step_name="step1_extra", dependency_task_ids=[])
+    child = _queued_task(repo, job_id=job.id, item_id=item.id, step_name="step2_male_age", dependency_task_ids=[first.id, second.id])
+    assert child.remaining_dependency_count == 2
+
+    stale_a = repo.claim_ready_csv_tasks(limit=1, worker_id="worker-a")[0]
+    with Session(db_session.bind, expire_on_commit=False) as other_session:
+        other_repo = Repository(other_session)
+        stale_b = other_repo.get_csv_task(stale_a.id)
+        repo.update_csv_task(stale_a, status="completed")
+        other_repo.update_csv_task(stale_b, status="completed")
+    assert repo.get_csv_task(child.id).remaining_dependency_count == 1
+
+
+def test_ready_csv_tasks_are_claimed_by_priority_before_age(db_session) -> None:
+    repo = Repository(db_session)
+    entry = repo.create_entry(
+        {
+            "word": "hop",
+            "part_of_sentence": "verb",
+            "category": "actions",
+            "context": "",
+            "boy_or_girl": "",
+            "batch": "csv_priority",
+        }
+    )
+    job = repo.create_csv_job(batch_id="csv_priority", source_file_name="words.csv", execution_mode="csv_dag", config_snapshot={})
+    item = repo.create_csv_job_item(csv_job_id=job.id, entry_id=entry.id, row_index=1, source_row={})
+    leaf = _queued_task(repo, job_id=job.id, item_id=item.id, step_name="step4_race_variant", dependency_task_ids=[])
+    gate = repo.update_csv_task(
+        _queued_task(repo, job_id=job.id, item_id=item.id, step_name="step1_base", dependency_task_ids=[]),
+        priority=-5,
+    )
+    assert [task.id for task in repo.claim_ready_csv_tasks(limit=2)] == [gate.id, leaf.id]
+
+
+def test_csv_job_overview_pages_items_by_row_with_job_wide_counts(db_session) -> None:
+    repo = Repository(db_session)
+    job = repo.create_csv_job(batch_id="csv_pages", source_file_name="words.csv", execution_mode="csv_dag", config_snapshot={})
+    items = []
+    for row_index, word in enumerate(["cat", "dog", "hen", "owl", "pig"], start=1):
+        entry = repo.create_entry(
+            {"word": word, "part_of_sentence": "noun", "category": "animals", "context": "", "boy_or_girl": "", "batch": "csv_pages"}
+        )
+        items.append(repo.create_csv_job_item(csv_job_id=job.id, entry_id=entry.id, row_index=row_index, source_row={}))
+    for item in items:
+        _queued_task(repo, job_id=job.id, item_id=item.id, step_name="step1_base", dependency_task_ids=[])
+    repo.update_csv_task(repo.list_csv_tasks(job.id)[0], status="completed")
+    repo.update_csv_task(repo.list_csv_tasks(job.id)[3], status="failed", error_summary="boom")
+
+    seen: list[int] = []
+    after_row = None
+    while True:
+        page = repo.csv_job_overview_page(job.id, limit=2, after_row=after_row)
+        seen.extend(item.row_index for item in page["items"])
+        assert {task.csv_job_item_id for task in page["tasks"]} == {item.id for item in page["items"]}
+        if len(page["items"]) < 2:
+            break
+        after_row = (page["items"][-1].row_index, page["items"][-1].id)
+    assert seen == [1, 2, 3, 4, 5]
+    assert page["total_row_count"] == 5
+    assert page["step_counts"] == {"step1_base": {"completed": 1, "queued": 3, "failed": 1}}
+    assert [issue["error"] for issue in page["issues_by_step"]["step1_base"]] == ["boom"]
+    assert page["item_task_counts"][items[0].id] == {"completed": 1}
+
+
+def test_reap_expired_leases_requeues_then_fails_after_reclaim_limit(db_session) -> None:
+    repo = Repository(db_session)
+    entry = repo.create_entry(
+        {
+            "word": "sleep",
+            "part_of_sentence": "verb",
+            "category": "actions",
+            "context": "",
+            "boy_or_girl": "",
+            "batch": "1",
+        }
+    )
+    run = repo.create_runs([entry.id], quality_threshold=95, max_optimization_attempts=3)[0]
+
+    claimed = repo.claim_queued_runs(limit=1, worker_id="worker-a", lease_seconds=60)[0]
+    assert claimed.lease_expires_at is not None
+    repo.update_run(repo.get_run(run.id), current_stage="quality_gate")
+    assert repo.reap_expired_leases(max_reclaims=1)["requeued_runs"] == []
+
+    assert repo.extend_leases(worker_id="worker-b", run_ids=[run.id], task_ids=[]) == 0
+    assert repo.extend_leases(worker_id="worker-a", run_ids=[run.id], task_ids=[], lease_seconds=1) == 1
+    repo.update_run(repo.get_run(run.id), lease_expires_at=datetime.utcnow() - timedelta(seconds=1))
+
+    reaped = repo.reap_expired_leases(max_reclaims=1)
+    assert reaped["requeued_runs"] == [run.id]
+    requeued = repo.get_run(run.id)
+    assert requeued.status == "retry_queued"
+    assert requeued.retry_from_stage == "quality_gate"
+    assert requeued.reclaim_count == 1
+    assert requeued.claimed_by == ""
+
+    repo.claim_queued_runs(limit=1, worker_id="worker-b")
+    repo.update_run(repo.get_run(run.id), lease_expires_at=datetime.utcnow() - timedelta(seconds=1))
+    reaped = repo.reap_expired_leases(max_reclaims=1)
+    assert reaped["failed_runs"] == [run.id]
+    assert repo.get_run(run.id).status == "failed_technical"
+
+
+def test_list_entries_joins_latest_run_and_filters_in_one_query(db_session) -> None:
+    repo = Repository(db_session)
+    entries = {
+        word: repo.create_entry(
+            {
+                "word": word,
+                "part_of_sentence": "noun",
+                "category": "things",
+                "context": "",
+                "boy_or_girl": "",
+                "batch": "1",
+            }
+        )
+        for word in ("ball", "book", "cup", "drum")
+    }
+    old_run = repo.create_runs([entries["ball"].id], quality_threshold=95, max_optimization_attempts=3)[0]
+    old_run.status = "completed_pass"
+    old_run.quality_score = 99
+    old_run.created_at = datetime.utcnow() - timedelta(hours=1)
+    latest_ball, latest_book, latest_cup = repo.create_runs(
+        [entries["ball"].id, entries["book"].id, entries["cup"].id],
+        quality_threshold=95,
+        max_optimization_attempts=3,
+    )
+    latest_ball.status = "failed_technical"
+    latest_book.status, latest_book.quality_score = "completed_pass", 97
+    latest_cup.status, latest_cup.quality_score = "completed_pass", 80
+    db_session.commit()
+
+    statements: list[str] = []
+
+    def listener(_conn, _cursor, statement, *_args) -> None:
+        statements.append(statement)
+
+    event.listen(db_session.bind, "before_cursor_execute", listener)
+    try:
+        rows = repo.list_entries()
+    finally:
+        event.remove(db_session.bind, "before_cursor_execute", listener)
+    assert len(statements) == 1
+    assert [(entry.word, run.id if run else None) for entry, run in rows] == [
+        ("ball", latest_ball.id),
+        ("book", latest_book.id),
+        ("cup", latest_cup.id),
+        ("drum", None),
+    ]
+
+    assert [entry.word for entry, _ in repo.list_entries(status="completed_pass")] == ["book", "cup"]
+    assert [entry.word for entry, _ in repo.list_entries(min_score=90)] == ["book"]
+    assert [entry.word for entry, _ in repo.list_entries(max_score=90)] == ["cup"]
+
+    first_page = repo.list_entries(limit=2)
+    assert [entry.word for entry, _ in first_page] == ["ball", "book"]
+    last_entry = first_page[-1][0]
+    second_page = repo.list_entries(limit=2, after_word=last_entry.word, after_id=last_entry.id)
+    assert [entry.word for entry, _ in second_page] == ["cup", "drum"]
+
+
+def test_list_runs_with_details_matches_per_run_snapshots(db_session) -> None:
+    repo = Repository(db_session)
+    entry_ids = [
+        repo.create_entry(
+            {
+                "word": word,
+                "part_of_sentence": "noun",
+                "category": "things",
+                "context": "",
+                "boy_or_girl": "",
+                "batch": batch,
+            }
+        ).id
+        for word, batch in (("cup", "b1"), ("ball", "b1"), ("book", "b2"))
+    ]
+    runs = repo.create_runs(entry_ids, quality_threshold=95, max_optimization_attempts=3)
+    for index, run in enumerate(runs):
+        run.status = "completed_pass"
+        run.created_at = datetime.utcnow() - timedelta(minutes=10 - index)
+        repo.add_stage_result(
+            run_id=run.id,
+            stage_name="stage2_draft",
+            attempt=0,
+            status="ok",
+            idempotency_key=f"{run.id}:stage2",
+            request_json={},
+            response_json={"model": "flux-schnell"},
+        )
+        repo.add_asset(
+            run_id=run.id,
+            stage_name="stage2_draft",
+            attempt=0,
+            file_name="draft.jpg",
+            abs_path=f"/tmp/{run.id}.jpg",
+            mime_type="image/jpeg",
+            sha256="x",
+            width=1,
+            height=1,
+            origin_url="",
+            model_name="flux-schnell",
+        )
+    db_session.commit()
+
+    statements: list[str] = []
+
+    def listener(_conn, _cursor, statement, *_args) -> None:
+        statements.append(statement)
+
+    event.listen(db_session.bind, "before_cursor_execute", listener)
+    try:
+        rows = repo.list_runs_with_details(limit=10)
+        summaries = repo.batch_job_summaries([entry.batch for _run, entry, _stages, _assets in rows])
+    finally:
+        event.remove(db_session.bind, "before_cursor_execute", listener)
+    assert len(statements) == 4
+
+    assert [run.id for run, *_ in rows] == [run.id for run in repo.list_runs()]
+    for run, entry, stages, assets in rows:
+        _, expected_stages, expected_assets, _ = repo.run_snapshot(run.id)
+        assert entry.id == run.entry_id
+        assert [stage.id for stage in stages] == [stage.id for stage in expected_stages]
+        assert [asset.id for asset in assets] == [asset.id for asset in expected_assets]
+        assert summaries[entry.batch] == repo.batch_job_summary(entry.batch)
+    assert summaries["b1"]["run_count"] == 2
+
+    assert [run.id for run, *_ in repo.list_runs_with_details(limit=1, offset=1)] == [rows[1][0].id]
+
+
+def test_cursor_pages_are_stable_and_defer_heavy_columns(db_session) -> None:
+    repo = Repository(db_session)
+    entry = repo.create_entry(
+        {
+            "word": "cup",
+            "part_of_sentence": "noun",
+            "category": "things",
+            "context": "",
+            "boy_or_girl": "",
+            "batch": "",
+        }
+    )
+    runs = repo.create_runs([entry.id] * 5, quality_threshold=95, max_optimization_attempts=3)
+    shared_time = datetime.utcnow()
+    for run in runs:
+        run.created_at = shared_time
+        run.error_detail = "x" * 100
+    exports = [repo.create_export({"index": index}) for index in range(3)]
+    for export in exports:
+        export.created_at = shared_time
+        export.updated_at = shared_time
+    db_session.commit()
+    db_session.expire_all()
+
+    seen: list[str] = []
+    cursor = None
+    while True:
+        page = repo.list_runs_with_details(limit=2, cursor=cursor, include_costs=False, deferred=("error_detail",))
+        seen.extend(run.id for run, *_ in page)
+        if len(page) < 2:
+            break
+        cursor = (page[-1][0].created_at, page[-1][0].id)
+    assert sorted(seen) == sorted(run.id for run in runs)
+    assert len(seen) == len(set(seen))
+    assert all(stages == [] and assets == [] for _run, _entry, stages, assets in page)
+    assert "error_detail" in inspect(page[0][0]).unloaded
+
+    first = repo.list_exports(limit=2, deferred=("filter_json",))
+    assert "filter_json" in inspect(first[0]).unloaded
+    rest = repo.list_exports(cursor=(first[-1].updated_at, first[-1].id))
+    assert {export.id for export in first + rest} == {export.id for export in exports}
+
+    repo.update_export(exports[0], status="completed")
+    assert repo.list_exports()[0].id == exports[0].id
@@ -1,4 +1,19 @@
-from app.services.retry import RetryExceededError, with_backoff
+import pytest
+import requests
+
+import app.services.retry as retry
+from app.services.retry import (
+    FATAL,
+    RETRYABLE,
+    THROTTLED,
+    CircuitBreakerRegistry,
+    CircuitOpenError,
+    RetryExceededError,
+    call_with_retry,
+    classify_error,
+    retry_after_seconds,
+    with_backoff,
+)
 
 
 def test_with_backoff_retries_until_success() -> None:
@@ -24,3 +39,71 @@ def test_with_backoff_raises_when_exhausted() -> None:
         assert False, "expected RetryExceededError"
     except RetryExceededError:
         assert True
+
+
+def _http_error(status_code: int, headers: dict[str, str] | None = None) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    return requests.HTTPError(f"HTTP {status_code}", response=response)
+
+
+def test_classify_error_separates_retryable_throttled_and_fatal() -> None:
+    assert classify_error(_http_error(503)) == RETRYABLE
+    assert classify_error(_http_error(429)) == THROTTLED
+    assert classify_error(_http_error(400)) == FATAL
+    assert classify_error(requests.ConnectionError("reset")) == RETRYABLE
+    assert classify_error(requests.exceptions.JSONDecodeError("Expecting value", "<html>", 0)) == RETRYABLE
+    assert classify_error(ValueError("bad json")) == FATAL
+    assert retry_after_seconds(_http_error(429, {"Retry-After": "7"})) == 7.0
+
+
+def test_call_with_retry_does_not_retry_fatal_errors() -> None:
+    calls = {"count": 0}
+
+    def bad_request() -> str:
+        calls["count"] += 1
+        raise _http_error(400)
+
+    with pytest.raises(requests.HTTPError):
+        call_with_retry(bad_request, retries=3, provider="openai", breakers=CircuitBreakerRegistry(failure_threshold=2, reset_seconds=60))
+    assert calls["count"] == 1
+
+
+def test_call_with_retry_honours_retry_after(monkeypatch: pytest.MonkeyPatch) -> None:
+    sleeps: list[float] = []
+    monkeypatch.setattr(retry.time, "sleep", sleeps.append)
+    calls = {"count": 0}
+
+    def throttled_once() -> str:
+        calls["count"] += 1
+        if calls["count"] == 1:
+            raise _http_error(429, {"Retry-After": "4"})
+        return "ok"
+
+    result = call_with_retry(throttled_once, retries=3, provider="google", base_delay=0.1, breakers=CircuitBreakerRegistry(failure_threshold=2, reset_seconds=60))
+    assert result == "ok"
+    assert sleeps == [4.0]
+
+
+def test_circuit_breaker_opens_fails_fast_and_probes_half_open(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(retry.time, "sleep", lambda _delay: None)
+    breakers = CircuitBreakerRegistry(failure_threshold=2, reset_seconds=0.5)
+    calls = {"count": 0}
+
+    def outage() -> str:
+        calls["count"] += 1
+        raise _http_error(503)
+
+    with pytest.raises(CircuitOpenError):
+        call_with_retry(outage, retries=5, provider="replicate", model="flux", breakers=breakers)
+    assert calls["count"] == 2
+    with pytest.raises(CircuitOpenError):
+        call_with_retry(outage, retries=5, provider="replicate", model="flux", breakers=breakers)
+    assert calls["count"] == 2
+    assert breakers.snapshot()[0]["state"] == "open"
+
+    breakers.get("replicate", "flux").opened_at -= 1.0
+    assert call_with_retry(lambda: "recovered", retries=0, provider="replicate", model="flux", breakers=breakers) == "recovered"
+    assert breakers.snapshot()[0]["key"] == "replicate:flux"
+    assert breakers.snapshot()[0]["state"] == "closed"
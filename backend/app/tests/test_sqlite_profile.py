@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.engine_factory import create_app_engine
+from app.db.sqlite_profile import SqliteWriteGate
+from app.models import Base
+from app.services.repository import Repository
+
+
+def test_sqlite_engine_applies_performance_profile(tmp_path: Path) -> None:
+    engine = create_app_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 1
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 30000
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == -65536
+
+
+def test_single_writer_gate_serializes_threaded_commits(tmp_path: Path) -> None:
+    engine = create_app_engine(f"sqlite:///{tmp_path / 'writers.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False, future=True)
+    gate = SqliteWriteGate(single_writer=True)
+    gate.install(factory)
+    errors: list[Exception] = []
+
+    def writer(index: int) -> None:
+        try:
+            with factory() as db:
+                repo = Repository(db)
+                for row in range(5):
+                    repo.create_entry(
+                        {
+                            "word": f"word{index}-{row}",
+                            "part_of_sentence": "noun",
+                            "category": "things",
+                            "context": "",
+                            "boy_or_girl": "",
+                            "batch": "",
+                        }
+                    )
+        except Exception as exc:  # noqa: BLE001
+            errors.append(exc)
+
+    threads = [threading.Thread(target=writer, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with factory() as db:
+        assert db.execute(text("SELECT count(*) FROM entries")).scalar() == 40
+        db.execute(text("SELECT 1"))
+    snapshot = gate.snapshot()
+    assert snapshot["single_writer"] is True
+    assert snapshot["commits"] == 40
+    assert snapshot["writer_queue_timeouts"] == 0
+    assert snapshot["writer_queue_ms_max"] >= snapshot["writer_queue_ms_avg"] >= 0
+    assert snapshot["write_txn_ms_max"] >= snapshot["write_txn_ms_avg"] > 0
+    assert gate._writer_lock.acquire(blocking=False)
+    gate._writer_lock.release()
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+import app.services.storage as storage
+
+
+@pytest.fixture()
+def runtime_root(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setattr(storage.settings, "runtime_data_root", tmp_path / "runtime_data")
+    monkeypatch.setattr(storage.settings, "storage_backend", "local", raising=False)
+    return tmp_path / "runtime_data"
+
+
+def _image_bytes(format_name: str, mode: str = "RGB") -> bytes:
+    buffer = BytesIO()
+    Image.new(mode, (40, 24), color=(10, 20, 30, 128) if mode == "RGBA" else (10, 20, 30)).save(buffer, format=format_name)
+    return buffer.getvalue()
+
+
+def _chunks(payload: bytes, size: int = 7):
+    for offset in range(0, len(payload), size):
+        yield payload[offset : offset + size]
+
+
+def test_stream_to_temp_file_hashes_while_writing(runtime_root: Path) -> None:
+    payload = _image_bytes("PNG")
+    path, digest = storage.stream_to_temp_file("run_a", _chunks(payload))
+    assert path.parent == runtime_root / "runs" / "run_a" / "tmp"
+    assert path.read_bytes() == payload
+    assert digest == hashlib.sha256(payload).hexdigest()
+
+
+def test_ingest_passes_matching_jpeg_through_without_reencoding(runtime_root: Path) -> None:
+    payload = _image_bytes("JPEG")
+    source, digest = storage.stream_to_temp_file("run_a", _chunks(payload))
+    ingested = storage.ingest_run_image("run_a", "stage3.png", source, output_mime_type="image/jpeg", source_sha256=digest)
+    assert ingested.stored.local_path == runtime_root / "runs" / "run_a" / "stage3.jpg"
+    assert ingested.stored.local_path.read_bytes() == payload
+    assert (ingested.sha256, ingested.width, ingested.height, ingested.mime_type) == (digest, 40, 24, "image/jpeg")
+    assert not source.exists()
+
+
+def test_ingest_transcodes_and_hashes_the_stored_file(runtime_root: Path) -> None:
+    source, _ = storage.stream_to_temp_file("run_a", _chunks(_image_bytes("PNG", "RGBA")))
+    ingested = storage.ingest_run_image("run_a", "variant.jpg", source, output_mime_type="image/jpeg")
+    stored = ingested.stored.local_path
+    assert stored.name == "variant.jpg"
+    assert ingested.sha256 == hashlib.sha256(stored.read_bytes()).hexdigest()
+    with Image.open(stored) as img:
+        assert (img.format, img.mode, img.size) == ("JPEG", "RGB", (40, 24))
+    assert not source.exists()
+    assert list((runtime_root / "runs" / "run_a" / "tmp").iterdir()) == []
+
+
+class _StorageStandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    uploads: dict[str, dict] = {}
+    objects: dict[str, bytes] = {}
+    fail_patches: list[bool] = []
+    stall_patches = False
+    lock = threading.Lock()
+
+    def _reply(self, status: int, headers: dict[str, str] | None = None) -> None:
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def do_POST(self) -> None:
+        body = self._body()
+        if self.path.endswith("/upload/resumable"):
+            metadata = dict(item.split(" ") for item in self.headers["Upload-Metadata"].split(","))
+            upload_id = f"upl{len(self.uploads)}"
+            with self.lock:
+                self.uploads[upload_id] = {
+                    "key": base64.b64decode(metadata["objectName"]).decode("utf-8"),
+                    "length": int(self.headers["Upload-Length"]),
+                    "data": b"",
+                }
+            self._reply(201, {"Location": f"/storage/v1/upload/resumable/{upload_id}"})
+            return
+        with self.lock:
+            self.objects[self.path.split("/exports-bucket/", 1)[1]] = body
+        self._reply(200)
+
+    def do_HEAD(self) -> None:
+        upload = self.uploads.get(self.path.rsplit("/", 1)[1])
+        if upload is None:
+            self._reply(404)
+            return
+        self._reply(200, {"Upload-Offset": str(len(upload["data"])), "Upload-Length": str(upload["length"])})
+
+    def do_PATCH(self) -> None:
+        body = self._body()
+        upload = self.uploads[self.path.rsplit("/", 1)[1]]
+        with self.lock:
+            if self.fail_patches and self.fail_patches.pop(0):
+                upload["data"] += body[: len(body) // 2]
+                self._reply(503)
+                return
+            assert int(self.headers["Upload-Offset"]) == len(upload["data"])
+            if self.stall_patches:
+                self._reply(204, {"Upload-Offset": str(len(upload["data"]))})
+                return
+            upload["data"] += body
+            if len(upload["data"]) == upload["length"]:
+                self.objects[upload["key"]] = upload["data"]
+        self._reply(204, {"Upload-Offset": str(len(upload["data"]))})
+
+    def log_message(self, *_args) -> None:
+        return
+
+
+@pytest.fixture()
+def storage_stand_in(runtime_root: Path, monkeypatch: pytest.MonkeyPatch):
+    _StorageStandIn.uploads = {}
+    _StorageStandIn.objects = {}
+    _StorageStandIn.fail_patches = []
+    _StorageStandIn.stall_patches = False
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StorageStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(storage.settings, "storage_backend", "supabase", raising=False)
+    monkeypatch.setattr(storage.settings, "supabase_url", f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setattr(storage.settings, "supabase_service_role_key", "service-key")
+    monkeypatch.setattr(storage.settings, "supabase_export_bucket", "exports-bucket")
+    monkeypatch.setattr(storage.settings, "max_api_retries", 2)
+    monkeypatch.setattr(storage, "RESUMABLE_CHUNK_BYTES", 1024)
+    try:
+        yield _StorageStandIn
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_export_artifacts_upload_concurrently_and_resume_after_failure(runtime_root: Path, storage_stand_in) -> None:
+    export_dir = runtime_root / "exports" / "exp_1"
+    export_dir.mkdir(parents=True)
+    package = export_dir / "export_package.zip"
+    package.write_bytes(bytes(range(256)) * 20)
+    manifest = export_dir / "manifest.json"
+    manifest.write_text('{"rows": []}', encoding="utf-8")
+    storage_stand_in.fail_patches = [False, True]
+
+    stored_package, stored_manifest = storage.persist_export_artifacts(
+        "exp_1",
+        [(package, "application/zip"), (manifest, "application/json")],
+    )
+
+    assert stored_package.persisted_path == "supabase://exports-bucket/exports/exp_1/export_package.zip"
+    assert stored_manifest.persisted_path == "supabase://exports-bucket/exports/exp_1/manifest.json"
+    assert storage_stand_in.objects["exports/exp_1/export_package.zip"] == package.read_bytes()
+    assert storage_stand_in.objects["exports/exp_1/manifest.json"] == manifest.read_bytes()
+    assert len(storage_stand_in.uploads) == 1
+    assert not list(export_dir.glob(".*.upload.json"))
+
+
+def test_resumable_upload_continues_a_previous_partial_upload(runtime_root: Path, storage_stand_in) -> None:
+    source = runtime_root / "exports" / "job_1" / "batch.zip"
+    source.parent.mkdir(parents=True)
+    source.write_bytes(b"z" * 5000)
+    storage_stand_in.fail_patches = [False, True, True, True]
+
+    with pytest.raises(storage.StorageTransientError):
+        storage.upload_file_resumable("exports-bucket", "exports/job_1/batch.zip", source, content_type="application/zip")
+    partial = next(iter(storage_stand_in.uploads.values()))
+    assert 1024 < len(partial["data"]) < 5000
+
+    uri = storage.upload_file_resumable("exports-bucket", "exports/job_1/batch.zip", source, content_type="application/zip")
+    assert uri == "supabase://exports-bucket/exports/job_1/batch.zip"
+    assert len(storage_stand_in.uploads) == 1
+    assert storage_stand_in.objects["exports/job_1/batch.zip"] == source.read_bytes()
+
+
+def test_resumable_upload_raises_when_offset_stops_advancing(runtime_root: Path, storage_stand_in) -> None:
+    source = runtime_root / "exports" / "job_2" / "batch.zip"
+    source.parent.mkdir(parents=True)
+    source.write_bytes(b"s" * 3000)
+    storage_stand_in.stall_patches = True
+
+    with pytest.raises(RuntimeError, match="stalled at offset 0 of 3000"):
+        storage.upload_file_resumable("exports-bucket", "exports/job_2/batch.zip", source, content_type="application/zip")
+    assert not list(source.parent.glob(".*.upload.json"))
+
+
+def test_ingest_inline_image_writes_once_without_temp_source(runtime_root: Path) -> None:
+    payload = _image_bytes("JPEG")
+    inline = storage.InlineImage(data=payload, mime_type="image/jpeg", sha256=hashlib.sha256(payload).hexdigest())
+    ingested = storage.ingest_run_image("run_a", "variant.png", inline, output_mime_type="image/jpeg")
+    assert ingested.stored.local_path.read_bytes() == payload
+    assert ingested.sha256 == inline.sha256
+    assert list((runtime_root / "runs" / "run_a" / "tmp").iterdir()) == []
+
+    transcoded = storage.ingest_run_image(
+        "run_a",
+        "white.png",
+        storage.InlineImage(data=_image_bytes("PNG", "RGBA"), mime_type="image/png", sha256=""),
+        output_mime_type="image/jpeg",
+    )
+    with Image.open(transcoded.stored.local_path) as img:
+        assert (img.format, img.mode) == ("JPEG", "RGB")
+    assert transcoded.sha256 == hashlib.sha256(transcoded.stored.local_path.read_bytes()).hexdigest()
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.services.storage_uploader as storage_uploader
+from app.models import Asset, Base, StorageUpload, utcnow
+from app.services.storage import StoredObject
+from app.services.storage_uploader import StorageUploader, enqueue_asset_upload, upload_backlog
+
+
+@pytest.fixture()
+def session_factory(tmp_path: Path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'uploads.db'}", future=True)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine, expire_on_commit=False, future=True)
+
+
+def _queued_asset(session_factory, tmp_path: Path) -> str:
+    local_path = tmp_path / "stage3.jpg"
+    local_path.write_bytes(b"jpeg-bytes")
+    with session_factory() as db:
+        asset = Asset(run_id="run_1", stage_name="stage3_upgraded", file_name=local_path.name, abs_path=local_path.as_posix(), sha256="x")
+        db.add(asset)
+        db.commit()
+        stored = StoredObject(local_path=local_path, persisted_path=local_path.as_posix(), bucket="images", object_key="runs/run_1/stage3.jpg")
+        enqueue_asset_upload(db, asset, stored, content_type="image/jpeg")
+        return asset.id
+
+
+def test_uploader_retries_and_swaps_asset_path(session_factory, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[str] = []
+
+    def fake_upload(bucket: str, object_key: str, local_path: Path, *, content_type: str) -> str:
+        calls.append(object_key)
+        if len(calls) == 1:
+            raise RuntimeError("Supabase upload failed (503)")
+        assert local_path.read_bytes() == b"jpeg-bytes"
+        return f"supabase://{bucket}/{object_key}"
+
+    monkeypatch.setattr(storage_uploader, "upload_file_to_supabase", fake_upload)
+    monkeypatch.setattr(storage_uploader, "RETRY_BASE_SECONDS", 0.05)
+    asset_id = _queued_asset(session_factory, tmp_path)
+    with session_factory() as db:
+        assert upload_backlog(db)["pending"] == 1
+
+    uploader = StorageUploader(session_factory, workers=2, max_attempts=3)
+    try:
+        assert uploader.drain(10)
+    finally:
+        uploader.close()
+
+    assert len(calls) == 2
+    with session_factory() as db:
+        assert db.get(Asset, asset_id).abs_path == "supabase://images/runs/run_1/stage3.jpg"
+        assert upload_backlog(db) == {"pending": 0, "failed": 0, "oldest_pending_seconds": 0}
+
+
+def test_uploader_gives_up_after_max_attempts(session_factory, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    def failing_upload(bucket: str, object_key: str, local_path: Path, *, content_type: str) -> str:
+        raise RuntimeError("Supabase upload failed (500)")
+
+    monkeypatch.setattr(storage_uploader, "upload_file_to_supabase", failing_upload)
+    monkeypatch.setattr(storage_uploader, "RETRY_BASE_SECONDS", 0.01)
+    asset_id = _queued_asset(session_factory, tmp_path)
+
+    uploader = StorageUploader(session_factory, workers=1, max_attempts=2)
+    try:
+        assert uploader.drain(10)
+    finally:
+        uploader.close()
+
+    with session_factory() as db:
+        row = db.query(StorageUpload).one()
+        assert (row.status, row.attempts) == ("failed", 2)
+        assert db.get(Asset, asset_id).abs_path == (tmp_path / "stage3.jpg").as_posix()
+        assert upload_backlog(db)["failed"] == 1
+
+
+def test_uploader_adopts_stale_rows_from_other_hosts(session_factory, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    def fake_upload(bucket: str, object_key: str, local_path: Path, *, content_type: str) -> str:
+        return f"supabase://{bucket}/{object_key}"
+
+    monkeypatch.setattr(storage_uploader, "upload_file_to_supabase", fake_upload)
+    asset_id = _queued_asset(session_factory, tmp_path)
+    with session_factory() as db:
+        row = db.query(StorageUpload).one()
+        row.host = "dead-host"
+        row.next_attempt_at = utcnow() - timedelta(seconds=storage_uploader.STALE_UPLOAD_SECONDS + 60)
+        db.add(
+            StorageUpload(
+                asset_id="asset_missing",
+                local_path=(tmp_path / "gone.jpg").as_posix(),
+                bucket="images",
+                object_key="runs/run_1/gone.jpg",
+                content_type="image/jpeg",
+                host="dead-host",
+                next_attempt_at=row.next_attempt_at,
+            )
+        )
+        db.commit()
+
+    uploader = StorageUploader(session_factory, workers=2, host="live-host")
+    try:
+        assert uploader.drain(10)
+    finally:
+        uploader.close()
+
+    with session_factory() as db:
+        assert db.get(Asset, asset_id).abs_path == "supabase://images/runs/run_1/stage3.jpg"
+        remaining = db.query(StorageUpload).one()
+        assert (remaining.object_key, remaining.host) == ("runs/run_1/gone.jpg", "dead-host")
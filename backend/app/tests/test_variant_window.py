@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from app.services.pipeline import run_sliding_window
+
+
+def test_sliding_window_respects_worker_count() -> None:
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def run_job(job: dict) -> dict:
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02 * (1 + job["index"] % 3))
+        with lock:
+            active -= 1
+        return {"index": job["index"], "ok": True}
+
+    results: list[int] = []
+    active_counts: list[int] = []
+
+    def on_result(result: dict, active_count: int) -> None:
+        results.append(result["index"])
+        active_counts.append(active_count)
+
+    run_sliding_window([{"index": index} for index in range(10)], 3, run_job, on_result)
+
+    assert sorted(results) == list(range(10))
+    assert peak == 3
+    assert max(active_counts) <= 3
+
+
+def test_sliding_window_keeps_other_slots_moving_past_a_failure() -> None:
+    release_failure = threading.Event()
+
+    def run_job(job: dict) -> dict:
+        if job["index"] == 0:
+            release_failure.wait(5)
+            return {"index": 0, "ok": False, "error": "prediction failed"}
+        time.sleep(0.01)
+        return {"index": job["index"], "ok": True}
+
+    order: list[int] = []
+
+    def on_result(result: dict, active_count: int) -> None:
+        order.append(result["index"])
+        if len(order) == 5:
+            release_failure.set()
+
+    started = time.monotonic()
+    run_sliding_window([{"index": index} for index in range(6)], 2, run_job, on_result)
+
+    assert order[:5] == [1, 2, 3, 4, 5]
+    assert order[-1] == 0
+    assert time.monotonic() - started < 5
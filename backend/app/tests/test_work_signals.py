@@ -0,0 +1,41 @@
+from app.services.repository import Repository
+from app.services.work_signals import WorkSignalListener
+
+
+def test_create_runs_wakes_listener(db_session) -> None:
+    listener = WorkSignalListener(db_session.get_bind()).start()
+    try:
+        assert listener.wait(0) is False
+        repo = Repository(db_session)
+        entry = repo.create_entry(
+            {
+                "word": "jump",
+                "part_of_sentence": "verb",
+                "category": "actions",
+                "context": "",
+                "boy_or_girl": "",
+                "batch": "1",
+            }
+        )
+        repo.create_runs([entry.id], quality_threshold=95, max_optimization_attempts=3)
+        assert listener.wait(1.0) is True
+        assert listener.wait(0) is False
+    finally:
+        listener.close()
+
+
+def test_wake_interrupts_wait_and_falls_back_to_timeout(db_session) -> None:
+    listener = WorkSignalListener(db_session.get_bind()).start()
+    try:
+        listener.wake()
+        assert listener.wait(1.0) is True
+        assert listener.wait(0.05) is False
+    finally:
+        listener.close()
+
+
+def test_closed_listener_removes_socket(db_session) -> None:
+    listener = WorkSignalListener(db_session.get_bind()).start()
+    socket_path = listener._socket_path
+    listener.close()
+    assert socket_path is None or not socket_path.exists()
@@ -0,0 +1,99 @@
+from datetime import timedelta
+from pathlib import Path
+
+from sqlalchemy.orm import sessionmaker
+
+from app.db import sqlite_profile
+from app.db.sqlite_profile import SqliteWriteGate
+from app.models import RuntimeConfig, WorkerHealthSnapshot, utcnow
+from app.services import hedging, payload_cache, provider_files, retry
+from app.services.hedging import HedgingPolicy
+from app.services.payload_cache import EncodedPayloadCache
+from app.services.provider_files import GoogleFileCache
+from app.services.retry import CircuitBreakerRegistry
+from app.services.worker_health import SNAPSHOT_RETENTION_SECONDS, persist_worker_health, worker_health_snapshot
+
+
+def test_sections_are_grouped_per_worker(db_session) -> None:
+    persist_worker_health(db_session, worker_id="host-b:2", sections={"http_pools": [{"host": "api.openai.com", "requests": 3}]})
+    persist_worker_health(db_session, worker_id="host-a:1", sections={"http_pools": [{"host": "api.replicate.com", "requests": 5}]})
+    persist_worker_health(db_session, worker_id="host-a:1", sections={"http_pools": [{"host": "api.replicate.com", "requests": 7}]})
+
+    pools = worker_health_snapshot(db_session)["http_pools"]
+    assert [entry["worker_id"] for entry in pools] == ["host-a:1", "host-b:2"]
+    assert pools[0]["snapshot"] == [{"host": "api.replicate.com", "requests": 7}]
+    assert pools[1]["snapshot"] == [{"host": "api.openai.com", "requests": 3}]
+
+
+def test_silent_workers_are_pruned(db_session) -> None:
+    persist_worker_health(db_session, worker_id="host-a:1", sections={"http_pools": []})
+    stale = db_session.get(WorkerHealthSnapshot, "host-a:1:http_pools")
+    stale.updated_at = utcnow() - timedelta(seconds=SNAPSHOT_RETENTION_SECONDS + 60)
+    db_session.commit()
+
+    persist_worker_health(db_session, worker_id="host-b:2", sections={"http_pools": []})
+    assert [entry["worker_id"] for entry in worker_health_snapshot(db_session)["http_pools"]] == ["host-b:2"]
+
+
+def test_open_breakers_are_published_from_the_worker(db_session, monkeypatch) -> None:
+    breakers = CircuitBreakerRegistry(failure_threshold=1, reset_seconds=60)
+    monkeypatch.setattr(retry, "_default_breakers", breakers)
+    breakers.get("replicate", "flux").record_failure()
+
+    persist_worker_health(db_session, worker_id="host-a:1")
+
+    [entry] = worker_health_snapshot(db_session)["circuit_breakers"]
+    assert entry["worker_id"] == "host-a:1"
+    assert [(breaker["key"], breaker["state"]) for breaker in entry["snapshot"]] == [("replicate:flux", "open")]
+
+
+def test_hedge_stats_are_published_from_the_worker(db_session, monkeypatch) -> None:
+    policy = HedgingPolicy(stages={"quality_gate"}, quantile=0.9, max_ratio=1.0, min_samples=1)
+    monkeypatch.setattr(hedging, "_default_policy", policy)
+    policy.run("quality_gate", lambda: "ok")
+
+    persist_worker_health(db_session, worker_id="host-a:1")
+
+    [entry] = worker_health_snapshot(db_session)["hedging"]
+    assert [(row["stage"], row["calls"]) for row in entry["snapshot"]] == [("quality_gate", 1)]
+
+
+def test_payload_cache_counters_are_published_from_the_worker(db_session, monkeypatch, tmp_path: Path) -> None:
+    cache = EncodedPayloadCache(max_bytes=1024)
+    monkeypatch.setattr(payload_cache, "_default_cache", cache)
+    image = tmp_path / "source.png"
+    image.write_bytes(b"png-bytes")
+    cache.encoded(image)
+    cache.encoded(image)
+
+    persist_worker_health(db_session, worker_id="host-a:1")
+
+    [entry] = worker_health_snapshot(db_session)["payload_cache"]
+    assert (entry["snapshot"]["hits"], entry["snapshot"]["misses"]) == (1, 1)
+
+
+def test_provider_file_counters_are_published_from_the_worker(db_session, monkeypatch) -> None:
+    cache = GoogleFileCache(enabled=True)
+    monkeypatch.setattr(provider_files, "_default_cache", cache)
+
+    persist_worker_health(db_session, worker_id="host-a:1")
+
+    [entry] = worker_health_snapshot(db_session)["provider_files"]
+    assert entry["snapshot"] == cache.snapshot()
+    assert entry["snapshot"]["enabled"] is True
+
+
+def test_sqlite_write_counters_are_published_from_the_worker(db_session, monkeypatch) -> None:
+    gate = SqliteWriteGate(single_writer=True)
+    monkeypatch.setattr(sqlite_profile, "_default_gate", gate)
+    factory = sessionmaker(bind=db_session.bind)
+    gate.install(factory)
+    with factory() as worker_db:
+        worker_db.add(RuntimeConfig(id=2))
+        worker_db.commit()
+
+    persist_worker_health(db_session, worker_id="host-a:1")
+
+    [entry] = worker_health_snapshot(db_session)["sqlite_writes"]
+    assert entry["snapshot"]["commits"] == 1
+    assert entry["snapshot"]["single_writer"] is True
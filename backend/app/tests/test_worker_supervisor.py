@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+
+from app.worker import _install_stop_handlers, _restart_delay, supervise_workers
+
+FORK = multiprocessing.get_context("fork")
+
+
+def _exit_immediately() -> None:
+    sys.exit(3)
+
+
+def _run_until_terminated() -> None:
+    signal.signal(signal.SIGTERM, lambda _signum, _frame: sys.exit(0))
+    while True:
+        time.sleep(0.05)
+
+
+def _ignore_sigterm() -> None:
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    while True:
+        time.sleep(0.05)
+
+
+def _supervise_for(seconds: float, **kwargs) -> dict[str, int]:
+    stopping = threading.Event()
+    timer = threading.Timer(seconds, stopping.set)
+    timer.start()
+    try:
+        return supervise_workers(1, stopping=stopping, context=FORK, poll_seconds=0.05, **kwargs)
+    finally:
+        timer.cancel()
+
+
+def test_restart_delay_backs_off_for_crash_loops_and_resets_when_stable() -> None:
+    assert _restart_delay(None, 0.1) == 1.0
+    assert _restart_delay(1.0, 0.1) == 2.0
+    assert _restart_delay(32.0, 0.1) == 60.0
+    assert _restart_delay(60.0, 0.1) == 60.0
+    assert _restart_delay(8.0, 61.0) == 1.0
+
+
+def test_supervisor_restarts_crashing_child_with_backoff() -> None:
+    stats = _supervise_for(2.5, target=_exit_immediately, drain_timeout_seconds=1.0)
+    assert stats["started"] == 2
+    assert stats["restarted"] == 1
+
+
+def test_supervisor_drains_children_on_sigterm() -> None:
+    previous = {signum: signal.getsignal(signum) for signum in (signal.SIGTERM, signal.SIGINT)}
+    stopping = threading.Event()
+    _install_stop_handlers(stopping, lambda: None)
+    timer = threading.Timer(0.3, os.kill, args=(os.getpid(), signal.SIGTERM))
+    timer.start()
+    started = time.monotonic()
+    try:
+        stats = supervise_workers(
+            1,
+            stopping=stopping,
+            target=_run_until_terminated,
+            context=FORK,
+            drain_timeout_seconds=5.0,
+            poll_seconds=0.05,
+        )
+    finally:
+        timer.cancel()
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+    assert stopping.is_set()
+    assert stats == {"started": 1, "restarted": 0, "drained": 1, "killed": 0}
+    assert time.monotonic() - started < 4.0
+
+
+def test_supervisor_kills_children_that_ignore_terminate() -> None:
+    stats = _supervise_for(0.3, target=_ignore_sigterm, drain_timeout_seconds=0.5)
+    assert stats == {"started": 1, "restarted": 0, "drained": 0, "killed": 1}
@@ -1,21 +1,34 @@
 from __future__ import annotations
 
+import argparse
 from concurrent.futures import Future, ThreadPoolExecutor
 import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
 import time
 
 from app.core.config import get_settings
 from app.core.logging import configure_logging
 from app.db.init_db import init_db
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, engine
+from app.services.adaptive_concurrency import PROVIDERS, get_concurrency_controller, persist_concurrency_snapshot
+from app.services.async_engine import get_async_engine, shutdown_async_engine
+from app.services.async_pipeline import create_pipeline_runner
 from app.services.csv_dag_service import CsvDagService
-from app.services.pipeline import PipelineRunner
+from app.services.http_pool import get_http_pool
 from app.services.repository import Repository
+from app.services.storage import storage_backend
+from app.services.storage_uploader import get_storage_uploader
+from app.services.work_signals import WorkSignalListener
+from app.services.worker_health import persist_worker_health
 
 
 def _process_single_run(run_id: str) -> None:
     with SessionLocal() as db:
-        runner = PipelineRunner(db)
+        runner = create_pipeline_runner(db)
         runner.process_run(run_id)
 
 
@@ -25,88 +38,308 @@ def _process_single_csv_task(task_id: str) -> None:
         service.execute_task(task_id)
 
 
-def run_worker() -> None:
+def _maintain_leases(
+    *,
+    worker_id: str,
+    leased_runs: set[str],
+    leased_tasks: set[str],
+    lock: threading.Lock,
+    stop: threading.Event,
+) -> None:
     settings = get_settings()
-    configure_logging(settings.app_log_level)
-    init_db()
-
     logger = logging.getLogger(__name__)
-    logger.info("worker started")
-    active_runs: dict[Future, str] = {}
-    active_csv_tasks: dict[Future, str] = {}
-
-    with ThreadPoolExecutor(max_workers=24) as executor:
-        while True:
+    last_pool_requests = 0
+    while not stop.wait(max(1.0, settings.worker_heartbeat_seconds)):
+        with lock:
+            run_ids = sorted(leased_runs)
+            task_ids = sorted(leased_tasks)
+        try:
             with SessionLocal() as db:
                 repo = Repository(db)
-                config = repo.get_runtime_config()
-                max_parallel_runs = max(1, min(int(config.max_parallel_runs), 12))
-                max_variant_workers = max(1, min(int(config.max_variant_workers), 12))
-                max_parallel_csv_tasks = max(1, min(max_parallel_runs * max_variant_workers, 24))
-                poll_seconds = config.worker_poll_seconds or settings.worker_poll_seconds
-
-            done = [future for future in active_runs if future.done()]
-            for future in done:
-                run_id = active_runs.pop(future)
-                try:
-                    future.result()
-                    logger.info("run finished", extra={"run_id": run_id})
-                except Exception as exc:  # noqa: BLE001
-                    logger.exception("run execution failed", extra={"run_id": run_id, "error": str(exc)})
-
-            done_csv = [future for future in active_csv_tasks if future.done()]
-            for future in done_csv:
-                task_id = active_csv_tasks.pop(future)
-                try:
-                    future.result()
-                    logger.info("csv task finished", extra={"csv_task_id": task_id})
-                except Exception as exc:  # noqa: BLE001
-                    logger.exception("csv task execution failed", extra={"csv_task_id": task_id, "error": str(exc)})
-
-            claimed_any = False
-            while len(active_runs) < max_parallel_runs:
-                with SessionLocal() as db:
-                    repo = Repository(db)
-                    run = repo.claim_next_queued_run()
-                if run is None:
-                    break
-                claimed_any = True
+                if run_ids or task_ids:
+                    extended = repo.extend_leases(worker_id=worker_id, run_ids=run_ids, task_ids=task_ids)
+                    if extended < len(run_ids) + len(task_ids):
+                        logger.warning(
+                            "worker lost leases on in-flight work",
+                            extra={"worker_id": worker_id, "status": f"extended={extended}/{len(run_ids) + len(task_ids)}"},
+                        )
+                reaped = repo.reap_expired_leases()
+                persist_concurrency_snapshot(db, get_concurrency_controller(), worker_id=worker_id)
+                persist_worker_health(db, worker_id=worker_id)
+            pool_stats = get_http_pool().snapshot()
+            total_requests = sum(row["requests"] for row in pool_stats)
+            if total_requests != last_pool_requests:
+                last_pool_requests = total_requests
                 logger.info(
-                    "run claimed",
+                    "http pool stats",
+                    extra={
+                        "worker_id": worker_id,
+                        "status": ", ".join(f"{row['host']} requests={row['requests']} connections={row['new_connections']}" for row in pool_stats),
+                    },
+                )
+            if any(reaped.values()):
+                logger.warning(
+                    "reclaimed expired leases",
                     extra={
-                        "run_id": run.id,
-                        "status": run.status,
-                        "active_runs": len(active_runs) + 1,
-                        "max_parallel_runs": max_parallel_runs,
+                        "worker_id": worker_id,
+                        "status": ", ".join(f"{key}={len(value)}" for key, value in reaped.items() if value),
                     },
                 )
-                future = executor.submit(_process_single_run, run.id)
-                active_runs[future] = run.id
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("lease maintenance failed", extra={"worker_id": worker_id, "error": str(exc)})
+
+
+def _install_stop_handlers(stopping: threading.Event, on_stop) -> None:
+    if threading.current_thread() is not threading.main_thread():
+        return
 
-            while len(active_csv_tasks) < max_parallel_csv_tasks:
+    def _handle(_signum, _frame) -> None:
+        stopping.set()
+        on_stop()
+
+    signal.signal(signal.SIGTERM, _handle)
+    signal.signal(signal.SIGINT, _handle)
+
+
+def run_worker(*, initialize_db: bool = True) -> None:
+    settings = get_settings()
+    configure_logging(settings.app_log_level)
+    if initialize_db:
+        init_db()
+
+    logger = logging.getLogger(__name__)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info("worker started", extra={"worker_id": worker_id, "status": "async_variants" if settings.async_variants_enabled else "threads"})
+    if settings.async_variants_enabled:
+        get_async_engine()
+    write_behind = settings.storage_write_behind_enabled and storage_backend() == "supabase"
+    if write_behind:
+        get_storage_uploader().start()
+    active_runs: dict[Future, str] = {}
+    active_csv_tasks: dict[Future, str] = {}
+    signals = WorkSignalListener(engine).start()
+    stopping = threading.Event()
+    _install_stop_handlers(stopping, signals.wake)
+    lease_lock = threading.Lock()
+    leased_runs: set[str] = set()
+    leased_tasks: set[str] = set()
+    lease_stop = threading.Event()
+    lease_keeper = threading.Thread(
+        target=_maintain_leases,
+        kwargs={
+            "worker_id": worker_id,
+            "leased_runs": leased_runs,
+            "leased_tasks": leased_tasks,
+            "lock": lease_lock,
+            "stop": lease_stop,
+        },
+        name="lease-keeper",
+        daemon=True,
+    )
+    lease_keeper.start()
+
+    def _release_lease(ids: set[str], item_id: str) -> None:
+        with lease_lock:
+            ids.discard(item_id)
+        signals.wake()
+
+    try:
+        with ThreadPoolExecutor(max_workers=24) as executor:
+            while not stopping.is_set() or active_runs or active_csv_tasks:
                 with SessionLocal() as db:
                     repo = Repository(db)
-                    task = repo.claim_next_ready_csv_task()
-                if task is None:
-                    break
-                claimed_any = True
-                logger.info(
-                    "csv task claimed",
-                    extra={
-                        "csv_task_id": task.id,
-                        "task_key": task.task_key,
-                        "active_csv_tasks": len(active_csv_tasks) + 1,
-                        "max_parallel_csv_tasks": max_parallel_csv_tasks,
-                    },
+                    config = repo.get_runtime_config()
+                    if config.adaptive_concurrency_enabled:
+                        controller = get_concurrency_controller()
+                        max_parallel_runs = controller.limit("runs", PROVIDERS, initial=int(config.max_parallel_runs))
+                        max_variant_workers = controller.limit("variants", "google", initial=int(config.max_variant_workers))
+                    else:
+                        max_parallel_runs = max(1, min(int(config.max_parallel_runs), 12))
+                        max_variant_workers = max(1, min(int(config.max_variant_workers), 12))
+                    max_parallel_csv_tasks = max(1, min(max_parallel_runs * max_variant_workers, 24))
+                    poll_seconds = config.worker_poll_seconds or settings.worker_poll_seconds
+
+                done = [future for future in active_runs if future.done()]
+                for future in done:
+                    run_id = active_runs.pop(future)
+                    try:
+                        future.result()
+                        logger.info("run finished", extra={"run_id": run_id})
+                    except Exception as exc:  # noqa: BLE001
+                        logger.exception("run execution failed", extra={"run_id": run_id, "error": str(exc)})
+
+                done_csv = [future for future in active_csv_tasks if future.done()]
+                for future in done_csv:
+                    task_id = active_csv_tasks.pop(future)
+                    try:
+                        future.result()
+                        logger.info("csv task finished", extra={"csv_task_id": task_id})
+                    except Exception as exc:  # noqa: BLE001
+                        logger.exception("csv task execution failed", extra={"csv_task_id": task_id, "error": str(exc)})
+
+                if stopping.is_set():
+                    if active_runs or active_csv_tasks:
+                        logger.info(
+                            "worker draining",
+                            extra={"status": "draining", "active_runs": len(active_runs), "active_csv_tasks": len(active_csv_tasks)},
+                        )
+                        signals.wait(poll_seconds)
+                    continue
+
+                claimed_any = False
+                free_run_slots = max_parallel_runs - len(active_runs)
+                if free_run_slots > 0:
+                    with SessionLocal() as db:
+                        repo = Repository(db)
+                        claimed_runs = repo.claim_queued_runs(limit=free_run_slots, worker_id=worker_id)
+                    for run in claimed_runs:
+                        claimed_any = True
+                        logger.info(
+                            "run claimed",
+                            extra={
+                                "run_id": run.id,
+                                "status": run.status,
+                                "active_runs": len(active_runs) + 1,
+                                "max_parallel_runs": max_parallel_runs,
+                            },
+                        )
+                        with lease_lock:
+                            leased_runs.add(run.id)
+                        future = executor.submit(_process_single_run, run.id)
+                        future.add_done_callback(lambda _future, run_id=run.id: _release_lease(leased_runs, run_id))
+                        active_runs[future] = run.id
+
+                free_csv_slots = max_parallel_csv_tasks - len(active_csv_tasks)
+                if free_csv_slots > 0:
+                    with SessionLocal() as db:
+                        repo = Repository(db)
+                        claimed_tasks = repo.claim_ready_csv_tasks(limit=free_csv_slots, worker_id=worker_id)
+                    for task in claimed_tasks:
+                        claimed_any = True
+                        logger.info(
+                            "csv task claimed",
+                            extra={
+                                "csv_task_id": task.id,
+                                "task_key": task.task_key,
+                                "active_csv_tasks": len(active_csv_tasks) + 1,
+                                "max_parallel_csv_tasks": max_parallel_csv_tasks,
+                            },
+                        )
+                        with lease_lock:
+                            leased_tasks.add(task.id)
+                        future = executor.submit(_process_single_csv_task, task.id)
+                        future.add_done_callback(lambda _future, task_id=task.id: _release_lease(leased_tasks, task_id))
+                        active_csv_tasks[future] = task.id
+
+                if not claimed_any:
+                    signals.wait(poll_seconds)
+    finally:
+        lease_stop.set()
+        lease_keeper.join(timeout=5)
+        signals.close()
+        if settings.async_variants_enabled:
+            shutdown_async_engine()
+        if write_behind:
+            get_storage_uploader().close(drain_timeout=settings.worker_drain_timeout_seconds)
+        logger.info("worker stopped", extra={"worker_id": worker_id})
+
+
+def _run_worker_process() -> None:
+    run_worker(initialize_db=False)
+
+
+def _restart_delay(previous_delay: float | None, uptime_seconds: float, *, stable_seconds: float = 60.0) -> float:
+    if uptime_seconds > stable_seconds:
+        return 1.0
+    return min((previous_delay or 0.5) * 2, 60.0)
+
+
+def supervise_workers(
+    processes: int,
+    *,
+    stopping: threading.Event,
+    target=_run_worker_process,
+    context=None,
+    drain_timeout_seconds: float | None = None,
+    poll_seconds: float = 0.5,
+    stable_seconds: float = 60.0,
+) -> dict[str, int]:
+    logger = logging.getLogger(__name__)
+    context = context or multiprocessing.get_context("spawn")
+    drain_timeout = get_settings().worker_drain_timeout_seconds if drain_timeout_seconds is None else drain_timeout_seconds
+    children: dict[int, multiprocessing.Process] = {}
+    started_at: dict[int, float] = {}
+    restart_delay: dict[int, float] = {}
+    restart_at: dict[int, float] = {}
+    stats = {"started": 0, "restarted": 0, "drained": 0, "killed": 0}
+
+    def _start(slot: int) -> None:
+        process = context.Process(target=target, name=f"aac-worker-{slot}")
+        process.start()
+        children[slot] = process
+        started_at[slot] = time.monotonic()
+        stats["started"] += 1
+        logger.info("worker process started", extra={"status": "started", "worker_id": f"{socket.gethostname()}:{process.pid}"})
+
+    for slot in range(processes):
+        _start(slot)
+
+    while not stopping.is_set():
+        now = time.monotonic()
+        for slot, process in list(children.items()):
+            if process.is_alive():
+                continue
+            if slot not in restart_at:
+                delay = _restart_delay(restart_delay.get(slot), now - started_at.get(slot, now), stable_seconds=stable_seconds)
+                restart_delay[slot] = delay
+                restart_at[slot] = now + delay
+                logger.warning(
+                    "worker process exited, restarting",
+                    extra={"status": f"exitcode={process.exitcode}", "worker_id": f"{socket.gethostname()}:{process.pid}", "latency_ms": int(delay * 1000)},
                 )
-                future = executor.submit(_process_single_csv_task, task.id)
-                active_csv_tasks[future] = task.id
+            elif now >= restart_at[slot]:
+                restart_at.pop(slot)
+                stats["restarted"] += 1
+                _start(slot)
+        stopping.wait(poll_seconds)
+
+    logger.info("worker supervisor draining", extra={"status": "draining"})
+    for process in children.values():
+        if process.is_alive():
+            process.terminate()
+    deadline = time.monotonic() + drain_timeout
+    for process in children.values():
+        process.join(timeout=max(0.0, deadline - time.monotonic()))
+    for process in children.values():
+        if process.is_alive():
+            logger.warning("worker process did not drain in time, killing", extra={"status": "killed", "worker_id": f"{socket.gethostname()}:{process.pid}"})
+            process.kill()
+            process.join()
+            stats["killed"] += 1
+        else:
+            stats["drained"] += 1
+    logger.info("worker supervisor stopped", extra={"status": "stopped"})
+    return stats
+
+
+def run_supervisor(processes: int) -> None:
+    settings = get_settings()
+    configure_logging(settings.app_log_level)
+    init_db()
+    stopping = threading.Event()
+    _install_stop_handlers(stopping, lambda: None)
+    supervise_workers(processes, stopping=stopping, drain_timeout_seconds=settings.worker_drain_timeout_seconds)
+
 
-            if not claimed_any and not active_runs and not active_csv_tasks:
-                time.sleep(poll_seconds)
-            elif not claimed_any:
-                time.sleep(0.25)
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.worker")
+    parser.add_argument("--processes", type=int, default=get_settings().worker_processes)
+    args = parser.parse_args(argv)
+    if args.processes > 1:
+        run_supervisor(args.processes)
+    else:
+        run_worker()
 
 
 if __name__ == "__main__":
-    run_worker()
+    main()